@@ -1,115 +1,117 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware  
-from pydantic import BaseModel, EmailStr
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
+from dotenv import load_dotenv
+import csv
+import hashlib
+import hmac
+import io
+import json
 import sys
 import os
+import tempfile
+import threading
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-app = FastAPI(title="Ticket Booking System", version="1.0")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-try:
-    from src.logic import EventManager, BookingManager
-    event_manager = EventManager()
-    booking_manager = BookingManager()
-except Exception as e:
-    # Fall back to simple managers that use DatabaseManager directly.
-    from src.db import DatabaseManager
-    db = DatabaseManager()
-
-    class EventManager:
-        def add_event(self, event_name, venue, date, total_seats):
-            result = db.create_event(event_name, venue, date, total_seats, total_seats)
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data:
-                return {"success": True, "message": "Event created successfully", "data": data}
-            return {"success": False, "message": str(error) if error else "Unknown error"}
-
-        def get_events(self):
-            result = db.get_all_events()
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data is not None:
-                return {"success": True, "data": data}
-            return {"success": False, "message": str(error) if error else "Unknown error"}
-
-        def get_event(self, event_id):
-            result = db.get_event_by_id(event_id)
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data:
-                return {"success": True, "data": data}
-            return {"success": False, "message": str(error) if error else "Event not found"}
-
-        def delete_event(self, event_id):
-            result = db.delete_event(event_id)
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data:
-                return {"success": True, "message": "Event deleted successfully"}
-            return {"success": False, "message": str(error) if error else "Unknown error"}
-
-    class BookingManager:
-        def book_event(self, user_name, user_email, event_id, seats_booked):
-            result = db.create_booking(user_name, user_email, event_id, seats_booked)
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data:
-                # decrement seats if possible
-                ev = db.get_event_by_id(event_id)
-                ev_data = getattr(ev, 'data', None)
-                if ev_data and isinstance(ev_data, dict):
-                    try:
-                        avail = int(ev_data.get('seats_available', 0)) - int(seats_booked)
-                        db.update_event_seats(event_id, avail)
-                    except Exception:
-                        pass
-                return {"success": True, "message": "Booking created successfully", "data": data}
-            return {"success": False, "message": str(error) if error else "Unknown error"}
-
-        def get_all_bookings(self):
-            result = db.get_all_bookings()
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data is not None:
-                return {"success": True, "data": data}
-            return {"success": False, "message": str(error) if error else "Unknown error"}
-
-        def get_bookings_by_event(self, event_id):
-            result = db.get_bookings_by_event(event_id)
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data is not None:
-                return {"success": True, "data": data}
-            return {"success": False, "message": str(error) if error else "No bookings found"}
-
-        def update_booking_seats(self, booking_id, seats_booked):
-            result = db.update_booking(booking_id, seats_booked)
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data:
-                return {"success": True, "message": "Booking updated successfully"}
-            return {"success": False, "message": str(error) if error else "Unknown error"}
-
-        def delete_booking(self, booking_id):
-            result = db.delete_booking(booking_id)
-            data = getattr(result, 'data', None)
-            error = getattr(result, 'error', None)
-            if data:
-                return {"success": True, "message": "Booking deleted successfully"}
-            return {"success": False, "message": str(error) if error else "Unknown error"}
-
-    event_manager = EventManager()
-    booking_manager = BookingManager()
+# settings in .env are loaded once, here, before any module reads them
+load_dotenv()
+
+from src.logic import AsyncEventManager, AsyncBookingManager, AsyncSeatHoldManager, AsyncWaitlistManager
+from src.waitlist import Waitlist
+from src.db import get_async_database_manager, database_backend, BOOKING_FIELDS
+from src.importer import check_records, iter_event_records
+from src.cache import cache_stats, TTLCache, EVENT_CACHE_SIZE, EVENT_CACHE_TTL
+from src.metrics import MetricsMiddleware, render as render_metrics, stale_event_ids
+from src.profiling import SlowRequestMiddleware, profiler, slow_log
+from src.idempotency import IdempotencyConflict, create_idempotency_cache, request_fingerprint
+from src.seat_feed import seat_feed
+
+# --- Services ---
+# The store client and managers are built by the lifespan warm-up, or by the
+# first request if the app is served without one; importing this module
+# connects to nothing.
+db_for_versions = None
+event_manager = None
+booking_manager = None
+hold_manager = None
+waitlist_manager = None
+# responses of POST /bookings by Idempotency-Key, replayed on retries
+idempotency = None
+# freed seats are offered to the event's waitlist first
+waitlist = Waitlist()
+_services_lock = threading.Lock()
+_ready = False
+
+
+def init_services():
+    global db_for_versions, event_manager, booking_manager, hold_manager, waitlist_manager, idempotency
+    with _services_lock:
+        if booking_manager is not None:
+            return
+        db_for_versions = get_async_database_manager()
+        # counts the seat feed cannot take from the write itself are read back here
+        seat_feed.loader = db_for_versions.get_events_by_ids
+        idempotency = create_idempotency_cache()
+        event_manager = AsyncEventManager()
+        hold_manager = AsyncSeatHoldManager(waitlist=waitlist)
+        bookings = AsyncBookingManager(waitlist=waitlist)
+        waitlist_manager = AsyncWaitlistManager(waitlist, bookings, hold_manager)
+        # set last: the other routes only check this one
+        booking_manager = bookings
+
+
+async def _services():
+    if booking_manager is None:
+        init_services()
+
+
+async def warm_up():
+    '''
+    Build the services and make one small read, so the store client and its
+    connections exist before the first real request; then start the hold
+    expiry task
+    '''
+    global _ready
+    init_services()
+    result = await db_for_versions.get_all_events(1, None, ["id"])
+    if getattr(result, "error", None):
+        raise RuntimeError(str(result.error))
+    # holds that expired while the API was down get their seats back now
+    await hold_manager.start()
+    _ready = True
+
+
+@asynccontextmanager
+async def lifespan(app):
+    started = time.perf_counter()
+    try:
+        await warm_up()
+        print(f"[API] Ready ({database_backend()} store) after {(time.perf_counter() - started) * 1000:.0f} ms warm-up.")
+    except Exception as e:
+        # keep serving: /readyz reports the failure and retries the warm-up
+        print(f"[API] Warm-up failed: {e}")
+    yield
+    if hold_manager is not None:
+        await hold_manager.close()
+    if waitlist_manager is not None:
+        await waitlist_manager.close()
+    if db_for_versions is not None:
+        # acknowledged writes still in the write-ahead log's buffer
+        await db_for_versions.close()
+
+
+# every route but the health checks needs the services
+router = APIRouter(dependencies=[Depends(_services)])
+health = APIRouter()
+
+# admin endpoints are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 # --- Models ---
 
@@ -129,23 +131,152 @@ class BookingCreate(BaseModel):
 class BookingUpdate(BaseModel):
     seats_booked: int
 
+class BookingBatch(BaseModel):
+    bookings: List[BookingCreate] = Field(..., min_length=1, max_length=500)
+
+class HoldCreate(BaseModel):
+    event_id: int
+    seats: int = Field(..., gt=0)
+    user_name: Optional[str] = None
+    user_email: Optional[EmailStr] = None
+    ttl_seconds: Optional[float] = Field(None, gt=0)
+
+class HoldConfirm(BaseModel):
+    user_name: Optional[str] = None
+    user_email: Optional[EmailStr] = None
+
+class WaitlistJoin(BaseModel):
+    user_name: str
+    user_email: EmailStr
+    seats: int = Field(..., gt=0)
+    # "book": booked automatically when seats free up; "hold": seats are held for checkout
+    mode: str = Field("book", pattern="^(book|hold)$")
+
+# --- Pagination ---
+# list endpoints return at most this many rows per page; follow next_cursor via ?after=
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _split_fields(fields):
+    # "id,event_name" -> ["id", "event_name"]
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+# --- Conditional GET ---
+# serialized event responses keyed by (request, events_version); a repeat
+# poll of an unchanged listing is answered from here without re-reading or
+# re-encoding anything, and with a 304 when the client already has it
+_etag_memo = TTLCache(maxsize=EVENT_CACHE_SIZE, ttl=EVENT_CACHE_TTL)
+
+
+def _if_none_match(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip() for t in header.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def _etag_reply(request, etag, body):
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _etag_cached(request, key):
+    version = db_for_versions.get_events_version()
+    entry = _etag_memo.get((key, version), None)
+    if entry is None:
+        return version, None
+    etag, body = entry
+    return version, _etag_reply(request, etag, body)
+
+
+def _etag_store(request, key, version, result):
+    body = json.dumps(jsonable_encoder(result)).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    _etag_memo.set((key, version), (etag, body))
+    return _etag_reply(request, etag, body)
+
+# uploads to /events/bulk stay in memory up to this size, then spill to disk
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+# --- Export ---
+async def _ndjson_chunks(pages):
+    async for rows in pages:
+        yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+
+async def _csv_chunks(pages, header):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=header, extrasaction="ignore")
+    writer.writeheader()
+    yield buf.getvalue()
+    async for rows in pages:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(rows)
+        yield buf.getvalue()
+
 # --- EVENTS ---
-@app.get("/events")
-def get_events():
+@router.get("/events")
+async def get_events(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    key = ("events", limit, after, fields)
+    version, cached = _etag_cached(request, key)
+    if cached is not None:
+        return cached
     try:
-        result = event_manager.get_events()
+        result = await event_manager.get_events(limit, after, _split_fields(fields))
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["message"])
-        return result
+        return _etag_store(request, key, version, result)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.get("/events/{event_id}")
-def get_event(event_id: int):
+@router.get("/events/stream")
+async def stream_seats(event_id: Optional[List[int]] = Query(None)):
+    # Server-Sent Events: {"seq": n, "seats": {"<event_id>": seats_available}}
+    # whenever counts change (null once an event is deleted); ?event_id= filters
     try:
-        result = event_manager.get_event(event_id)
+        subscriber = seat_feed.subscribe(event_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(seat_feed.messages(subscriber), media_type="text/event-stream", headers=headers)
+
+@router.get("/events/{event_id}")
+async def get_event(request: Request, event_id: int):
+    key = ("event", event_id)
+    version, cached = _etag_cached(request, key)
+    if cached is not None:
+        return cached
+    try:
+        result = await event_manager.get_event(event_id)
+        if not result["success"]:
+            raise HTTPException(status_code=404, detail=result["message"])
+        return _etag_store(request, key, version, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.get("/events/{event_id}/stats")
+async def get_event_stats(event_id: int):
+    try:
+        result = await booking_manager.get_event_stats(event_id)
         if not result["success"]:
             raise HTTPException(status_code=404, detail=result["message"])
         return result
@@ -154,10 +285,23 @@ def get_event(event_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.post("/events")
-def create_event(event: EventCreate):
+@router.get("/stats")
+async def get_stats(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    # totals plus the `limit` best-selling events, added up by the store
     try:
-        result = event_manager.add_event(event.event_name, event.venue, event.date, event.total_seats)
+        result = await booking_manager.get_stats(limit)
+        if not result["success"]:
+            raise HTTPException(status_code=500, detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.post("/events")
+async def create_event(event: EventCreate):
+    try:
+        result = await event_manager.add_event(event.event_name, event.venue, event.date, event.total_seats)
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["message"])
         return result
@@ -166,10 +310,32 @@ def create_event(event: EventCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.delete("/events/{event_id}")
-def delete_event(event_id: int):
+@router.post("/events/bulk")
+async def import_events(request: Request, format: str = Query("csv", pattern="^(csv|json|ndjson)$")):
+    # spool the upload (memory first, disk past IMPORT_SPOOL_SIZE) and parse it as a
+    # stream: once to check it can be read to the end, then again to import it, so
+    # a bad byte near the end is a 400 with nothing imported
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as spool:
+            async for chunk in request.stream():
+                spool.write(chunk)
+            spool.seek(0)
+            text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+            try:
+                check_records(text, format)
+                result = await event_manager.import_events(iter_event_records(text, format))
+            finally:
+                text.detach()
+        return result
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read upload: {e}") from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.delete("/events/{event_id}")
+async def delete_event(event_id: int):
     try:
-        result = event_manager.delete_event(event_id)
+        result = await event_manager.delete_event(event_id)
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["message"])
         return result
@@ -179,22 +345,66 @@ def delete_event(event_id: int):
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 # --- BOOKINGS ---
-@app.get("/bookings")
-def get_all_bookings():
+@router.get("/bookings")
+async def get_all_bookings(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    email: Optional[str] = Query(None, min_length=3, max_length=254),
+):
+    # ?email= looks up one customer's bookings through the user_email index
     try:
-        result = booking_manager.get_all_bookings()
+        if email:
+            result = await booking_manager.get_bookings_by_email(email, limit, after, _split_fields(fields))
+        else:
+            result = await booking_manager.get_all_bookings(limit, after, _split_fields(fields))
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["message"])
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.get("/bookings/export")
+async def export_bookings(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    event_id: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    # streamed page by page so memory stays flat however many rows there are
+    try:
+        columns = _split_fields(fields)
+        pages = booking_manager.iter_booking_pages(event_id, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    if format == "csv":
+        header = ["id"] + [c for c in columns if c != "id"] if columns else list(BOOKING_FIELDS)
+        return StreamingResponse(
+            _csv_chunks(pages, header),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=bookings.csv"},
+        )
+    return StreamingResponse(_ndjson_chunks(pages), media_type="application/x-ndjson")
+
+@router.get("/bookings/{booking_id}")
+async def get_booking(booking_id: int):
+    try:
+        result = await booking_manager.get_booking(booking_id)
+        if not result["success"]:
+            raise HTTPException(status_code=404, detail=result["message"])
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.get("/bookings/event/{event_id}")
-def get_bookings_by_event(event_id: int):
+@router.get("/bookings/event/{event_id}")
+async def get_bookings_by_event(event_id: int):
     try:
-        result = booking_manager.get_bookings_by_event(event_id)
+        result = await booking_manager.get_bookings_by_event(event_id)
         if not result["success"]:
             raise HTTPException(status_code=404, detail=result["message"])
         return result
@@ -203,10 +413,9 @@ def get_bookings_by_event(event_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.post("/bookings")
-def create_booking(booking: BookingCreate):
+async def _book(booking: BookingCreate):
     try:
-        result = booking_manager.book_event(
+        result = await booking_manager.book_event(
             booking.user_name,
             booking.user_email,
             booking.event_id,
@@ -220,10 +429,50 @@ def create_booking(booking: BookingCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.put("/bookings/{booking_id}")
-def update_booking(booking_id: int, update: BookingUpdate):
+async def _book_response(booking: BookingCreate):
+    # (status, body) of a booking attempt, errors included, so it can be replayed
+    try:
+        return 200, jsonable_encoder(await _book(booking))
+    except HTTPException as e:
+        return e.status_code, {"detail": e.detail}
+
+@router.post("/bookings")
+async def create_booking(booking: BookingCreate, idempotency_key: Optional[str] = Header(None, max_length=255)):
+    # without a key every request books; with one, retries get the first response
+    if not idempotency_key:
+        return await _book(booking)
+    fingerprint = request_fingerprint("POST /bookings", booking.model_dump(mode="json"))
+    try:
+        status, body, replayed = await idempotency.run(idempotency_key, fingerprint, lambda: _book_response(booking))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(body, status_code=status, headers=headers)
+
+@router.post("/bookings/batch")
+async def create_bookings_batch(batch: BookingBatch):
+    # per-item outcomes are in data; the request itself only fails on server errors
+    try:
+        return await booking_manager.book_batch([b.model_dump() for b in batch.bookings])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.put("/bookings/{booking_id}")
+async def update_booking(booking_id: int, update: BookingUpdate):
+    try:
+        result = await booking_manager.update_booking_seats(booking_id, update.seats_booked)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.delete("/bookings/{booking_id}")
+async def delete_booking(booking_id: int):
     try:
-        result = booking_manager.update_booking_seats(booking_id, update.seats_booked)
+        result = await booking_manager.delete_booking(booking_id)
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["message"])
         return result
@@ -232,10 +481,16 @@ def update_booking(booking_id: int, update: BookingUpdate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.delete("/bookings/{booking_id}")
-def delete_booking(booking_id: int):
+# --- Seat holds ---
+
+def _hold_status(result):
+    # unknown/expired holds are 404, everything else the caller can fix is 400
+    return 404 if result["message"].startswith("Hold") else 400
+
+@router.post("/holds")
+async def create_hold(hold: HoldCreate):
     try:
-        result = booking_manager.delete_booking(booking_id)
+        result = await hold_manager.place_hold(hold.event_id, hold.seats, hold.ttl_seconds, hold.user_name, hold.user_email)
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["message"])
         return result
@@ -244,10 +499,150 @@ def delete_booking(booking_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.get("/")
-def home():
+@router.get("/holds/{hold_id}")
+async def get_hold(hold_id: str):
+    result = await hold_manager.get_hold(hold_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+@router.post("/holds/{hold_id}/confirm")
+async def confirm_hold(hold_id: str, details: Optional[HoldConfirm] = None):
+    try:
+        details = details or HoldConfirm()
+        result = await hold_manager.confirm_hold(hold_id, details.user_name, details.user_email)
+        if not result["success"]:
+            raise HTTPException(status_code=_hold_status(result), detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.delete("/holds/{hold_id}")
+async def release_hold(hold_id: str):
+    try:
+        result = await hold_manager.release_hold(hold_id)
+        if not result["success"]:
+            raise HTTPException(status_code=_hold_status(result), detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+# --- Waitlist ---
+
+@router.post("/events/{event_id}/waitlist")
+async def join_waitlist(event_id: int, join: WaitlistJoin):
+    try:
+        result = await waitlist_manager.join(event_id, join.user_name, join.user_email, join.seats, join.mode)
+        if not result["success"]:
+            status = 404 if result["message"] == "Event not found" else 400
+            raise HTTPException(status_code=status, detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+@router.get("/waitlist/{entry_id}")
+async def get_waitlist_entry(entry_id: str):
+    result = await waitlist_manager.get_entry(entry_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+@router.delete("/waitlist/{entry_id}")
+async def leave_waitlist(entry_id: str):
+    result = await waitlist_manager.leave(entry_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return {"success": True, "data": cache_stats()}
+
+@router.get("/metrics")
+async def metrics():
+    # re-read events whose seats changed without the row being returned
+    stale = stale_event_ids()
+    if stale:
+        await db_for_versions.get_events_by_ids(stale)
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def _require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@router.post("/admin/profile")
+async def run_profile(
+    request: Request,
+    seconds: Optional[float] = Query(None, gt=0),
+    requests: Optional[int] = Query(None, ge=1),
+    mode: str = Query("sample", pattern="^(sample|cprofile)$"),
+    interval_ms: float = Query(5, ge=1, le=1000),
+):
+    _require_admin(request)
+    try:
+        dump = await profiler.run(seconds, requests, mode, interval_ms / 1000.0)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return Response(dump, media_type="text/plain")
+
+@router.get("/admin/slow-requests")
+async def get_slow_requests(request: Request, limit: int = Query(50, ge=1, le=1000)):
+    _require_admin(request)
+    return {"success": True, "threshold_ms": slow_log.threshold_ms, "data": slow_log.entries(limit)}
+
+@router.get("/")
+async def home():
     return {"message": "API is running!"}
 
+# --- Health ---
+@health.get("/healthz")
+async def healthz():
+    # liveness: the process serves requests; touches no store
+    return {"status": "ok"}
+
+@health.get("/readyz")
+async def readyz():
+    # readiness: the store answered the warm-up read
+    if not _ready:
+        try:
+            await warm_up()
+        except Exception as e:
+            return JSONResponse(status_code=503, content={"status": "unavailable", "detail": str(e)})
+    return {"status": "ready", "backend": database_backend()}
+
+
+def create_app():
+    '''
+    Build the API application; stores are connected by its lifespan warm-up
+    '''
+    app = FastAPI(title="Ticket Booking System", version="1.0", lifespan=lifespan)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    # per-route latency histograms and status counts, served at /metrics
+    app.add_middleware(MetricsMiddleware)
+    # per-request call trace for the slow-request log (see /admin/slow-requests)
+    app.add_middleware(SlowRequestMiddleware)
+    app.include_router(health)
+    app.include_router(router)
+    return app
+
+
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
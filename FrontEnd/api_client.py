@@ -0,0 +1,171 @@
+# api_client.py
+import json
+import threading
+import time
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
+
+TIMEOUT = 5
+# event pages are shared by every session for this long; writes clear them at once.
+# Seat counts on them are kept live by SeatFeed, so this only delays new events.
+EVENTS_TTL = 30
+POOL_SIZE = 10
+# responses remembered for conditional GETs
+ETAG_ENTRIES = 256
+
+_etags = {}
+_etags_lock = threading.Lock()
+
+
+@st.cache_resource
+def _session():
+    '''
+    One keep-alive connection pool for the whole Streamlit server
+    '''
+    # connection failures are retried for every method (nothing was sent);
+    # gateway errors only for requests that are safe to repeat
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "DELETE"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _parse(resp):
+    try:
+        return resp.status_code, resp.json()
+    except ValueError:
+        return None, f"Invalid JSON response (status {resp.status_code}): {resp.text}"
+
+
+def get(url):
+    '''
+    GET url; returns (status, data), or (None, error message) if the API
+    could not be reached. Replays the last ETag for the URL and reuses its
+    body on 304.
+    '''
+    cached = _etags.get(url)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    try:
+        resp = _session().get(url, timeout=TIMEOUT, headers=headers)
+    except RequestException as e:
+        return None, f"Connection error: {e}"
+    if resp.status_code == 304 and cached:
+        return 304, cached[1]
+    status, data = _parse(resp)
+    if status == 200 and resp.headers.get("ETag"):
+        with _etags_lock:
+            _etags.pop(url, None)
+            _etags[url] = (resp.headers["ETag"], data)
+            while len(_etags) > ETAG_ENTRIES:
+                del _etags[next(iter(_etags))]
+    return status, data
+
+
+def post(url, json=None, headers=None):
+    try:
+        resp = _session().post(url, json=json, headers=headers, timeout=TIMEOUT)
+    except RequestException as e:
+        return None, f"Connection error: {e}"
+    return _parse(resp)
+
+
+def delete(url):
+    try:
+        resp = _session().delete(url, timeout=TIMEOUT)
+    except RequestException as e:
+        return None, f"Connection error: {e}"
+    return _parse(resp)
+
+
+class _Uncached(Exception):
+    pass
+
+
+@st.cache_data(ttl=EVENTS_TTL, show_spinner=False)
+def _cached_get(url):
+    status, data = get(url)
+    if status not in (200, 304):
+        # errors are raised so st.cache_data does not keep them
+        raise _Uncached(status, data)
+    return status, data
+
+
+def get_events(url):
+    '''
+    get() for event listings, served from a short-lived cache shared by all
+    sessions so reruns of the script do not hit the API
+    '''
+    try:
+        return _cached_get(url)
+    except _Uncached as e:
+        return e.args
+
+
+def invalidate_events():
+    '''
+    Drop cached event listings after a write that changes them
+    '''
+    _cached_get.clear()
+
+
+class SeatFeed:
+    """
+    Live seats_available per event, kept current by one background thread
+    reading the API's /events/stream (Server-Sent Events) and reconnecting
+    with backoff. Pages read seats() instead of re-fetching events.
+    """
+
+    def __init__(self, base_url):
+        self.url = f"{base_url}/events/stream"
+        self.connected = False
+        self._seats = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="seat-feed", daemon=True)
+        self._thread.start()
+
+    def seats(self, event_id, default=None):
+        with self._lock:
+            return self._seats.get(str(event_id), default)
+
+    def _run(self):
+        delay = 1.0
+        session = requests.Session()
+        while True:
+            try:
+                # read timeout above the server's 15s heartbeat
+                with session.get(self.url, stream=True, timeout=(TIMEOUT, 45)) as resp:
+                    resp.raise_for_status()
+                    self.connected, delay = True, 1.0
+                    for line in resp.iter_lines(decode_unicode=True):
+                        if line and line.startswith("data:"):
+                            changes = json.loads(line[5:])["seats"]
+                            with self._lock:
+                                self._seats.update(changes)
+            except (RequestException, ValueError):
+                pass
+            # counts seen before the gap may be stale; listings fill in meanwhile
+            self.connected = False
+            with self._lock:
+                self._seats.clear()
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+@st.cache_resource
+def seat_feed(base_url):
+    '''
+    The SeatFeed for an API, shared by every session of the Streamlit server
+    '''
+    return SeatFeed(base_url)
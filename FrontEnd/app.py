@@ -1,45 +1,44 @@
 import streamlit as st
-import requests
-from requests.exceptions import RequestException
 import datetime
+from urllib.parse import quote
+
+import api_client as api
 
 API_URL = "http://localhost:8000"
+PAGE_SIZE = 20
+# seconds between redraws of the live seat counts on the events page
+SEATS_REFRESH = 2
 
 st.set_page_config(page_title="Ticket Booking System", layout="centered")
 
 
-def _safe_request_get(url, timeout=5):
-    try:
-        resp = requests.get(url, timeout=timeout)
-    except RequestException as e:
-        return None, f"Connection error: {e}"
-    try:
-        data = resp.json()
-    except Exception:
-        return None, f"Invalid JSON response (status {resp.status_code}): {resp.text}"
-    return resp, data
+def _page_controls(state_key, next_cursor):
+    # keyset paging: the API hands back next_cursor, we send it as ?after=
+    col_first, col_next = st.columns(2)
+    if st.session_state.get(state_key) and col_first.button("First page", key=f"{state_key}_first"):
+        st.session_state[state_key] = None
+        st.rerun()
+    if next_cursor and col_next.button("Next page", key=f"{state_key}_next"):
+        st.session_state[state_key] = next_cursor
+        st.rerun()
 
 
-def _safe_request_post(url, json=None, timeout=5):
-    try:
-        resp = requests.post(url, json=json, timeout=timeout)
-    except RequestException as e:
-        return None, f"Connection error: {e}"
-    try:
-        data = resp.json()
-    except Exception:
-        return None, f"Invalid JSON response (status {resp.status_code}): {resp.text}"
-    return resp, data
+def _page_url(path, state_key):
+    cursor = st.session_state.get(state_key)
+    url = f"{API_URL}{path}?limit={PAGE_SIZE}"
+    if cursor:
+        url += f"&after={cursor}"
+    return url
 
 
 def show_events():
     st.header("Available Events")
-    resp, parsed = _safe_request_get(f"{API_URL}/events")
-    if resp is None:
+    status, parsed = api.get_events(_page_url("/events", "events_cursor"))
+    if status is None:
         st.error(parsed)
         return
 
-    if resp.status_code != 200:
+    if status not in (200, 304):
         msg = parsed.get("detail") if isinstance(parsed, dict) else parsed
         st.error(f"Could not fetch events: {msg}")
         return
@@ -62,14 +61,63 @@ def show_events():
         st.write(f"Venue: {venue}")
         st.write(f"Date: {date}")
         st.write(f"Total Seats: {total}")
-        st.write(f"Seats Available: {avail}")
+        _live_seats(event, eid, name, avail)
+        if not avail or int(avail) <= 0 or eid in st.session_state.get("waitlist", {}):
+            _waitlist_controls(eid)
+
+    _page_controls("events_cursor", parsed.get("next_cursor"))
+
 
-        if avail and int(avail) > 0:
-            if st.button(f"Book for {name}", key=f"book_{eid}"):
-                st.session_state["selected_event"] = event
-                st.session_state["page"] = "book"
+@st.fragment(run_every=SEATS_REFRESH)
+def _live_seats(event, eid, name, avail):
+    # redrawn on its own every few seconds from the pushed seat counts; no API call
+    avail = api.seat_feed(API_URL).seats(eid, avail)
+    if avail is None:
+        st.info("This event is no longer available.")
+        return
+    st.write(f"Seats Available: {avail}")
+    if avail and int(avail) > 0:
+        if st.button(f"Book for {name}", key=f"book_{eid}"):
+            st.session_state["selected_event"] = {**event, "seats_available": avail}
+            st.session_state["page"] = "book"
+            st.rerun()
+    else:
+        st.info("Sold out or seats unavailable.")
+
+
+def _waitlist_controls(event_id):
+    # sold out: queue for the next freed seats instead of refreshing
+    entries = st.session_state.setdefault("waitlist", {})
+    entry = entries.get(event_id)
+    if entry:
+        status, parsed = api.get(f"{API_URL}/waitlist/{entry['entry_id']}")
+        if status in (200, 304):
+            entry = entries[event_id] = parsed["data"]
+        if entry["status"] == "waiting":
+            st.write(f"On the waitlist, position {entry['position']}.")
+        elif entry["status"] == "booked":
+            st.success("Seats freed up: your booking is confirmed.")
+        elif entry["status"] == "held":
+            st.success("Seats freed up and are held for you.")
         else:
-            st.info("Sold out or seats unavailable.")
+            st.write(f"Waitlist: {entry['status']}.")
+        return
+
+    with st.expander("Join the waitlist"):
+        user_name = st.text_input("Your Name", key=f"wl_name_{event_id}")
+        user_email = st.text_input("Your Email", key=f"wl_email_{event_id}")
+        seats = st.number_input("Number of Seats", min_value=1, value=1, key=f"wl_seats_{event_id}")
+        if st.button("Join waitlist", key=f"wl_join_{event_id}"):
+            payload = {"user_name": user_name, "user_email": user_email, "seats": int(seats)}
+            status, parsed = api.post(f"{API_URL}/events/{event_id}/waitlist", json=payload)
+            if status is None:
+                st.error(parsed)
+            elif status == 200:
+                entries[event_id] = parsed["data"]
+                st.rerun()
+            else:
+                detail = parsed.get("detail") if isinstance(parsed, dict) else parsed
+                st.error(detail or "Could not join the waitlist.")
 
 
 def create_event():
@@ -85,11 +133,12 @@ def create_event():
             "date": date.isoformat() if isinstance(date, datetime.date) else str(date),
             "total_seats": int(total_seats),
         }
-        resp, parsed = _safe_request_post(f"{API_URL}/events", json=payload)
-        if resp is None:
+        status, parsed = api.post(f"{API_URL}/events", json=payload)
+        if status is None:
             st.error(parsed)
             return
-        if resp.status_code == 200:
+        if status == 200:
+            api.invalidate_events()
             st.success("Event created successfully!")
         else:
             detail = parsed.get("detail") if isinstance(parsed, dict) else parsed
@@ -106,36 +155,99 @@ def book_event(event):
     except Exception:
         avail_int = 0
 
-    seats_booked = st.number_input("Number of Seats", min_value=1, max_value=max(1, avail_int), value=1)
-    if st.button("Book Now"):
-        if avail_int <= 0:
-            st.error("No seats available for this event.")
-            return
-        payload = {
-            "user_name": user_name,
-            "user_email": user_email,
-            "event_id": event.get("id") or event.get("event_id"),
-            "seats_booked": int(seats_booked),
-        }
-        resp, parsed = _safe_request_post(f"{API_URL}/bookings", json=payload)
-        if resp is None:
+    event_id = event.get("id") or event.get("event_id")
+    hold = st.session_state.get("hold")
+    if hold and hold.get("event_id") != event_id:
+        hold = None
+
+    # step 1: hold the seats so they can't go while the form is filled in
+    if not hold:
+        seats_booked = st.number_input("Number of Seats", min_value=1, max_value=max(1, avail_int), value=1)
+        if st.button("Hold Seats"):
+            if avail_int <= 0:
+                st.error("No seats available for this event.")
+                return
+            payload = {"event_id": event_id, "seats": int(seats_booked)}
+            status, parsed = api.post(f"{API_URL}/holds", json=payload)
+            if status is None:
+                st.error(parsed)
+                return
+            if status == 200:
+                api.invalidate_events()
+                st.session_state["hold"] = parsed["data"]
+                st.rerun()
+            detail = parsed.get("detail") if isinstance(parsed, dict) else parsed
+            st.error(detail or "Could not hold seats.")
+        return
+
+    # step 2: confirm the hold (or let it go)
+    # expires_at is UTC; show it in local time
+    expires = datetime.datetime.fromisoformat(hold["expires_at"]).astimezone().strftime("%H:%M:%S")
+    st.info(f"{hold['seats']} seat(s) held for you until {expires}.")
+    col_book, col_release = st.columns(2)
+    if col_book.button("Book Now"):
+        payload = {"user_name": user_name, "user_email": user_email}
+        status, parsed = api.post(f"{API_URL}/holds/{hold['hold_id']}/confirm", json=payload)
+        if status is None:
             st.error(parsed)
             return
-        if resp.status_code == 200:
+        if status == 200:
+            api.invalidate_events()
+            st.session_state.pop("hold", None)
             st.success("Booking successful!")
             st.session_state["page"] = "events"
         else:
+            if status == 404:
+                # the hold expired: start over
+                st.session_state.pop("hold", None)
             detail = parsed.get("detail") if isinstance(parsed, dict) else parsed
             st.error(detail or "Error booking event.")
+    if col_release.button("Release Seats"):
+        status, parsed = api.delete(f"{API_URL}/holds/{hold['hold_id']}")
+        if status is None:
+            st.error(parsed)
+        api.invalidate_events()
+        st.session_state.pop("hold", None)
+        st.rerun()
+
+
+def find_bookings():
+    st.header("My Bookings")
+    query = st.text_input("Email or booking ID").strip()
+    if not query:
+        return
+    if query.isdigit():
+        status, parsed = api.get(f"{API_URL}/bookings/{query}")
+        bookings = [parsed["data"]] if status == 200 else []
+    else:
+        status, parsed = api.get(_page_url("/bookings", "my_bookings_cursor") + f"&email={quote(query)}")
+        bookings = parsed.get("data") if status in (200, 304) else []
+    if status is None:
+        st.error(parsed)
+        return
+    if not bookings:
+        st.info("No bookings found.")
+        return
+
+    for booking in bookings:
+        st.write(
+            f"Booking #{booking.get('id')}: Event ID {booking.get('event_id')}, Seats: {booking.get('seats_booked')}, Name: {booking.get('user_name')}, Time: {booking.get('booking_time')}"
+        )
+    if not query.isdigit():
+        _page_controls("my_bookings_cursor", parsed.get("next_cursor"))
 
 
 def show_bookings():
     st.header("All Bookings (Admin)")
-    resp, parsed = _safe_request_get(f"{API_URL}/bookings")
-    if resp is None:
+    # bulk downloads go through the streaming export rather than paging here
+    st.markdown(
+        f"Export: [CSV]({API_URL}/bookings/export?format=csv) | [NDJSON]({API_URL}/bookings/export?format=ndjson)"
+    )
+    status, parsed = api.get(_page_url("/bookings", "bookings_cursor"))
+    if status is None:
         st.error(parsed)
         return
-    if resp.status_code != 200:
+    if status not in (200, 304):
         msg = parsed.get("detail") if isinstance(parsed, dict) else parsed
         st.error(f"Could not fetch bookings: {msg}")
         return
@@ -150,6 +262,8 @@ def show_bookings():
             f"Name: {booking.get('user_name')}, Email: {booking.get('user_email')}, Event ID: {booking.get('event_id')}, Seats: {booking.get('seats_booked')}, Time: {booking.get('booking_time')}"
         )
 
+    _page_controls("bookings_cursor", parsed.get("next_cursor"))
+
 
 def main():
     global API_URL
@@ -161,19 +275,22 @@ def main():
 
     # use the runtime API URL in the module-level variable for compatibility
     API_URL = st.session_state["api_url"]
-    menu = ["Events", "Create Event (Admin)", "View Bookings (Admin)"]
+    menu = {
+        "Events": "events",
+        "My Bookings": "my_bookings",
+        "Create Event (Admin)": "create_event",
+        "View Bookings (Admin)": "bookings",
+    }
     if "page" not in st.session_state:
         st.session_state["page"] = "events"
     if "selected_event" not in st.session_state:
         st.session_state["selected_event"] = None
 
-    choice = st.sidebar.radio("Menu", menu)
-    if choice == "Events":
-        st.session_state["page"] = "events"
-    elif choice == "Create Event (Admin)":
-        st.session_state["page"] = "create_event"
-    elif choice == "View Bookings (Admin)":
-        st.session_state["page"] = "bookings"
+    choice = st.sidebar.radio("Menu", list(menu))
+    # only a new menu choice changes the page, so the booking page survives reruns
+    if choice != st.session_state.get("menu_choice"):
+        st.session_state["menu_choice"] = choice
+        st.session_state["page"] = menu[choice]
 
     if st.session_state["page"] == "events":
         show_events()
@@ -185,6 +302,8 @@ def main():
             book_event(st.session_state["selected_event"])
         else:
             st.info("Please select an event to book from the Events page.")
+    elif st.session_state["page"] == "my_bookings":
+        find_bookings()
     elif st.session_state["page"] == "bookings":
         show_bookings()
 
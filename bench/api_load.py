@@ -0,0 +1,238 @@
+# api_load.py
+"""
+Load test for the booking API against the in-memory backend.
+
+Drives API/main.py either in-process (ASGI transport, no sockets) or over
+HTTP (a uvicorn subprocess on localhost) and reports p50/p95/p99 latency and
+requests/second per scenario. Results can be written as JSON and compared
+with an earlier run:
+
+    python -m bench.api_load --mode inprocess --concurrency 32 --out before.json
+    python -m bench.api_load --mode http --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("list_events", "book_hot_event", "bookings_by_event", "mixed")
+
+
+def _memory_env():
+    # always benchmark the in-memory store, whatever the local .env says
+    env = dict(os.environ, SUPABASE_URL="", SUPABASE_KEY="")
+    env.pop("SQLITE_PATH", None)
+    env.pop("MEMORY_WAL_DIR", None)
+    return env
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _summary(latencies, statuses, elapsed):
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": sum(n for code, n in statuses.items() if code >= 500 or code < 0),
+        "status": {str(code): n for code, n in sorted(statuses.items())},
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(_percentile(latencies, 50)),
+        "p95_ms": ms(_percentile(latencies, 95)),
+        "p99_ms": ms(_percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "max_ms": ms(latencies[-1]) if latencies else None,
+    }
+
+
+async def _run(client, make_request, total, concurrency):
+    '''
+    Send total requests from concurrency workers; make_request(i) returns
+    (method, url, json body or None).
+    '''
+    latencies, statuses = [], {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            method, url, body = make_request(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                code = response.status_code
+            except httpx.HTTPError:
+                code = -1
+            latencies.append(time.perf_counter() - start)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, statuses, time.perf_counter() - started)
+
+
+async def _seed(client, events):
+    ids = []
+    for i in range(events):
+        r = await client.post("/events", json={
+            "event_name": f"Bench event {i}",
+            "venue": f"Hall {i % 10}",
+            "date": f"2030-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "total_seats": 1000000,
+        })
+        r.raise_for_status()
+        ids.append(r.json()["data"]["id"])
+    return ids
+
+
+def _booking(event_id, i):
+    return {"user_name": f"user {i}", "user_email": f"user{i % 5000}@example.com", "event_id": event_id, "seats_booked": 1}
+
+
+async def run_suite(client, args):
+    rng = random.Random(args.seed)
+    event_ids = await _seed(client, args.events)
+    hot = event_ids[0]
+    n, c = args.requests, args.concurrency
+    results = {}
+
+    if "list_events" in args.scenarios:
+        results["list_events"] = await _run(client, lambda i: ("GET", "/events", None), n, c)
+
+    if "book_hot_event" in args.scenarios:
+        results["book_hot_event"] = await _run(client, lambda i: ("POST", "/bookings", _booking(hot, i)), n, c)
+        # every accepted booking must have taken exactly one seat
+        accepted = results["book_hot_event"]["status"].get("200", 0)
+        seats = (await client.get(f"/events/{hot}")).json()["data"]["seats_available"]
+        results["book_hot_event"]["oversold"] = 1000000 - accepted != seats
+
+    if "bookings_by_event" in args.scenarios:
+        results["bookings_by_event"] = await _run(client, lambda i: ("GET", f"/bookings/event/{hot}", None), n, c)
+
+    if "mixed" in args.scenarios:
+        def mixed(i):
+            roll = rng.random()
+            if roll < 0.7:
+                return "GET", "/events", None
+            if roll < 0.9:
+                return "POST", "/bookings", _booking(rng.choice(event_ids), i)
+            return "GET", f"/bookings/event/{rng.choice(event_ids)}", None
+        results["mixed"] = await _run(client, mixed, n, c)
+
+    return results
+
+
+async def _inprocess(args):
+    os.environ.clear()
+    os.environ.update(_memory_env())
+    sys.path.insert(0, ROOT)
+    from API.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        return await run_suite(client, args)
+
+
+async def _http(args):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "API.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=_memory_env(),
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+            for _ in range(100):
+                try:
+                    await client.get("/")
+                    break
+                except httpx.HTTPError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError(f"API did not start on {base}")
+            return await run_suite(client, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _compare(results, baseline):
+    print(f"\ncompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('mode')}):")
+    for name, now in results.items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        parts = []
+        for metric in ("rps", "p50_ms", "p99_ms"):
+            if before.get(metric) and now.get(metric) is not None:
+                parts.append(f"{metric} {100.0 * (now[metric] - before[metric]) / before[metric]:+.1f}%")
+        print(f"  {name:<18} " + "  ".join(parts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the booking API against the in-memory backend")
+    parser.add_argument("--mode", choices=("inprocess", "http"), default="inprocess")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per scenario")
+    parser.add_argument("--events", type=int, default=200, help="events seeded before the run")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765, help="uvicorn port in http mode")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    runner = _inprocess if args.mode == "inprocess" else _http
+    results = asyncio.run(runner(args))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "mode": args.mode,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "events": args.events,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "scenarios": results,
+    }
+    print(f"{args.mode}, concurrency {args.concurrency}, {args.requests} requests per scenario")
+    print(f"  {'scenario':<18} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  status")
+    for name, r in results.items():
+        print(f"  {name:<18} {r['rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}  {r['status']}")
+    if results.get("book_hot_event", {}).get("oversold"):
+        print("  WARNING: seats_available does not match the accepted bookings")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            _compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
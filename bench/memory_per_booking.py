@@ -0,0 +1,79 @@
+# memory_per_booking.py
+"""
+Bytes of Python heap per in-memory booking: plain dict rows (the old
+representation) against the BookingRecord rows the store keeps now.
+
+    python -m bench.memory_per_booking [--bookings N] [--users N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+# measure the in-memory store, whatever the local .env says
+os.environ["SUPABASE_URL"] = ""
+os.environ.pop("SQLITE_PATH", None)
+os.environ.pop("MEMORY_WAL_DIR", None)
+
+from src.db import BookingRecord, DatabaseManager  # noqa: E402
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, kept
+
+
+def _dict_rows(n, users):
+    rows = {}
+    for i in range(1, n + 1):
+        rows[i] = {
+            "id": i,
+            "user_name": f"user {i % users}",
+            "user_email": f"user{i % users}@example.com",
+            "event_id": int("1"),
+            "seats_booked": 2,
+            "booking_time": datetime.now().isoformat(),
+        }
+    return rows
+
+
+def _record_rows(n, users):
+    rows = {}
+    for i in range(1, n + 1):
+        rows[i] = BookingRecord(i, f"user {i % users}", f"user{i % users}@example.com", 1, 2, datetime.now().isoformat())
+    return rows
+
+
+def _store(n, users):
+    db = DatabaseManager()
+    db.create_event("Bench", "Hall", "2030-01-01", n * 2, n * 2)
+    for i in range(n):
+        db.create_booking(f"user {i % users}", f"user{i % users}@example.com", 1, 2)
+    return db
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=10000, help="distinct names/emails")
+    args = parser.parse_args(argv)
+
+    results = [
+        ("dict rows (before)", _measure(lambda: _dict_rows(args.bookings, args.users))[0]),
+        ("BookingRecord rows", _measure(lambda: _record_rows(args.bookings, args.users))[0]),
+        ("memory store incl. indexes", _measure(lambda: _store(args.bookings, args.users))[0]),
+    ]
+    print(f"{args.bookings} bookings, {args.users} distinct users")
+    for label, size in results:
+        print(f"  {label:<28} {size / args.bookings:8.1f} bytes/booking")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# cache.py
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.db import get_database_manager, get_async_database_manager
+
+# event reads are served from memory for at most this many seconds
+EVENT_CACHE_TTL = float(os.getenv("EVENT_CACHE_TTL", "5"))
+EVENT_CACHE_SIZE = int(os.getenv("EVENT_CACHE_SIZE", "1024"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after ttl seconds.
+
+    invalidate()/clear() bump a generation counter, so a load that started
+    before a write cannot put its (now stale) result back afterwards.
+    """
+
+    def __init__(self, maxsize=EVENT_CACHE_SIZE, ttl=EVENT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _cacheable(result):
+    # never cache failures or "not found"
+    return getattr(result, "data", None) is not None and not getattr(result, "error", None)
+
+
+# one pair of caches per process, shared by the sync and async wrappers so a
+# write through either invalidates both
+event_cache = TTLCache()
+event_list_cache = TTLCache()
+
+
+def cache_stats():
+    return {"event": event_cache.stats(), "event_list": event_list_cache.stats()}
+
+
+class CachedDatabaseManager:
+    """
+    Read-through cache in front of a DatabaseManager.
+
+    get_event_by_id and get_all_events are cached; concurrent misses for the
+    same key wait for a single fetch. Every method that changes an event
+    invalidates it, then bumps the backend's events_version (used for ETags).
+    Anything not overridden here goes straight to the backend.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def _load(self, cache, key, loader):
+        value = cache.get(key)
+        if value is not _MISSING:
+            return value
+        with self._inflight_lock:
+            waiter = self._inflight.get(key)
+            leader = waiter is None
+            if leader:
+                waiter = self._inflight[key] = {"done": threading.Event(), "value": _MISSING}
+                generation = cache.generation
+        if not leader:
+            waiter["done"].wait()
+            if waiter["value"] is not _MISSING:
+                return waiter["value"]
+            return loader()
+        try:
+            value = loader()
+            waiter["value"] = value
+            if _cacheable(value):
+                cache.set(key, value, generation)
+            return value
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            waiter["done"].set()
+
+    def _changed(self, event_id=None):
+        if event_id is not None:
+            event_cache.invalidate(int(event_id))
+        event_list_cache.clear()
+        self.backend.bump_events_version()
+        # the backend bumped the version with the write, before the cache was
+        # cleared; bump it again now, so a response built from the cache under
+        # the latest version never holds the old row
+        self.backend.bump_events_version()
+
+    # cached reads
+    def get_event_by_id(self, event_id):
+        return self._load(event_cache, int(event_id), lambda: self.backend.get_event_by_id(event_id))
+
+    def get_all_events(self, limit=None, after=None, fields=None):
+        key = (limit, tuple(after) if after is not None else None, tuple(fields) if fields else None)
+        return self._load(event_list_cache, key, lambda: self.backend.get_all_events(limit, after, fields))
+
+    # writes that change events
+    def create_event(self, *args, **kwargs):
+        result = self.backend.create_event(*args, **kwargs)
+        self._changed()
+        return result
+
+    def create_events_bulk(self, rows):
+        result = self.backend.create_events_bulk(rows)
+        self._changed()
+        return result
+
+    def update_event_seats(self, event_id, seats_available):
+        result = self.backend.update_event_seats(event_id, seats_available)
+        self._changed(event_id)
+        return result
+
+    def compare_and_set_seats(self, event_id, expected, seats_available):
+        result = self.backend.compare_and_set_seats(event_id, expected, seats_available)
+        self._changed(event_id)
+        return result
+
+    def delete_event(self, event_id):
+        result = self.backend.delete_event(event_id)
+        self._changed(event_id)
+        return result
+
+    def book_seats(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+        result = self.backend.book_seats(user_name, user_email, event_id, seats_booked, booking_time)
+        self._changed(event_id)
+        return result
+
+
+class AsyncCachedDatabaseManager:
+    """
+    CachedDatabaseManager for AsyncDatabaseManager; concurrent misses await
+    one shared fetch.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight = {}
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    async def _load(self, cache, key, loader):
+        value = cache.get(key)
+        if value is not _MISSING:
+            return value
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except Exception:
+                return await loader()
+        generation = cache.generation
+        pending = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await loader()
+        except BaseException as e:
+            # waiters retry on their own if the shared fetch fails or is cancelled
+            pending.set_exception(e if isinstance(e, Exception) else RuntimeError("fetch cancelled"))
+            # mark retrieved so an unawaited failure isn't logged
+            pending.exception()
+            raise
+        else:
+            pending.set_result(value)
+            if _cacheable(value):
+                cache.set(key, value, generation)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _changed(self, event_id=None):
+        if event_id is not None:
+            event_cache.invalidate(int(event_id))
+        event_list_cache.clear()
+
+    async def get_event_by_id(self, event_id):
+        return await self._load(event_cache, int(event_id), lambda: self.backend.get_event_by_id(event_id))
+
+    async def get_all_events(self, limit=None, after=None, fields=None):
+        key = (limit, tuple(after) if after is not None else None, tuple(fields) if fields else None)
+        return await self._load(event_list_cache, key, lambda: self.backend.get_all_events(limit, after, fields))
+
+    async def create_event(self, *args, **kwargs):
+        result = await self.backend.create_event(*args, **kwargs)
+        self._changed()
+        return result
+
+    async def create_events_bulk(self, rows):
+        result = await self.backend.create_events_bulk(rows)
+        self._changed()
+        return result
+
+    async def update_event_seats(self, event_id, seats_available):
+        result = await self.backend.update_event_seats(event_id, seats_available)
+        self._changed(event_id)
+        return result
+
+    async def compare_and_set_seats(self, event_id, expected, seats_available):
+        result = await self.backend.compare_and_set_seats(event_id, expected, seats_available)
+        self._changed(event_id)
+        return result
+
+    async def delete_event(self, event_id):
+        result = await self.backend.delete_event(event_id)
+        self._changed(event_id)
+        return result
+
+    async def book_seats(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+        result = await self.backend.book_seats(user_name, user_email, event_id, seats_booked, booking_time)
+        self._changed(event_id)
+        return result
+
+
+_shared_cached = None
+_shared_async_cached = None
+_shared_lock = threading.Lock()
+
+
+def get_cached_database_manager():
+    """Return the process-wide CachedDatabaseManager over the shared DatabaseManager."""
+    global _shared_cached
+    if _shared_cached is None:
+        backend = get_database_manager()
+        with _shared_lock:
+            if _shared_cached is None:
+                _shared_cached = CachedDatabaseManager(backend)
+    return _shared_cached
+
+
+def get_async_cached_database_manager():
+    """Return the process-wide AsyncCachedDatabaseManager over the shared AsyncDatabaseManager."""
+    global _shared_async_cached
+    if _shared_async_cached is None:
+        backend = get_async_database_manager()
+        with _shared_lock:
+            if _shared_async_cached is None:
+                _shared_async_cached = AsyncCachedDatabaseManager(backend)
+    return _shared_async_cached
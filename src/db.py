@@ -1,61 +1,452 @@
 # db_manager.py
+import asyncio
+import bisect
+import functools
+import itertools
 import os
-from supabase import create_client
-from dotenv import load_dotenv
-from datetime import datetime
+import sys
+import threading
+from datetime import date as Date, datetime, timedelta
 from types import SimpleNamespace
+from src.holds import Hold, HoldBook, HOLD_FIELDS, epoch_seconds
+from src.metrics import timed_methods
 
-# load environmental variables
-load_dotenv()
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
+# Settings are read from the environment; .env is loaded by the entrypoint
+# (API/main.py). Nothing here connects or imports supabase until a store is
+# first used, so importing this module stays cheap.
 
-# Try to create a Supabase client; if it fails, we'll fall back to an in-memory store
-supabase = None
-if url and key:
+# HTTP connection pool shared by every request made through the Supabase client
+POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+POOL_KEEPALIVE = int(os.getenv("SUPABASE_POOL_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+REQUEST_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "30"))
+
+
+def _client_options():
+	import httpx
+	from supabase import ClientOptions
+	http_client = httpx.Client(
+		limits=httpx.Limits(
+			max_connections=POOL_SIZE,
+			max_keepalive_connections=POOL_KEEPALIVE,
+			keepalive_expiry=KEEPALIVE_EXPIRY,
+		),
+		timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+	)
 	try:
-		supabase = create_client(url, key)
-	except Exception:
-		supabase = None
+		return ClientOptions(httpx_client=http_client, postgrest_client_timeout=REQUEST_TIMEOUT)
+	except TypeError:
+		# older supabase-py without httpx_client support
+		http_client.close()
+		return ClientOptions(postgrest_client_timeout=REQUEST_TIMEOUT)
+
+
+def _async_client_options():
+	import httpx
+	from supabase import AsyncClientOptions
+	http_client = httpx.AsyncClient(
+		limits=httpx.Limits(
+			max_connections=POOL_SIZE,
+			max_keepalive_connections=POOL_KEEPALIVE,
+			keepalive_expiry=KEEPALIVE_EXPIRY,
+		),
+		timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+	)
+	return AsyncClientOptions(httpx_client=http_client, postgrest_client_timeout=REQUEST_TIMEOUT)
+
+
+# local SQLite database file; when set it takes precedence over Supabase
+SQLITE_PATH = os.getenv("SQLITE_PATH")
+
+# optional durability for the in-memory store: write-ahead log + snapshots
+MEMORY_WAL_DIR = os.getenv("MEMORY_WAL_DIR")
+MEMORY_WAL_SYNC_MS = float(os.getenv("MEMORY_WAL_SYNC_MS", "50"))
+MEMORY_SNAPSHOT_EVERY = int(os.getenv("MEMORY_SNAPSHOT_EVERY", "100000"))
+
+
+def _supabase_settings():
+	return os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+
+
+def database_backend():
+	"""Return the configured store: "sqlite", "supabase" or "memory"."""
+	if SQLITE_PATH:
+		return "sqlite"
+	if all(_supabase_settings()):
+		return "supabase"
+	return "memory"
+
+
+_supabase = None
+_supabase_tried = False
+_supabase_lock = threading.Lock()
+
+
+def get_supabase_client():
+	"""Return the process-wide Supabase client, creating it on first use.
+
+	None if Supabase is not the configured store or the client could not be
+	created (callers then fall back to the in-memory store).
+	"""
+	global _supabase, _supabase_tried
+	if not _supabase_tried:
+		with _supabase_lock:
+			if not _supabase_tried:
+				if database_backend() == "supabase":
+					from supabase import create_client
+					try:
+						_supabase = create_client(*_supabase_settings(), options=_client_options())
+					except Exception as e:
+						print(f"[DatabaseManager] Supabase client not initialized ({e}) — using in-memory fallback.")
+				_supabase_tried = True
+	return _supabase
+
+
+EVENT_FIELDS = ("id", "event_name", "venue", "date", "total_seats", "seats_available")
+BOOKING_FIELDS = ("id", "user_name", "user_email", "event_id", "seats_booked", "booking_time")
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_epoch_us(value):
+	# naive ISO timestamps are kept as integer microseconds; anything that
+	# would not format back to the same string is kept as given
+	if isinstance(value, int):
+		return value
+	try:
+		dt = datetime.fromisoformat(value)
+	except (TypeError, ValueError):
+		return value
+	if dt.tzinfo is not None:
+		return value
+	us = (dt - _EPOCH) // _MICROSECOND
+	# what datetime.isoformat() writes always round-trips; skip the check for it
+	if value[10:11] == "T" and (len(value) == 19 or (len(value) == 26 and dt.microsecond)):
+		return us
+	return us if _from_epoch_us(us) == value else value
+
+
+def _from_epoch_us(value):
+	if isinstance(value, int):
+		return (_EPOCH + value * _MICROSECOND).isoformat()
+	return value
+
+
+class EventRecord:
+	"""Compact in-memory event row; turned into a dict only when returned."""
+
+	__slots__ = EVENT_FIELDS
+
+	def __init__(self, id, event_name, venue, date, total_seats, seats_available):
+		self.id = id
+		self.event_name = sys.intern(event_name)
+		self.venue = sys.intern(venue)
+		self.date = sys.intern(date)
+		self.total_seats = total_seats
+		self.seats_available = seats_available
+
+	def as_dict(self):
+		return {
+			"id": self.id,
+			"event_name": self.event_name,
+			"venue": self.venue,
+			"date": self.date,
+			"total_seats": self.total_seats,
+			"seats_available": self.seats_available,
+		}
+
+	# rows are logged and snapshotted as tuples in EVENT_FIELDS order
+	def as_tuple(self):
+		return (self.id, self.event_name, self.venue, self.date, self.total_seats, self.seats_available)
+
+
+class BookingRecord:
+	"""Compact in-memory booking row: interned strings, booking_time as epoch microseconds."""
+
+	__slots__ = BOOKING_FIELDS
+
+	def __init__(self, id, user_name, user_email, event_id, seats_booked, booking_time):
+		self.id = id
+		self.user_name = sys.intern(user_name)
+		self.user_email = sys.intern(user_email)
+		self.event_id = event_id
+		self.seats_booked = seats_booked
+		self.booking_time = _to_epoch_us(booking_time)
+
+	def as_dict(self):
+		return {
+			"id": self.id,
+			"user_name": self.user_name,
+			"user_email": self.user_email,
+			"event_id": self.event_id,
+			"seats_booked": self.seats_booked,
+			"booking_time": _from_epoch_us(self.booking_time),
+		}
+
+	def as_tuple(self):
+		return (self.id, self.user_name, self.user_email, self.event_id, self.seats_booked, self.booking_time)
+
+
+def _columns(fields, keys):
+	# projection always keeps the columns the keyset cursor is built from
+	if not fields:
+		return "*"
+	return ",".join(list(keys) + [f for f in fields if f not in keys])
+
+
+def _remove_sorted(items, value):
+	i = bisect.bisect_left(items, value)
+	if i < len(items) and items[i] == value:
+		del items[i]
+
+
+def _project(row, fields, keys):
+	if not fields:
+		return row
+	return {f: row[f] for f in list(keys) + [f for f in fields if f not in keys]}
+
+
+def _project_record(record, fields, keys):
+	if not fields:
+		return record.as_dict()
+	return {f: getattr(record, f) if f != "booking_time" else _from_epoch_us(record.booking_time) for f in list(keys) + [f for f in fields if f not in keys]}
+
+
+# keyset page queries shared by the sync and async managers
+def _cursor_date(value):
+	# the cursor's date goes into PostgREST filter text: only a real date or
+	# timestamp gets there, re-written by us and quoted (":" is reserved there)
+	try:
+		parsed = Date.fromisoformat(value) if len(value) <= 10 else datetime.fromisoformat(value)
+	except (TypeError, ValueError):
+		raise ValueError("Invalid cursor") from None
+	return f'"{parsed.isoformat()}"'
+
+
+def _events_page_query(client, limit=None, after=None, fields=None):
+	query = client.table("events").select(_columns(fields, ("id", "date")))
+	if after is not None:
+		date, event_id = _cursor_date(after[0]), int(after[1])
+		query = query.or_(f"date.gt.{date},and(date.eq.{date},id.gt.{event_id})")
+	query = query.order("date").order("id")
+	if limit is not None:
+		query = query.limit(limit)
+	return query
+
+
+def _bookings_page_query(client, limit=None, after=None, fields=None):
+	query = client.table("bookings").select(_columns(fields, ("id",)))
+	if after is not None:
+		query = query.gt("id", after)
+	query = query.order("id")
+	if limit is not None:
+		query = query.limit(limit)
+	return query
+
+
+# page size of the scan that adds up bookings when booking_totals() is missing
+TOTALS_SCAN_PAGE = 1000
+
+
+def _booking_totals(pairs):
+	# (event_id, seats_booked) pairs -> [{"event_id", "seats_sold", "bookings"}]
+	totals = {}
+	for event_id, seats in pairs:
+		entry = totals.get(event_id)
+		if entry is None:
+			entry = totals[event_id] = {"event_id": int(event_id), "seats_sold": 0, "bookings": 0}
+		entry["seats_sold"] += int(seats)
+		entry["bookings"] += 1
+	return list(totals.values())
+
 
-# Helpful startup message for debugging
-if supabase is None:
-    print("[DatabaseManager] Supabase client not initialized — using in-memory fallback.")
-else:
-    print("[DatabaseManager] Supabase client initialized.")
+def _changes_events(method):
+	"""Bump the owner's events_version after a write that can change event rows."""
+	if asyncio.iscoroutinefunction(method):
+		@functools.wraps(method)
+		async def async_wrapper(self, *args, **kwargs):
+			result = await method(self, *args, **kwargs)
+			self.bump_events_version()
+			return result
+		return async_wrapper
 
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		result = method(self, *args, **kwargs)
+		self.bump_events_version()
+		return result
+	return wrapper
 
+
+@timed_methods("sync")
 class DatabaseManager:
 	"""Wrapper around Supabase client for Events and Bookings tables.
 
-	If Supabase isn't configured or cannot be reached, this class falls back to
-	a simple in-memory store so the API can run for local testing.
+	If SQLITE_PATH is set, rows live in a local SQLite file instead (see
+	src/sqlite_store.py). If Supabase isn't configured or cannot be reached,
+	this class falls back to a simple in-memory store so the API can run for
+	local testing.
 	"""
 
 	def __init__(self):
-		self.client = supabase
-		self.use_memory = self.client is None
+		self.client = get_supabase_client()
+		self.sqlite = None
+		if SQLITE_PATH:
+			# imported here: sqlite_store reads the column lists from this module
+			from src.sqlite_store import SQLiteStore
+			self.sqlite = SQLiteStore(SQLITE_PATH)
+		self.use_memory = self.client is None and self.sqlite is None
+		# cleared if the book_seats() SQL function turns out to be missing
+		self.rpc_booking = True
+		self.rpc_totals = True
+		# changes on every write that can touch the events table (used for ETags)
+		self._version_counter = itertools.count(1)
+		self.events_version = 0
 		if self.use_memory:
-			# in-memory stores
-			self.events = []
-			self.bookings = []
+			# in-memory stores of EventRecord/BookingRecord, keyed by primary key
+			self.events = {}
+			self.bookings = {}
+			# secondary indexes: key -> sorted list of booking ids
+			self._bookings_by_event = {}
+			self._bookings_by_email = {}
+			# sorted keys for keyset pagination: (date, id) for events, id for bookings
+			self._event_keys = []
+			self._booking_ids = []
 			self._next_event_id = 1
 			self._next_booking_id = 1
+			# seat holds by id, with a heap of deadlines for expiry
+			self.holds = HoldBook()
+			# guards id allocation and index updates; bookings for different
+			# events may be written concurrently
+			self._lock = threading.Lock()
+			self.wal = None
+			if MEMORY_WAL_DIR:
+				from src.wal import WriteAheadLog
+				self.wal = WriteAheadLog(MEMORY_WAL_DIR, MEMORY_WAL_SYNC_MS / 1000.0, MEMORY_SNAPSHOT_EVERY)
+				self._recover()
+
+	def get_events_version(self):
+		return self.events_version
+
+	def bump_events_version(self):
+		"""Mark event rows as changed, so responses tagged with an older version are not reused."""
+		self.events_version = next(self._version_counter)
+
+	def close(self):
+		"""Write out and close the write-ahead log or the SQLite connections, if any. The next call reopens them."""
+		if self.sqlite is not None:
+			self.sqlite.close()
+		if self.use_memory and self.wal is not None:
+			self.wal.close()
+
+	# write-ahead log helpers (memory mode only)
+	def _log(self, op, *args):
+		# caller holds self._lock, so the log order is the order changes were applied
+		if self.wal is None:
+			return
+		self.wal.append(op, *args)
+		if self.wal.snapshot_due():
+			self.wal.snapshot(self._snapshot_state())
+
+	def _snapshot_state(self):
+		# Only the record lists are copied under the lock; the rows are
+		# serialized on the snapshot thread and may pick up later changes.
+		# That is safe: every logged op sets absolute values, so replaying
+		# the records after the snapshot's seq lands on the same state.
+		events, bookings = list(self.events.values()), list(self.bookings.values())
+		holds = self.holds.all()
+		next_event_id, next_booking_id = self._next_event_id, self._next_booking_id
+
+		def build():
+			return {
+				"events": [ev.as_tuple() for ev in events],
+				"bookings": [bk.as_tuple() for bk in bookings],
+				"holds": [hold.as_tuple() for hold in holds],
+				"next_event_id": next_event_id,
+				"next_booking_id": next_booking_id,
+			}
+		return build
+
+	def _recover(self):
+		"""Rebuild the store from the last snapshot plus the log written after it."""
+		state, records = self.wal.recover()
+		if state is not None:
+			self.events = {row[0]: EventRecord(*row) for row in state["events"]}
+			self.bookings = {row[0]: BookingRecord(*row) for row in state["bookings"]}
+			self._next_event_id = state["next_event_id"]
+			self._next_booking_id = state["next_booking_id"]
+			# snapshots written before holds were stored have none
+			for row in state.get("holds", ()):
+				self.holds.add(Hold.from_row(dict(zip(HOLD_FIELDS, row))))
+		for _, op, *args in records:
+			if op == "event":
+				ev = EventRecord(*args[0])
+				self.events[ev.id] = ev
+				self._next_event_id = max(self._next_event_id, ev.id + 1)
+			elif op == "seats":
+				if args[0] in self.events:
+					self.events[args[0]].seats_available = args[1]
+			elif op == "event_del":
+				self.events.pop(args[0], None)
+			elif op == "booking":
+				bk = BookingRecord(*args[0])
+				self.bookings[bk.id] = bk
+				self._next_booking_id = max(self._next_booking_id, bk.id + 1)
+			elif op == "booking_seats":
+				if args[0] in self.bookings:
+					self.bookings[args[0]].seats_booked = args[1]
+			elif op == "booking_del":
+				self.bookings.pop(args[0], None)
+			elif op == "hold":
+				self.holds.add(Hold.from_row(dict(zip(HOLD_FIELDS, args[0]))))
+			elif op == "hold_del":
+				self.holds.discard(args[0])
+		# indexes are rebuilt once instead of per record
+		self._event_keys = sorted((ev.date, eid) for eid, ev in self.events.items())
+		for bid in sorted(self.bookings):
+			self._index_booking(self.bookings[bid])
+		if self.events or self.bookings:
+			print(f"[DatabaseManager] Recovered {len(self.events)} events and {len(self.bookings)} bookings from {MEMORY_WAL_DIR}.")
+
+	# in-memory index helpers
+	# booking ids are allocated in increasing order, so appending keeps every id list sorted
+	def _index_booking(self, bk):
+		self._booking_ids.append(bk.id)
+		self._bookings_by_event.setdefault(bk.event_id, []).append(bk.id)
+		self._bookings_by_email.setdefault(bk.user_email, []).append(bk.id)
+
+	def _unindex_booking(self, bk):
+		_remove_sorted(self._booking_ids, bk.id)
+		for index, value in ((self._bookings_by_event, bk.event_id), (self._bookings_by_email, bk.user_email)):
+			ids = index.get(value)
+			if ids is not None:
+				_remove_sorted(ids, bk.id)
+				if not ids:
+					del index[value]
+
+	# one keyset page of bookings from a sorted id list; caller must hold self._lock
+	def _booking_page(self, ids, limit, after, fields):
+		start = bisect.bisect_right(ids, int(after)) if after is not None else 0
+		stop = start + limit if limit is not None else None
+		return [_project_record(self.bookings[bid], fields, ("id",)) for bid in ids[start:stop]]
 
 	# create events
+	@_changes_events
 	def create_event(self, event_name, venue, date, total_seats, seats_available):
+		if self.sqlite is not None:
+			return self.sqlite.create_event(event_name, venue, date, total_seats, seats_available)
 		if self.use_memory:
-			ev = {
-				"id": self._next_event_id,
-				"event_name": event_name,
-				"venue": venue,
-				"date": date,
-				"total_seats": total_seats,
-				"seats_available": seats_available,
-			}
-			self.events.append(ev)
-			self._next_event_id += 1
-			return SimpleNamespace(data=[ev], error=None)
+			with self._lock:
+				event_id = self._next_event_id
+				self._next_event_id += 1
+			ev = EventRecord(event_id, event_name, venue, date, total_seats, seats_available)
+			with self._lock:
+				self.events[ev.id] = ev
+				bisect.insort(self._event_keys, (ev.date, ev.id))
+				self._log("event", ev.as_tuple())
+			return SimpleNamespace(data=[ev.as_dict()], error=None)
 		return self.client.table("events").insert({
 			"event_name": event_name,
 			"venue": venue,
@@ -64,60 +455,134 @@ class DatabaseManager:
 			"seats_available": seats_available,
 		}).execute()
 
-	# get all events
-	def get_all_events(self):
+	# create many events in one insert; rows are dicts with the event columns
+	@_changes_events
+	def create_events_bulk(self, rows):
+		if self.sqlite is not None:
+			return self.sqlite.create_events_bulk(rows)
+		if self.use_memory:
+			data = []
+			with self._lock:
+				for row in rows:
+					ev = EventRecord(self._next_event_id, row["event_name"], row["venue"], row["date"], row["total_seats"], row["seats_available"])
+					self._next_event_id += 1
+					self.events[ev.id] = ev
+					bisect.insort(self._event_keys, (ev.date, ev.id))
+					self._log("event", ev.as_tuple())
+					data.append(ev.as_dict())
+			return SimpleNamespace(data=data, error=None)
+		return self.client.table("events").insert(list(rows)).execute()
+
+	# get all events, ordered by (date, id); pass limit/after for keyset paging
+	def get_all_events(self, limit=None, after=None, fields=None):
+		if self.sqlite is not None:
+			return self.sqlite.get_all_events(limit, after, fields)
 		if self.use_memory:
 			# return a list under .data to match supabase response shape
-			return SimpleNamespace(data=self.events.copy(), error=None)
-		return self.client.table("events").select("*").order("date").execute()
+			with self._lock:
+				start = bisect.bisect_right(self._event_keys, tuple(after)) if after is not None else 0
+				stop = start + limit if limit is not None else None
+				keys = self._event_keys[start:stop]
+				data = [_project_record(self.events[eid], fields, ("id", "date")) for _, eid in keys]
+			return SimpleNamespace(data=data, error=None)
+		return _events_page_query(self.client, limit, after, fields).execute()
 
 	# get single event by id
 	def get_event_by_id(self, event_id):
+		if self.sqlite is not None:
+			return self.sqlite.get_event_by_id(event_id)
 		if self.use_memory:
-			for ev in self.events:
-				if int(ev.get("id")) == int(event_id):
-					return SimpleNamespace(data=ev, error=None)
-			return SimpleNamespace(data=None, error="Not found")
+			ev = self.events.get(int(event_id))
+			if ev is None:
+				return SimpleNamespace(data=None, error="Not found")
+			return SimpleNamespace(data=ev.as_dict(), error=None)
 		return self.client.table("events").select("*").eq("id", event_id).single().execute()
 
+	# get several events by id in one query
+	def get_events_by_ids(self, event_ids):
+		if self.sqlite is not None:
+			return self.sqlite.get_events_by_ids(event_ids)
+		if self.use_memory:
+			data = [self.events[int(eid)].as_dict() for eid in event_ids if int(eid) in self.events]
+			return SimpleNamespace(data=data, error=None)
+		return self.client.table("events").select("*").in_("id", list(event_ids)).execute()
+
 	# update events
+	@_changes_events
 	def update_event_seats(self, event_id, seats_available):
+		if self.sqlite is not None:
+			return self.sqlite.update_event_seats(event_id, seats_available)
 		if self.use_memory:
-			for ev in self.events:
-				if int(ev.get("id")) == int(event_id):
-					ev["seats_available"] = seats_available
-					return SimpleNamespace(data=[ev], error=None)
-			return SimpleNamespace(data=None, error="Not found")
+			with self._lock:
+				ev = self.events.get(int(event_id))
+				if ev is None:
+					return SimpleNamespace(data=None, error="Not found")
+				ev.seats_available = seats_available
+				self._log("seats", ev.id, seats_available)
+			return SimpleNamespace(data=[ev.as_dict()], error=None)
 		return self.client.table("events").update({
 			"seats_available": seats_available
 		}).eq("id", event_id).execute()
 
+	# set seats_available only if it still equals expected; .data is empty if it changed
+	@_changes_events
+	def compare_and_set_seats(self, event_id, expected, seats_available):
+		if self.sqlite is not None:
+			return self.sqlite.compare_and_set_seats(event_id, expected, seats_available)
+		if self.use_memory:
+			with self._lock:
+				ev = self.events.get(int(event_id))
+				if ev is None:
+					return SimpleNamespace(data=None, error="Not found")
+				if int(ev.seats_available) != int(expected):
+					return SimpleNamespace(data=[], error=None)
+				ev.seats_available = seats_available
+				self._log("seats", ev.id, seats_available)
+			return SimpleNamespace(data=[ev.as_dict()], error=None)
+		return self.client.table("events").update({
+			"seats_available": seats_available
+		}).eq("id", event_id).eq("seats_available", expected).execute()
+
 	# delete events
+	@_changes_events
 	def delete_event(self, event_id):
+		if self.sqlite is not None:
+			return self.sqlite.delete_event(event_id)
 		if self.use_memory:
-			for i, ev in enumerate(self.events):
-				if int(ev.get("id")) == int(event_id):
-					removed = self.events.pop(i)
-					return SimpleNamespace(data=[removed], error=None)
-			return SimpleNamespace(data=None, error="Not found")
+			with self._lock:
+				removed = self.events.pop(int(event_id), None)
+				if removed is not None:
+					_remove_sorted(self._event_keys, (removed.date, removed.id))
+					self._log("event_del", removed.id)
+			if removed is None:
+				return SimpleNamespace(data=None, error="Not found")
+			return SimpleNamespace(data=[removed.as_dict()], error=None)
 		return self.client.table("events").delete().eq("id", event_id).execute()
 
+	# in-memory booking insert; caller must hold self._lock
+	def _insert_booking(self, user_name, user_email, event_id, seats_booked, booking_time):
+		event_id = int(event_id)
+		ev = self.events.get(event_id)
+		if ev is not None:
+			# share the event's id object instead of holding another int per booking
+			event_id = ev.id
+		bk = BookingRecord(self._next_booking_id, user_name, user_email, event_id, int(seats_booked), booking_time)
+		self._next_booking_id += 1
+		self.bookings[bk.id] = bk
+		self._index_booking(bk)
+		self._log("booking", bk.as_tuple())
+		return bk
+
 	# create bookings
 	def create_booking(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+		if self.sqlite is not None:
+			return self.sqlite.create_booking(user_name, user_email, event_id, seats_booked, booking_time)
 		if booking_time is None:
 			booking_time = datetime.now().isoformat()
 		if self.use_memory:
-			bk = {
-				"id": self._next_booking_id,
-				"user_name": user_name,
-				"user_email": user_email,
-				"event_id": int(event_id),
-				"seats_booked": int(seats_booked),
-				"booking_time": booking_time,
-			}
-			self.bookings.append(bk)
-			self._next_booking_id += 1
-			return SimpleNamespace(data=[bk], error=None)
+			with self._lock:
+				bk = self._insert_booking(user_name, user_email, event_id, seats_booked, booking_time)
+			return SimpleNamespace(data=[bk.as_dict()], error=None)
 		return self.client.table("bookings").insert({
 			"user_name": user_name,
 			"user_email": user_email,
@@ -126,37 +591,550 @@ class DatabaseManager:
 			"booking_time": booking_time,
 		}).execute()
 
-	# get all bookings
-	def get_all_bookings(self):
+	# create many bookings in one insert; rows are dicts with the booking columns
+	def create_bookings_bulk(self, rows):
+		now = datetime.now().isoformat()
+		rows = [dict(row, booking_time=row.get("booking_time") or now) for row in rows]
+		if self.sqlite is not None:
+			return self.sqlite.create_bookings_bulk(rows)
 		if self.use_memory:
-			return SimpleNamespace(data=self.bookings.copy(), error=None)
-		return self.client.table("bookings").select("*").execute()
+			with self._lock:
+				data = [
+					self._insert_booking(r["user_name"], r["user_email"], r["event_id"], r["seats_booked"], r["booking_time"]).as_dict()
+					for r in rows
+				]
+			return SimpleNamespace(data=data, error=None)
+		return self.client.table("bookings").insert(rows).execute()
 
-	# get bookings by event
-	def get_bookings_by_event(self, event_id):
+	# book seats atomically: conditional decrement + insert in one step
+	@_changes_events
+	def book_seats(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+		"""Take seats from an event and record the booking as a single operation.
+
+		Against Supabase this is one RPC call to the ``book_seats`` SQL function
+		(see README), which runs in a single transaction; SQLite does the same
+		in one BEGIN IMMEDIATE transaction. On failure ``.error`` is
+		"Event not found" or "Not enough seats available".
+		"""
+		if booking_time is None:
+			booking_time = datetime.now().isoformat()
+		if self.sqlite is not None:
+			return self.sqlite.book_seats(user_name, user_email, event_id, seats_booked, booking_time)
+		if self.use_memory:
+			with self._lock:
+				ev = self.events.get(int(event_id))
+				if ev is None:
+					return SimpleNamespace(data=None, error="Event not found")
+				if int(seats_booked) > int(ev.seats_available):
+					return SimpleNamespace(data=None, error="Not enough seats available")
+				ev.seats_available = int(ev.seats_available) - int(seats_booked)
+				self._log("seats", ev.id, ev.seats_available)
+				bk = self._insert_booking(user_name, user_email, event_id, seats_booked, booking_time)
+			return SimpleNamespace(data=[bk.as_dict()], error=None)
+		try:
+			return self.client.rpc("book_seats", {
+				"p_user_name": user_name,
+				"p_user_email": user_email,
+				"p_event_id": event_id,
+				"p_seats_booked": seats_booked,
+				"p_booking_time": booking_time,
+			}).execute()
+		except Exception as e:
+			if getattr(e, "code", None) == "PGRST202":
+				# the function hasn't been installed in this database
+				self.rpc_booking = False
+			return SimpleNamespace(data=None, error=getattr(e, "message", None) or str(e))
+
+	# get all bookings, ordered by id; pass limit/after for keyset paging
+	def get_all_bookings(self, limit=None, after=None, fields=None):
+		if self.sqlite is not None:
+			return self.sqlite.get_all_bookings(limit, after, fields)
+		if self.use_memory:
+			with self._lock:
+				data = self._booking_page(self._booking_ids, limit, after, fields)
+			return SimpleNamespace(data=data, error=None)
+		return _bookings_page_query(self.client, limit, after, fields).execute()
+
+	# get bookings by event, ordered by id; pass limit/after for keyset paging
+	def get_bookings_by_event(self, event_id, limit=None, after=None, fields=None):
+		if self.sqlite is not None:
+			return self.sqlite.get_bookings_by_event(event_id, limit, after, fields)
 		if self.use_memory:
-			data = [b for b in self.bookings if int(b.get("event_id")) == int(event_id)]
+			with self._lock:
+				ids = self._bookings_by_event.get(int(event_id), [])
+				data = self._booking_page(ids, limit, after, fields)
 			return SimpleNamespace(data=data, error=None)
-		return self.client.table("bookings").select("*").eq("event_id", event_id).execute()
+		return _bookings_page_query(self.client, limit, after, fields).eq("event_id", event_id).execute()
+
+	# get bookings made with an email address, ordered by id; paged like get_bookings_by_event
+	def get_bookings_by_email(self, user_email, limit=None, after=None, fields=None):
+		if self.sqlite is not None:
+			return self.sqlite.get_bookings_by_email(user_email, limit, after, fields)
+		if self.use_memory:
+			with self._lock:
+				ids = self._bookings_by_email.get(user_email, [])
+				data = self._booking_page(ids, limit, after, fields)
+			return SimpleNamespace(data=data, error=None)
+		return _bookings_page_query(self.client, limit, after, fields).eq("user_email", user_email).execute()
+
+	# get single booking by id; .data is None if there is no such booking
+	def get_booking_by_id(self, booking_id):
+		if self.sqlite is not None:
+			return self.sqlite.get_booking_by_id(booking_id)
+		if self.use_memory:
+			bk = self.bookings.get(int(booking_id))
+			if bk is None:
+				return SimpleNamespace(data=None, error="Not found")
+			return SimpleNamespace(data=bk.as_dict(), error=None)
+		result = self.client.table("bookings").select("*").eq("id", booking_id).limit(1).execute()
+		return SimpleNamespace(data=result.data[0] if result.data else None, error=None if result.data else "Not found")
+
+	def get_booking_totals(self):
+		"""Seats sold and number of bookings per existing event, added up by the store.
+
+		Rows are ``{"event_id", "seats_sold", "bookings"}``, only for events
+		that have bookings. Against Supabase this is one RPC call to the
+		``booking_totals`` SQL function (see README); if it isn't installed
+		the bookings are paged through and added up here.
+		"""
+		if self.sqlite is not None:
+			return self.sqlite.get_booking_totals()
+		if self.use_memory:
+			with self._lock:
+				pairs = [(bk.event_id, bk.seats_booked) for bk in self.bookings.values() if bk.event_id in self.events]
+			return SimpleNamespace(data=_booking_totals(pairs), error=None)
+		if self.rpc_totals:
+			try:
+				return self.client.rpc("booking_totals", {}).execute()
+			except Exception as e:
+				if getattr(e, "code", None) != "PGRST202":
+					return SimpleNamespace(data=None, error=getattr(e, "message", None) or str(e))
+				self.rpc_totals = False
+		pairs, after = [], None
+		while True:
+			rows = _bookings_page_query(self.client, TOTALS_SCAN_PAGE, after, ["event_id", "seats_booked"]).execute().data
+			pairs.extend((row["event_id"], row["seats_booked"]) for row in rows)
+			if len(rows) < TOTALS_SCAN_PAGE:
+				return SimpleNamespace(data=_booking_totals(pairs), error=None)
+			after = rows[-1]["id"]
 
 	# update bookings
 	def update_booking(self, booking_id, seats_booked):
+		if self.sqlite is not None:
+			return self.sqlite.update_booking(booking_id, seats_booked)
 		if self.use_memory:
-			for b in self.bookings:
-				if int(b.get("id")) == int(booking_id):
-					b["seats_booked"] = int(seats_booked)
-					return SimpleNamespace(data=[b], error=None)
-			return SimpleNamespace(data=None, error="Not found")
+			with self._lock:
+				b = self.bookings.get(int(booking_id))
+				if b is None:
+					return SimpleNamespace(data=None, error="Not found")
+				b.seats_booked = int(seats_booked)
+				self._log("booking_seats", b.id, b.seats_booked)
+			return SimpleNamespace(data=[b.as_dict()], error=None)
 		return self.client.table("bookings").update({
 			"seats_booked": seats_booked
 		}).eq("id", booking_id).execute()
 
+	# set seats_booked only if it still equals expected; .data is empty if it changed
+	def compare_and_set_booking_seats(self, booking_id, expected, seats_booked):
+		if self.sqlite is not None:
+			return self.sqlite.compare_and_set_booking_seats(booking_id, expected, seats_booked)
+		if self.use_memory:
+			with self._lock:
+				b = self.bookings.get(int(booking_id))
+				if b is None:
+					return SimpleNamespace(data=None, error="Not found")
+				if b.seats_booked != int(expected):
+					return SimpleNamespace(data=[], error=None)
+				b.seats_booked = int(seats_booked)
+				self._log("booking_seats", b.id, b.seats_booked)
+			return SimpleNamespace(data=[b.as_dict()], error=None)
+		return self.client.table("bookings").update({
+			"seats_booked": seats_booked
+		}).eq("id", booking_id).eq("seats_booked", expected).execute()
+
 	# delete bookings
 	def delete_booking(self, booking_id):
+		if self.sqlite is not None:
+			return self.sqlite.delete_booking(booking_id)
 		if self.use_memory:
-			for i, b in enumerate(self.bookings):
-				if int(b.get("id")) == int(booking_id):
-					removed = self.bookings.pop(i)
-					return SimpleNamespace(data=[removed], error=None)
-			return SimpleNamespace(data=None, error="Not found")
+			with self._lock:
+				removed = self.bookings.pop(int(booking_id), None)
+				if removed is not None:
+					self._unindex_booking(removed)
+					self._log("booking_del", removed.id)
+			if removed is None:
+				return SimpleNamespace(data=None, error="Not found")
+			return SimpleNamespace(data=[removed.as_dict()], error=None)
 		return self.client.table("bookings").delete().eq("id", booking_id).execute()
+
+	# seat holds; expires_at and now are UTC ISO timestamps (see src/holds.py)
+	def create_hold(self, hold_id, event_id, seats, user_name, user_email, expires_at):
+		if self.sqlite is not None:
+			return self.sqlite.create_hold(hold_id, event_id, seats, user_name, user_email, expires_at)
+		if self.use_memory:
+			hold = Hold(event_id, seats, expires_at, user_name, user_email, hold_id)
+			with self._lock:
+				self.holds.add(hold)
+				self._log("hold", hold.as_tuple())
+			return SimpleNamespace(data=[hold.as_row()], error=None)
+		return self.client.table("holds").insert({
+			"id": hold_id,
+			"event_id": event_id,
+			"seats": seats,
+			"user_name": user_name,
+			"user_email": user_email,
+			"expires_at": expires_at,
+		}).execute()
+
+	# get one hold, live or expired; .data is None if there is no such hold
+	def get_hold(self, hold_id):
+		if self.sqlite is not None:
+			return self.sqlite.get_hold(hold_id)
+		if self.use_memory:
+			hold = self.holds.get(hold_id)
+			if hold is None:
+				return SimpleNamespace(data=None, error="Not found")
+			return SimpleNamespace(data=hold.as_row(), error=None)
+		result = self.client.table("holds").select("*").eq("id", hold_id).limit(1).execute()
+		return SimpleNamespace(data=result.data[0] if result.data else None, error=None if result.data else "Not found")
+
+	# delete a hold that expires after now and return it; .data is empty if it
+	# is unknown or expired, so only one caller ever gets a hold
+	def take_hold(self, hold_id, now):
+		if self.sqlite is not None:
+			return self.sqlite.take_hold(hold_id, now)
+		if self.use_memory:
+			with self._lock:
+				hold = self.holds.take(hold_id, epoch_seconds(now))
+				if hold is not None:
+					self._log("hold_del", hold.id)
+			return SimpleNamespace(data=[hold.as_row()] if hold is not None else [], error=None)
+		return self.client.table("holds").delete().eq("id", hold_id).gt("expires_at", now).execute()
+
+	# delete and return every hold that expired by now
+	def take_expired_holds(self, now):
+		if self.sqlite is not None:
+			return self.sqlite.take_expired_holds(now)
+		if self.use_memory:
+			with self._lock:
+				expired = self.holds.pop_expired(epoch_seconds(now))
+				for hold in expired:
+					self._log("hold_del", hold.id)
+			return SimpleNamespace(data=[hold.as_row() for hold in expired], error=None)
+		return self.client.table("holds").delete().lte("expires_at", now).execute()
+
+	# the hold that expires first, as [{"id", "expires_at"}]; empty if there are none
+	def next_hold_expiry(self):
+		if self.sqlite is not None:
+			return self.sqlite.next_hold_expiry()
+		if self.use_memory:
+			hold = self.holds.next_expiry()
+			return SimpleNamespace(data=[{"id": hold.id, "expires_at": hold.expires_at}] if hold is not None else [], error=None)
+		return self.client.table("holds").select("id,expires_at").order("expires_at").limit(1).execute()
+
+
+# one store/client per process, shared by every manager
+_shared_manager = None
+_shared_lock = threading.Lock()
+
+
+def get_database_manager():
+	"""Return the process-wide DatabaseManager, creating it on first use."""
+	global _shared_manager
+	if _shared_manager is None:
+		with _shared_lock:
+			if _shared_manager is None:
+				_shared_manager = DatabaseManager()
+	return _shared_manager
+
+
+# in memory and SQLite mode the shared DatabaseManager records the calls
+@timed_methods("async", delegates="use_memory")
+class AsyncDatabaseManager:
+	"""Async counterpart of DatabaseManager for use from async FastAPI routes.
+
+	Against Supabase it uses the async client, so a pending query holds no
+	thread. In memory and SQLite mode it works on the same store as the
+	shared DatabaseManager. Memory operations are short and run inline;
+	SQLite ones run on a worker thread, since a write can wait up to
+	busy_timeout for the file lock and would stall the event loop.
+	"""
+
+	def __init__(self):
+		# "memory" here means: delegate to the shared sync manager
+		self.use_memory = database_backend() != "supabase"
+		self.rpc_booking = True
+		self.rpc_totals = True
+		# changes on every write that can touch the events table (used for ETags)
+		self._version_counter = itertools.count(1)
+		self.events_version = 0
+		self.client = None
+		self.memory = get_database_manager() if self.use_memory else None
+		self._client_lock = asyncio.Lock()
+
+	def get_events_version(self):
+		# in memory mode the shared store's writes are the ones that count
+		if self.use_memory:
+			return self.memory.get_events_version()
+		return self.events_version
+
+	def bump_events_version(self):
+		if self.use_memory:
+			self.memory.bump_events_version()
+		else:
+			self.events_version = next(self._version_counter)
+
+	async def _local(self, method, *args):
+		if self.memory.sqlite is not None:
+			return await asyncio.to_thread(method, *args)
+		return method(*args)
+
+	async def close(self):
+		"""Flush the shared store's write-ahead log (memory mode) or close its SQLite connections on shutdown."""
+		if self.use_memory:
+			self.memory.close()
+
+	async def _get_client(self):
+		if self.client is None:
+			async with self._client_lock:
+				if self.client is None:
+					from supabase import acreate_client
+					self.client = await acreate_client(*_supabase_settings(), options=_async_client_options())
+		return self.client
+
+	# create events
+	@_changes_events
+	async def create_event(self, event_name, venue, date, total_seats, seats_available):
+		if self.use_memory:
+			return await self._local(self.memory.create_event, event_name, venue, date, total_seats, seats_available)
+		client = await self._get_client()
+		return await client.table("events").insert({
+			"event_name": event_name,
+			"venue": venue,
+			"date": date,
+			"total_seats": total_seats,
+			"seats_available": seats_available,
+		}).execute()
+
+	@_changes_events
+	async def create_events_bulk(self, rows):
+		if self.use_memory:
+			return await self._local(self.memory.create_events_bulk, rows)
+		client = await self._get_client()
+		return await client.table("events").insert(list(rows)).execute()
+
+	# get all events
+	async def get_all_events(self, limit=None, after=None, fields=None):
+		if self.use_memory:
+			return await self._local(self.memory.get_all_events, limit, after, fields)
+		client = await self._get_client()
+		return await _events_page_query(client, limit, after, fields).execute()
+
+	# get single event by id
+	async def get_event_by_id(self, event_id):
+		if self.use_memory:
+			return await self._local(self.memory.get_event_by_id, event_id)
+		client = await self._get_client()
+		return await client.table("events").select("*").eq("id", event_id).single().execute()
+
+	async def get_events_by_ids(self, event_ids):
+		if self.use_memory:
+			return await self._local(self.memory.get_events_by_ids, event_ids)
+		client = await self._get_client()
+		return await client.table("events").select("*").in_("id", list(event_ids)).execute()
+
+	# update events
+	@_changes_events
+	async def update_event_seats(self, event_id, seats_available):
+		if self.use_memory:
+			return await self._local(self.memory.update_event_seats, event_id, seats_available)
+		client = await self._get_client()
+		return await client.table("events").update({
+			"seats_available": seats_available
+		}).eq("id", event_id).execute()
+
+	@_changes_events
+	async def compare_and_set_seats(self, event_id, expected, seats_available):
+		if self.use_memory:
+			return await self._local(self.memory.compare_and_set_seats, event_id, expected, seats_available)
+		client = await self._get_client()
+		return await client.table("events").update({
+			"seats_available": seats_available
+		}).eq("id", event_id).eq("seats_available", expected).execute()
+
+	# delete events
+	@_changes_events
+	async def delete_event(self, event_id):
+		if self.use_memory:
+			return await self._local(self.memory.delete_event, event_id)
+		client = await self._get_client()
+		return await client.table("events").delete().eq("id", event_id).execute()
+
+	# create bookings
+	async def create_booking(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+		if booking_time is None:
+			booking_time = datetime.now().isoformat()
+		if self.use_memory:
+			return await self._local(self.memory.create_booking, user_name, user_email, event_id, seats_booked, booking_time)
+		client = await self._get_client()
+		return await client.table("bookings").insert({
+			"user_name": user_name,
+			"user_email": user_email,
+			"event_id": event_id,
+			"seats_booked": seats_booked,
+			"booking_time": booking_time,
+		}).execute()
+
+	async def create_bookings_bulk(self, rows):
+		if self.use_memory:
+			return await self._local(self.memory.create_bookings_bulk, rows)
+		now = datetime.now().isoformat()
+		rows = [dict(row, booking_time=row.get("booking_time") or now) for row in rows]
+		client = await self._get_client()
+		return await client.table("bookings").insert(rows).execute()
+
+	# book seats atomically: conditional decrement + insert in one step
+	@_changes_events
+	async def book_seats(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+		if booking_time is None:
+			booking_time = datetime.now().isoformat()
+		if self.use_memory:
+			return await self._local(self.memory.book_seats, user_name, user_email, event_id, seats_booked, booking_time)
+		client = await self._get_client()
+		try:
+			return await client.rpc("book_seats", {
+				"p_user_name": user_name,
+				"p_user_email": user_email,
+				"p_event_id": event_id,
+				"p_seats_booked": seats_booked,
+				"p_booking_time": booking_time,
+			}).execute()
+		except Exception as e:
+			if getattr(e, "code", None) == "PGRST202":
+				self.rpc_booking = False
+			return SimpleNamespace(data=None, error=getattr(e, "message", None) or str(e))
+
+	# get all bookings
+	async def get_all_bookings(self, limit=None, after=None, fields=None):
+		if self.use_memory:
+			return await self._local(self.memory.get_all_bookings, limit, after, fields)
+		client = await self._get_client()
+		return await _bookings_page_query(client, limit, after, fields).execute()
+
+	# get bookings by event
+	async def get_bookings_by_event(self, event_id, limit=None, after=None, fields=None):
+		if self.use_memory:
+			return await self._local(self.memory.get_bookings_by_event, event_id, limit, after, fields)
+		client = await self._get_client()
+		return await _bookings_page_query(client, limit, after, fields).eq("event_id", event_id).execute()
+
+	# get bookings by email
+	async def get_bookings_by_email(self, user_email, limit=None, after=None, fields=None):
+		if self.use_memory:
+			return await self._local(self.memory.get_bookings_by_email, user_email, limit, after, fields)
+		client = await self._get_client()
+		return await _bookings_page_query(client, limit, after, fields).eq("user_email", user_email).execute()
+
+	async def get_booking_by_id(self, booking_id):
+		if self.use_memory:
+			return await self._local(self.memory.get_booking_by_id, booking_id)
+		client = await self._get_client()
+		result = await client.table("bookings").select("*").eq("id", booking_id).limit(1).execute()
+		return SimpleNamespace(data=result.data[0] if result.data else None, error=None if result.data else "Not found")
+
+	# seats sold and booking count per event; see DatabaseManager.get_booking_totals
+	async def get_booking_totals(self):
+		if self.use_memory:
+			return await self._local(self.memory.get_booking_totals)
+		client = await self._get_client()
+		if self.rpc_totals:
+			try:
+				return await client.rpc("booking_totals", {}).execute()
+			except Exception as e:
+				if getattr(e, "code", None) != "PGRST202":
+					return SimpleNamespace(data=None, error=getattr(e, "message", None) or str(e))
+				self.rpc_totals = False
+		pairs, after = [], None
+		while True:
+			rows = (await _bookings_page_query(client, TOTALS_SCAN_PAGE, after, ["event_id", "seats_booked"]).execute()).data
+			pairs.extend((row["event_id"], row["seats_booked"]) for row in rows)
+			if len(rows) < TOTALS_SCAN_PAGE:
+				return SimpleNamespace(data=_booking_totals(pairs), error=None)
+			after = rows[-1]["id"]
+
+	# update bookings
+	async def update_booking(self, booking_id, seats_booked):
+		if self.use_memory:
+			return await self._local(self.memory.update_booking, booking_id, seats_booked)
+		client = await self._get_client()
+		return await client.table("bookings").update({
+			"seats_booked": seats_booked
+		}).eq("id", booking_id).execute()
+
+	async def compare_and_set_booking_seats(self, booking_id, expected, seats_booked):
+		if self.use_memory:
+			return await self._local(self.memory.compare_and_set_booking_seats, booking_id, expected, seats_booked)
+		client = await self._get_client()
+		return await client.table("bookings").update({
+			"seats_booked": seats_booked
+		}).eq("id", booking_id).eq("seats_booked", expected).execute()
+
+	# delete bookings
+	async def delete_booking(self, booking_id):
+		if self.use_memory:
+			return await self._local(self.memory.delete_booking, booking_id)
+		client = await self._get_client()
+		return await client.table("bookings").delete().eq("id", booking_id).execute()
+
+	# seat holds
+	async def create_hold(self, hold_id, event_id, seats, user_name, user_email, expires_at):
+		if self.use_memory:
+			return await self._local(self.memory.create_hold, hold_id, event_id, seats, user_name, user_email, expires_at)
+		client = await self._get_client()
+		return await client.table("holds").insert({
+			"id": hold_id,
+			"event_id": event_id,
+			"seats": seats,
+			"user_name": user_name,
+			"user_email": user_email,
+			"expires_at": expires_at,
+		}).execute()
+
+	async def get_hold(self, hold_id):
+		if self.use_memory:
+			return await self._local(self.memory.get_hold, hold_id)
+		client = await self._get_client()
+		result = await client.table("holds").select("*").eq("id", hold_id).limit(1).execute()
+		return SimpleNamespace(data=result.data[0] if result.data else None, error=None if result.data else "Not found")
+
+	async def take_hold(self, hold_id, now):
+		if self.use_memory:
+			return await self._local(self.memory.take_hold, hold_id, now)
+		client = await self._get_client()
+		return await client.table("holds").delete().eq("id", hold_id).gt("expires_at", now).execute()
+
+	async def take_expired_holds(self, now):
+		if self.use_memory:
+			return await self._local(self.memory.take_expired_holds, now)
+		client = await self._get_client()
+		return await client.table("holds").delete().lte("expires_at", now).execute()
+
+	async def next_hold_expiry(self):
+		if self.use_memory:
+			return await self._local(self.memory.next_hold_expiry)
+		client = await self._get_client()
+		return await client.table("holds").select("id,expires_at").order("expires_at").limit(1).execute()
+
+
+_shared_async_manager = None
+_shared_async_lock = threading.Lock()
+
+
+def get_async_database_manager():
+	"""Return the process-wide AsyncDatabaseManager, creating it on first use."""
+	global _shared_async_manager
+	if _shared_async_manager is None:
+		with _shared_async_lock:
+			if _shared_async_manager is None:
+				_shared_async_manager = AsyncDatabaseManager()
+	return _shared_async_manager
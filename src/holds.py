@@ -0,0 +1,167 @@
+# holds.py
+import heapq
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# seconds a hold lasts unless the caller asks for less (or more, up to the max)
+SEAT_HOLD_TTL = float(os.getenv("SEAT_HOLD_TTL", "300"))
+SEAT_HOLD_MAX_TTL = float(os.getenv("SEAT_HOLD_MAX_TTL", "1800"))
+# the expiry task checks the store at least this often, for holds placed by other processes
+SEAT_HOLD_POLL = float(os.getenv("SEAT_HOLD_POLL", "5"))
+
+HOLD_FIELDS = ("id", "event_id", "seats", "user_name", "user_email", "expires_at")
+
+
+def utc_timestamp(offset=0.0):
+    '''
+    UTC time offset seconds from now as ISO text. Always written with
+    microseconds and +00:00, so timestamps compare correctly as strings.
+    '''
+    return (datetime.now(timezone.utc) + timedelta(seconds=offset)).isoformat(timespec="microseconds")
+
+
+def epoch_seconds(timestamp):
+    '''
+    An ISO timestamp (as stored or as returned by Supabase) as a Unix time
+    '''
+    return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+
+
+def seconds_until(timestamp):
+    '''
+    Seconds from now until an ISO timestamp (negative once it has passed)
+    '''
+    return epoch_seconds(timestamp) - time.time()
+
+
+class Hold:
+    """Seats taken from an event until expires_at, pending confirmation."""
+
+    __slots__ = HOLD_FIELDS + ("deadline",)
+
+    def __init__(self, event_id, seats, expires_at, user_name=None, user_email=None, id=None):
+        self.id = id or uuid.uuid4().hex
+        self.event_id = int(event_id)
+        self.seats = int(seats)
+        self.user_name = user_name
+        self.user_email = user_email
+        # wall-clock UTC, so other processes and a restarted one agree on it
+        self.expires_at = expires_at
+        self.deadline = epoch_seconds(expires_at)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["event_id"], row["seats"], row["expires_at"], row.get("user_name"), row.get("user_email"), row["id"])
+
+    def live(self, now=None):
+        return self.deadline > (time.time() if now is None else now)
+
+    def as_row(self):
+        return {field: getattr(self, field) for field in HOLD_FIELDS}
+
+    # logged and snapshotted as tuples in HOLD_FIELDS order
+    def as_tuple(self):
+        return tuple(getattr(self, field) for field in HOLD_FIELDS)
+
+    def as_dict(self):
+        return {
+            "hold_id": self.id,
+            "event_id": self.event_id,
+            "seats": self.seats,
+            "user_name": self.user_name,
+            "user_email": self.user_email,
+            "expires_at": self.expires_at,
+            "expires_in": max(0.0, round(self.deadline - time.time(), 3)),
+        }
+
+
+def hold_ttl(ttl=None):
+    '''
+    The TTL to use for a new hold: the default if none is given, capped at the max
+    '''
+    if ttl is None:
+        return SEAT_HOLD_TTL
+    return min(max(float(ttl), 1.0), SEAT_HOLD_MAX_TTL)
+
+
+class HoldBook:
+    """
+    Holds by id plus a min-heap ordered by deadline: the hold table of the
+    in-memory store.
+
+    Expiry pops from the top of the heap, so it costs O(log n) per expired
+    hold and never scans the live ones. Holds confirmed or released early
+    leave a stale heap entry that is skipped when it reaches the top.
+    Every method is safe to call from several threads.
+    """
+
+    def __init__(self):
+        self._holds = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._holds)
+
+    def add(self, hold):
+        with self._lock:
+            self._holds[hold.id] = hold
+            heapq.heappush(self._heap, (hold.deadline, hold.id))
+
+    def get(self, hold_id):
+        '''
+        Return the hold, live or expired, or None
+        '''
+        return self._holds.get(hold_id)
+
+    def all(self):
+        with self._lock:
+            return list(self._holds.values())
+
+    def take(self, hold_id, now=None):
+        '''
+        Remove and return a live hold; None if it is unknown or has expired
+        (an expired hold is left for pop_expired so its seats are returned once).
+        '''
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is None or not hold.live(now):
+                return None
+            return self._holds.pop(hold_id)
+
+    def discard(self, hold_id):
+        '''
+        Remove a hold whether or not it has expired; returns it, or None
+        '''
+        with self._lock:
+            return self._holds.pop(hold_id, None)
+
+    def pop_expired(self, now=None):
+        '''
+        Remove and return every hold whose deadline has passed
+        '''
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, hold_id = heapq.heappop(self._heap)
+                hold = self._holds.get(hold_id)
+                if hold is not None and hold.deadline == deadline:
+                    expired.append(self._holds.pop(hold_id))
+        return expired
+
+    def next_expiry(self):
+        '''
+        The hold that expires first, or None
+        '''
+        with self._lock:
+            while self._heap:
+                deadline, hold_id = self._heap[0]
+                hold = self._holds.get(hold_id)
+                if hold is not None and hold.deadline == deadline:
+                    return hold
+                heapq.heappop(self._heap)
+            return None
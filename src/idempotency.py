@@ -0,0 +1,245 @@
+# idempotency.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from src.cache import TTLCache
+
+# how long a finished request can be replayed, and how many are kept in memory
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+# optional SQLite file so replays survive a restart and are shared between workers
+IDEMPOTENCY_DB = os.getenv("IDEMPOTENCY_DB")
+# a worker's claim on a key lapses after this long if it stops refreshing it
+# (e.g. it died mid-request); well past the longest booking request, which can
+# make several Supabase calls of up to SUPABASE_TIMEOUT each, with retries
+IDEMPOTENCY_CLAIM_TTL = float(os.getenv("IDEMPOTENCY_CLAIM_TTL", "300"))
+# how often a worker waiting on another worker's claim checks the store
+CLAIM_POLL_INTERVAL = 0.05
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request."""
+
+
+def request_fingerprint(route, payload):
+    '''
+    Stable hash of what was asked for, so a key reused for another request is caught
+    '''
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{route}\n{body}".encode()).hexdigest()
+
+
+class MemoryIdempotencyStore:
+    """Finished responses in a bounded LRU; entries expire after ttl seconds."""
+
+    def __init__(self, maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get(self, key):
+        return self._cache.get(key, None)
+
+    def set(self, key, record):
+        self._cache.set(key, record)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class SQLiteIdempotencyStore:
+    """
+    Persistent store for finished responses: (fingerprint, status, body) per
+    key with an expiry time. Expired rows are ignored on read and purged on write.
+
+    Workers sharing the file claim a key with a pending row (status 0)
+    before running the request, so only one of them runs it; the others
+    see the pending row (status None from get()) and wait for the response.
+    The claiming worker refreshes the row while it runs and deletes it if it
+    fails, so the row only lapses after claim_ttl when that worker is gone.
+    Each claim carries its own token, so a worker only ever touches its own.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+      key TEXT PRIMARY KEY,
+      fingerprint TEXT NOT NULL,
+      status INTEGER NOT NULL,
+      body TEXT NOT NULL,
+      expires_at REAL NOT NULL
+    )
+    """
+
+    def __init__(self, path, ttl=IDEMPOTENCY_TTL, claim_ttl=IDEMPOTENCY_CLAIM_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.claim_ttl = claim_ttl
+        self._local = threading.local()
+        self._conn().execute(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT fingerprint, status, body FROM idempotency_keys WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] == 0:
+            return row[0], None, None
+        return row[0], row[1], json.loads(row[2])
+
+    def claim(self, key, fingerprint):
+        '''
+        Take the key for this worker and return the claim's token; None if
+        a live row (claim or response) exists
+        '''
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn = self._conn()
+        conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND expires_at <= ?", (key, now))
+        cur = conn.execute(
+            "INSERT INTO idempotency_keys (key, fingerprint, status, body, expires_at) VALUES (?, ?, 0, ?, ?) "
+            "ON CONFLICT (key) DO NOTHING",
+            (key, fingerprint, token, now + self.claim_ttl),
+        )
+        return token if cur.rowcount == 1 else None
+
+    def refresh(self, key, token):
+        '''
+        Push back the expiry of this worker's claim; False if it no longer holds it
+        '''
+        cur = self._conn().execute(
+            "UPDATE idempotency_keys SET expires_at = ? WHERE key = ? AND status = 0 AND body = ?",
+            (time.time() + self.claim_ttl, key, token),
+        )
+        return cur.rowcount == 1
+
+    def release(self, key, token):
+        '''
+        Drop this worker's claim without a response, so the key can be retried
+        '''
+        self._conn().execute("DELETE FROM idempotency_keys WHERE key = ? AND status = 0 AND body = ?", (key, token))
+
+    def set(self, key, record):
+        fingerprint, status, body = record
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, status, body, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (key, fingerprint, status, json.dumps(body, default=str), now + self.ttl),
+        )
+
+
+class IdempotencyCache:
+    """
+    Replays the response of a request made with the same Idempotency-Key.
+
+    Finished responses are kept in a memory LRU and, if a persistent store
+    is given, written through to it (the LRU is checked first). A request
+    whose key is still being served waits for that first request and gets
+    its response instead of running again: in this process through a
+    future, across workers through the store's claim on the key. Server
+    errors (5xx) are not kept, so the client can retry them. Runs on one
+    event loop; store calls run on a worker thread.
+    """
+
+    def __init__(self, store=None, memory=None):
+        self.memory = memory if memory is not None else MemoryIdempotencyStore()
+        self.store = store
+        self._inflight = {}
+
+    async def _lookup(self, key):
+        record = self.memory.get(key)
+        if record is None and self.store is not None:
+            record = await asyncio.to_thread(self.store.get, key)
+            if record is not None and record[1] is not None:
+                self.memory.set(key, record)
+        return record
+
+    async def _claim(self, key, fingerprint):
+        if self.store is None:
+            return True
+        return await asyncio.to_thread(self.store.claim, key, fingerprint)
+
+    async def _keep_claim(self, key, token):
+        # refresh well before the claim would lapse, for as long as the request runs
+        while True:
+            await asyncio.sleep(self.store.claim_ttl / 3)
+            if not await asyncio.to_thread(self.store.refresh, key, token):
+                return
+
+    async def run(self, key, fingerprint, handler):
+        '''
+        Return (status, body, replayed). handler() is awaited at most once
+        per key and must return (status, body).
+        '''
+        loop = asyncio.get_running_loop()
+        while True:
+            record = await self._lookup(key)
+            if record is not None:
+                if record[0] != fingerprint:
+                    raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+                if record[1] is not None:
+                    return record[1], record[2], True
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                # same key in flight here: wait for it, then replay (or take over if it failed)
+                await asyncio.shield(pending)
+                continue
+
+            done = loop.create_future()
+            self._inflight[key] = done
+            try:
+                claim = record is None and await self._claim(key, fingerprint)
+            except BaseException:
+                del self._inflight[key]
+                done.set_result(None)
+                raise
+            if claim:
+                break
+            # another worker is serving the key: check again until it stores
+            # the response or its claim lapses
+            del self._inflight[key]
+            done.set_result(None)
+            await asyncio.sleep(CLAIM_POLL_INTERVAL)
+
+        stored = False
+        keeper = asyncio.ensure_future(self._keep_claim(key, claim)) if self.store is not None else None
+        try:
+            status, body = await handler()
+            if status < 500:
+                record = (fingerprint, status, body)
+                self.memory.set(key, record)
+                if self.store is not None:
+                    await asyncio.to_thread(self.store.set, key, record)
+                stored = True
+            return status, body, False
+        finally:
+            try:
+                if keeper is not None:
+                    keeper.cancel()
+                if not stored and self.store is not None:
+                    await asyncio.to_thread(self.store.release, key, claim)
+            finally:
+                del self._inflight[key]
+                done.set_result(None)
+
+
+def create_idempotency_cache():
+    store = SQLiteIdempotencyStore(IDEMPOTENCY_DB) if IDEMPOTENCY_DB else None
+    return IdempotencyCache(store)
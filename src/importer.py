@@ -0,0 +1,104 @@
+"""
+Bulk event import from CSV, JSON or NDJSON.
+
+Rows need event_name, venue, date and total_seats. From the command line:
+
+    python -m src.importer season.csv
+    python -m src.importer season.jsonl --format ndjson
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+FORMATS = ("csv", "json", "ndjson")
+
+
+def _read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def _read_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # reported as a rejected row rather than aborting the import
+            yield None
+
+
+def _read_json(stream):
+    # a plain JSON document has to be parsed whole; use ndjson for very large files
+    data = json.load(stream)
+    if isinstance(data, dict):
+        data = data.get("events", [])
+    if not isinstance(data, list):
+        raise ValueError("JSON upload must be a list of events or {\"events\": [...]}")
+    yield from data
+
+
+def iter_event_records(stream, fmt="csv"):
+    '''
+    Yield one dict per event from a text stream, reading lazily where the format allows
+    '''
+    if fmt == "csv":
+        return _read_csv(stream)
+    if fmt == "ndjson":
+        return _read_ndjson(stream)
+    if fmt == "json":
+        return _read_json(stream)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def check_records(stream, fmt="csv"):
+    '''
+    Read a seekable text stream through once and rewind it, so a decoding
+    or parse error (ValueError, UnicodeDecodeError, csv.Error) is raised
+    before any row is imported rather than part-way through
+    '''
+    if fmt != "json":
+        # a JSON document is parsed whole before its first row anyway
+        for _ in iter_event_records(stream, fmt):
+            pass
+    stream.seek(0)
+
+
+def guess_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "ndjson"
+    if ext == ".json":
+        return "json"
+    return "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import events in bulk")
+    parser.add_argument("path", help="CSV, JSON or NDJSON file")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per insert")
+    args = parser.parse_args(argv)
+
+    # this is an entrypoint: load .env before the store reads its settings
+    from dotenv import load_dotenv
+    load_dotenv()
+    from src.db import get_database_manager
+    from src.logic import EventManager
+
+    fmt = args.format or guess_format(args.path)
+    try:
+        with open(args.path, newline="", encoding="utf-8") as f:
+            check_records(f, fmt)
+            result = EventManager().import_events(iter_event_records(f, fmt), chunk_size=args.chunk_size)
+    finally:
+        get_database_manager().close()
+    print(json.dumps(result["data"], indent=2))
+    return 1 if result["data"]["rejected_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,16 @@
-from src.db import DatabaseManager
+import asyncio
+import base64
+import json
+import time
+
+from src.cache import get_cached_database_manager, get_async_cached_database_manager
+from src.db import EVENT_FIELDS, BOOKING_FIELDS
+from src.holds import SEAT_HOLD_POLL, Hold, hold_ttl, seconds_until, utc_timestamp
+from src.metrics import counts_bookings
+from src.profiling import background_task, traced_methods
+from src.reservation import reservation_engine, async_reservation_engine
+from src.stats import EVENT_SALES_FIELDS, fill_rate, sales_stats
+from src.waitlist import Waitlist, WaitlistEntry, WAITLIST_MODES
 
 
 # small helper to normalize Supabase/in-memory response shapes
@@ -20,17 +32,226 @@ def _extract_data(result):
     return data
 
 
+# ======================
+# PAGINATION
+# ======================
+def _encode_cursor(key):
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(key, list):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def _is_id(value):
+    # bool is an int subclass, but never an id
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_page_args(limit, fields, allowed):
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be greater than 0")
+    unknown = [f for f in fields or () if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+
+def _event_after(cursor):
+    if cursor is None:
+        return None
+    key = _decode_cursor(cursor)
+    # [date, id]
+    if len(key) != 2 or not isinstance(key[0], str) or not _is_id(key[1]):
+        raise ValueError("Invalid cursor")
+    return key[0], key[1]
+
+
+def _booking_after(cursor):
+    if cursor is None:
+        return None
+    key = _decode_cursor(cursor)
+    # [id]
+    if len(key) != 1 or not _is_id(key[0]):
+        raise ValueError("Invalid cursor")
+    return key[0]
+
+
+def _page_response(result, limit, key_of):
+    """
+    Build a page from a result fetched with limit + 1 rows: the extra row
+    only tells us whether a next page exists.
+    """
+    rows = getattr(result, "data", None)
+    if rows is None:
+        error = getattr(result, "error", None)
+        return {"success": False, "message": f"Error: {error}" if error else "Error: Unknown error"}
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(key_of(rows[-1]))
+    return {"success": True, "data": rows, "next_cursor": next_cursor}
+
+
+def _event_key(row):
+    return [row["date"], row["id"]]
+
+
+def _booking_key(row):
+    return [row["id"]]
+
+
+# ======================
+# BATCH BOOKING
+# ======================
+def _valid_booking(user_name, user_email, event_id, seats_booked):
+    # event_id may be 0 if invalid; check for None
+    return bool(user_name and user_email and event_id is not None and seats_booked > 0)
+
+
+def _booking_row(item):
+    return {
+        "user_name": item["user_name"],
+        "user_email": item["user_email"],
+        "event_id": int(item["event_id"]),
+        "seats_booked": int(item["seats_booked"]),
+    }
+
+
+def _group_batch(items):
+    # validate every item and group the valid ones by event, keeping order
+    results = [None] * len(items)
+    by_event = {}
+    for pos, item in enumerate(items):
+        if not _valid_booking(item.get("user_name"), item.get("user_email"), item.get("event_id"), item.get("seats_booked") or 0):
+            results[pos] = {"success": False, "message": "Invalid booking data"}
+        else:
+            by_event.setdefault(int(item["event_id"]), []).append(pos)
+    return results, by_event
+
+
+def _apply_reservation(results, positions, reservation, accepted):
+    taken = set(reservation.get("accepted", []))
+    for i, pos in enumerate(positions):
+        if i in taken:
+            accepted.append(pos)
+        elif not reservation["success"]:
+            results[pos] = {"success": False, "message": reservation["message"]}
+        else:
+            results[pos] = {"success": False, "message": "Not enough seats available"}
+
+
+def _seats_not_returned(event_id, seats):
+    # give_back only fails once the event itself is gone
+    print(f"[Reservations] {seats} seats not returned: event {event_id} no longer exists")
+
+
+def _fail_batch(results, positions, result):
+    error = getattr(result, "error", None)
+    message = f"Error: {error}" if error else "Error: Unknown error"
+    for pos in positions:
+        results[pos] = {"success": False, "message": message}
+
+
+# ======================
+# EVENT IMPORT
+# ======================
+IMPORT_CHUNK_SIZE = 500
+# rejected rows listed in an import report; the count covers all of them
+MAX_REPORTED_REJECTS = 1000
+
+
+def _event_error(event_name, venue, date, total_seats):
+    if not event_name or not venue or not date or total_seats <= 0:
+        return "Invalid event data: all fields required and seats must be > 0"
+    return None
+
+
+def _prepare_event_row(raw):
+    """
+    Turn one imported record into an events row, or return an error message
+    """
+    if raw is None:
+        return None, "Row could not be parsed"
+    if not isinstance(raw, dict):
+        return None, "Row is not an object"
+    try:
+        total_seats = int(str(raw.get("total_seats", "")).strip())
+    except ValueError:
+        return None, "total_seats must be an integer"
+    event_name = str(raw.get("event_name") or "").strip()
+    venue = str(raw.get("venue") or "").strip()
+    date = str(raw.get("date") or "").strip()
+    error = _event_error(event_name, venue, date, total_seats)
+    if error:
+        return None, error
+    return {
+        "event_name": event_name,
+        "venue": venue,
+        "date": date,
+        "total_seats": total_seats,
+        "seats_available": total_seats,
+    }, None
+
+
+def _new_import_report():
+    return {"imported": 0, "rejected_count": 0, "rejected": []}
+
+
+def _reject(report, row_number, message):
+    report["rejected_count"] += 1
+    if len(report["rejected"]) < MAX_REPORTED_REJECTS:
+        report["rejected"].append({"row": row_number, "message": message})
+
+
+def _import_chunks(rows, chunk_size, report):
+    # validate rows as they stream in and yield the good ones chunk_size at a time
+    chunk = []
+    for row_number, raw in enumerate(rows, start=1):
+        row, error = _prepare_event_row(raw)
+        if error:
+            _reject(report, row_number, error)
+            continue
+        chunk.append((row_number, row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _record_chunk(report, chunk, result):
+    data = getattr(result, "data", None)
+    if data is not None:
+        report["imported"] += len(chunk)
+        return
+    error = getattr(result, "error", None)
+    message = f"Error: {error}" if error else "Error: Unknown error"
+    for row_number, _ in chunk:
+        _reject(report, row_number, message)
+
+
+@traced_methods("EventManager")
 class EventManager:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db=None, stats=None):
+        self.db = db if db is not None else get_cached_database_manager()
+        self.stats = stats if stats is not None else sales_stats
 
     def add_event(self, event_name, venue, date, total_seats):
         '''
         Add a new event.
         seats_available is initially set equal to total_seats.
         '''
-        if not event_name or not venue or not date or total_seats <= 0:
-            return {"success": False, "message": "Invalid event data: all fields required and seats must be > 0"}
+        error = _event_error(event_name, venue, date, total_seats)
+        if error:
+            return {"success": False, "message": error}
 
         seats_available = total_seats
         result = self.db.create_event(event_name, venue, date, total_seats, seats_available)
@@ -41,17 +262,29 @@ class EventManager:
         error_msg = str(error) if error else "Unknown error"
         return {"success": False, "message": f"Error: {error_msg}"}
 
-    def get_events(self):
+    def import_events(self, rows, chunk_size=IMPORT_CHUNK_SIZE):
         '''
-        Get all events
+        Import events from an iterable of dicts (event_name, venue, date,
+        total_seats), checked with the same rules as add_event and inserted
+        chunk_size rows at a time. Rows are numbered from 1 in the report.
         '''
-        result = self.db.get_all_events()
-        data = _extract_data(result)
-        error = getattr(result, "error", None)
-        if data is not None:
-            return {"success": True, "data": data}
-        error_msg = str(error) if error else "Unknown error"
-        return {"success": False, "message": f"Error: {error_msg}"}
+        report = _new_import_report()
+        for chunk in _import_chunks(rows, chunk_size, report):
+            result = self.db.create_events_bulk([row for _, row in chunk])
+            _record_chunk(report, chunk, result)
+        return {"success": True, "data": report}
+
+    def get_events(self, limit=None, after=None, fields=None):
+        '''
+        Get events ordered by date.
+        Pass limit and the previous page's next_cursor as after to page
+        through them; fields restricts the returned columns.
+        Raises ValueError for a malformed cursor or unknown field.
+        '''
+        _check_page_args(limit, fields, EVENT_FIELDS)
+        after_key = _event_after(after)
+        result = self.db.get_all_events(limit + 1 if limit is not None else None, after_key, fields)
+        return _page_response(result, limit, _event_key)
 
     def get_event(self, event_id):
         '''
@@ -72,6 +305,7 @@ class EventManager:
         result = self.db.delete_event(event_id)
         data = _extract_data(result)
         if data is not None:
+            self.stats.invalidate()
             return {"success": True, "message": "Event deleted successfully"}
         error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
         return {"success": False, "message": f"Error: {error_msg}"}
@@ -79,60 +313,113 @@ class EventManager:
     # ======================
     # BOOKINGS
     # ======================
+@traced_methods("BookingManager")
 class BookingManager:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db=None, stats=None):
+        self.db = db if db is not None else get_cached_database_manager()
+        self.reservations = reservation_engine(self.db)
+        self.stats = stats if stats is not None else sales_stats
 
+    @counts_bookings
     def book_event(self, user_name, user_email, event_id, seats_booked):
         """
         Create a new booking for an event
         """
-        # stricter validation: event_id may be 0 if invalid; check for None
-        if not user_name or not user_email or event_id is None or seats_booked <= 0:
+        if not _valid_booking(user_name, user_email, event_id, seats_booked):
             return {"success": False, "message": "Invalid booking data"}
 
-        # Check event exists and has enough seats
-        ev_result = self.db.get_event_by_id(event_id)
-        ev_data = _extract_data(ev_result)
-        if not ev_data:
-            return {"success": False, "message": "Event not found"}
+        if self.db.rpc_booking:
+            # one atomic round trip: conditional decrement + insert
+            result = self.db.book_seats(user_name, user_email, event_id, seats_booked)
+            res_data = _extract_data(result)
+            if res_data is not None:
+                self.stats.invalidate()
+                return {"success": True, "message": "Booking created successfully", "data": res_data}
+            if self.db.rpc_booking:
+                error = getattr(result, 'error', None)
+                return {"success": False, "message": str(error) if error else "Unknown error"}
 
-        # ev_data should be a dict representing the event
-        seats_available = ev_data.get("seats_available") if isinstance(ev_data, dict) else None
-        try:
-            seats_available = int(seats_available) if seats_available is not None else None
-        except Exception:
-            seats_available = None
-
-        if seats_available is not None and seats_booked > seats_available:
-            return {"success": False, "message": "Not enough seats available"}
+        # book_seats() isn't installed in the database: fall back to the
+        # check-and-decrement under the event's lock
+        reservation = self.reservations.reserve(event_id, seats_booked)
+        if not reservation["success"]:
+            return {"success": False, "message": reservation["message"]}
 
         result = self.db.create_booking(user_name, user_email, event_id, seats_booked)
         res_data = _extract_data(result)
-        # If booking succeeded, decrement seats_available
         if res_data is not None:
-            if seats_available is not None:
-                new_available = seats_available - seats_booked
-                try:
-                    self.db.update_event_seats(event_id, new_available)
-                except Exception:
-                    # non-fatal: booking succeeded but seat update failed
-                    pass
+            self.stats.invalidate()
             return {"success": True, "message": "Booking created successfully", "data": res_data}
 
+        # booking insert failed: hand the reserved seats back
+        if reservation["seats_taken"]:
+            if not self.reservations.release(event_id, seats_booked):
+                _seats_not_returned(event_id, seats_booked)
         error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
         return {"success": False, "message": f"Error: {error_msg}"}
 
-    def get_all_bookings(self):
+    @counts_bookings
+    def book_batch(self, items):
         '''
-        Get all bookings
+        Book a list of items (dicts with user_name, user_email, event_id,
+        seats_booked) together. Seats are taken per event in one update and
+        every accepted booking is written in a single insert.
+        Returns one result per item, in order.
+        '''
+        results, by_event = _group_batch(items)
+        events = {}
+        if by_event:
+            fetched = getattr(self.db.get_events_by_ids(list(by_event)), "data", None) or []
+            events = {int(ev["id"]): ev for ev in fetched}
+
+        accepted, taken = [], {}
+        for event_id, positions in by_event.items():
+            requests = [items[pos]["seats_booked"] for pos in positions]
+            reservation = self.reservations.reserve_many(event_id, requests, events.get(event_id))
+            _apply_reservation(results, positions, reservation, accepted)
+            if reservation.get("seats_taken"):
+                taken[event_id] = reservation["seats_taken"]
+
+        if accepted:
+            accepted.sort()
+            result = self.db.create_bookings_bulk([_booking_row(items[pos]) for pos in accepted])
+            rows = getattr(result, "data", None)
+            if rows is None or len(rows) != len(accepted):
+                # nothing usable was written: hand every reserved seat back
+                for event_id, seats in taken.items():
+                    if not self.reservations.give_back(event_id, seats):
+                        _seats_not_returned(event_id, seats)
+                _fail_batch(results, accepted, result)
+            else:
+                self.stats.invalidate()
+                for pos, row in zip(accepted, rows):
+                    results[pos] = {"success": True, "message": "Booking created successfully", "data": row}
+        return {"success": True, "data": results}
+
+    def get_all_bookings(self, limit=None, after=None, fields=None):
         '''
-        result = self.db.get_all_bookings()
+        Get bookings ordered by id, paged like EventManager.get_events
+        '''
+        _check_page_args(limit, fields, BOOKING_FIELDS)
+        after_key = _booking_after(after)
+        result = self.db.get_all_bookings(limit + 1 if limit is not None else None, after_key, fields)
+        return _page_response(result, limit, _booking_key)
+
+    def get_bookings_by_email(self, user_email, limit=None, after=None, fields=None):
+        '''
+        Get the bookings made with an email address, paged like get_all_bookings
+        '''
+        _check_page_args(limit, fields, BOOKING_FIELDS)
+        after_key = _booking_after(after)
+        result = self.db.get_bookings_by_email(user_email.strip(), limit + 1 if limit is not None else None, after_key, fields)
+        return _page_response(result, limit, _booking_key)
+
+    def get_booking(self, booking_id):
+        result = self.db.get_booking_by_id(booking_id)
         data = _extract_data(result)
-        if data is not None:
+        if isinstance(data, dict):
             return {"success": True, "data": data}
-        error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
-        return {"success": False, "message": f"Error: {error_msg}"}
+        return {"success": False, "message": "Booking not found"}
 
     def get_bookings_by_event(self, event_id):
         '''
@@ -145,27 +432,785 @@ class BookingManager:
         error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "No bookings found"
         return {"success": False, "message": f"Error: {error_msg}"}
 
+    def iter_booking_pages(self, event_id=None, fields=None, page_size=1000):
+        '''
+        Yield all bookings (or one event's) in id order, one page at a time.
+        Arguments are checked up front; raises ValueError if they are bad.
+        '''
+        _check_page_args(page_size, fields, BOOKING_FIELDS)
+
+        def pages():
+            after = None
+            while True:
+                if event_id is None:
+                    result = self.db.get_all_bookings(page_size, after, fields)
+                else:
+                    result = self.db.get_bookings_by_event(event_id, page_size, after, fields)
+                rows = getattr(result, "data", None)
+                if rows is None:
+                    raise RuntimeError(f"Error: {getattr(result, 'error', None) or 'Unknown error'}")
+                if rows:
+                    yield rows
+                if len(rows) < page_size:
+                    return
+                after = rows[-1]["id"]
+
+        return pages()
+
     def update_booking_seats(self, booking_id, seats_booked):
         '''
-        Update the number of seats in an existing booking
+        Update the number of seats in an existing booking. Extra seats are
+        taken from the event; seats given up go back to it. The new count is
+        only written if the booking still has the count it was read with;
+        if another update got there first, this one starts over from it.
         '''
         if seats_booked <= 0:
             return {"success": False, "message": "Seats booked must be greater than 0"}
 
-        result = self.db.update_booking(booking_id, seats_booked)
+        while True:
+            current = _extract_data(self.db.get_booking_by_id(booking_id))
+            if not isinstance(current, dict):
+                return {"success": False, "message": "Error: Not found"}
+            event_id = current["event_id"]
+            extra = int(seats_booked) - int(current["seats_booked"])
+            if extra > 0:
+                reservation = self.reservations.reserve_many(event_id, [extra])
+                if not reservation["success"]:
+                    return {"success": False, "message": reservation["message"]}
+                if not reservation["accepted"]:
+                    return {"success": False, "message": "Not enough seats available"}
+
+            result = self.db.compare_and_set_booking_seats(booking_id, current["seats_booked"], seats_booked)
+            data = getattr(result, "data", None)
+            if data:
+                self.stats.invalidate()
+                if extra < 0:
+                    self._free_seats(event_id, -extra)
+                return {"success": True, "message": "Booking updated successfully"}
+            if extra > 0:
+                if not self.reservations.give_back(event_id, extra):
+                    _seats_not_returned(event_id, extra)
+            if data is None:
+                error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
+                return {"success": False, "message": f"Error: {error_msg}"}
+
+    def delete_booking(self, booking_id):
+        '''
+        Cancel/delete a booking; its seats go back to the event
+        '''
+        result = self.db.delete_booking(booking_id)
         data = _extract_data(result)
         if data is not None:
-            return {"success": True, "message": "Booking updated successfully"}
+            if isinstance(data, dict):
+                self.stats.invalidate()
+                self._free_seats(data.get("event_id"), data.get("seats_booked"))
+            return {"success": True, "message": "Booking deleted successfully"}
         error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
         return {"success": False, "message": f"Error: {error_msg}"}
 
-    def delete_booking(self, booking_id):
+    def get_event_stats(self, event_id):
+        '''
+        Seats sold, booking count, fill rate and sales per time bucket for an event
+        '''
+        try:
+            event = _extract_data(self.db.get_event_by_id(event_id))
+        except Exception:
+            event = None
+        if not isinstance(event, dict):
+            return {"success": False, "message": "Event not found"}
+        data = self.stats.event(event_id)
+        if data is None:
+            generation = self.stats.generation
+            tally = self.stats.tally()
+            for rows in self.iter_booking_pages(event_id, fields=EVENT_SALES_FIELDS):
+                tally.add(rows)
+            data = self.stats.store_event(event_id, tally, generation)
+        return {"success": True, "data": _event_stats(data, event)}
+
+    def get_stats(self, limit=100):
+        '''
+        Totals over all events and per-event figures, best sellers first
+        '''
+        ranking = self.stats.ranking()
+        if ranking is None:
+            generation = self.stats.generation
+            result = self.db.get_booking_totals()
+            if getattr(result, "data", None) is None:
+                return {"success": False, "message": f"Error: {getattr(result, 'error', None) or 'Unknown error'}"}
+            ranking = self.stats.store_ranking(result.data, generation)
+        totals, events = self.stats.summary(ranking, limit)
+        rows = getattr(self.db.get_events_by_ids([e["event_id"] for e in events]), "data", None) if events else None
+        return {"success": True, "data": _stats_summary(totals, events, rows)}
+
+    def _free_seats(self, event_id, seats):
+        if event_id is None or not seats:
+            return
+        if not self.reservations.give_back(event_id, int(seats)):
+            _seats_not_returned(event_id, seats)
+
+
+# ======================
+# SALES STATS
+# ======================
+def _event_stats(data, event):
+    data["total_seats"] = event.get("total_seats")
+    data["seats_available"] = event.get("seats_available")
+    data["fill_rate"] = fill_rate(data["seats_sold"], event)
+    return data
+
+
+def _stats_summary(totals, events, rows):
+    by_id = {int(row["id"]): row for row in rows or ()}
+    for item in events:
+        item["fill_rate"] = fill_rate(item["seats_sold"], by_id.get(item["event_id"]))
+    totals["by_event"] = events
+    return totals
+
+
+# ======================
+# SEAT HOLDS
+# ======================
+def _valid_hold(event_id, seats):
+    return event_id is not None and seats is not None and int(seats) > 0
+
+
+HOLD_NOT_FOUND = {"success": False, "message": "Hold not found or expired"}
+
+
+# ======================
+# WAITLIST
+# ======================
+def _waitlist_error(event_id, user_name, user_email, seats, mode):
+    if mode not in WAITLIST_MODES:
+        return "Invalid waitlist mode"
+    if not _valid_booking(user_name, user_email, event_id, seats or 0):
+        return "Invalid waitlist data"
+    return None
+
+
+def _promotable(waiting, event):
+    # strict FIFO: stop at the first entry that does not fit, so a small
+    # request never overtakes a larger one that joined earlier
+    free = event.get("seats_available")
+    batch = []
+    for entry in waiting:
+        if free is not None:
+            if entry.seats > int(free):
+                break
+            free = int(free) - entry.seats
+        batch.append(entry)
+    return batch
+
+
+def _waitlist_item(entry):
+    return {
+        "user_name": entry.user_name,
+        "user_email": entry.user_email,
+        "event_id": entry.event_id,
+        "seats_booked": entry.seats,
+    }
+
+
+WAITLIST_NOT_FOUND = {"success": False, "message": "Waitlist entry not found"}
+
+
+# ======================
+# ASYNC MANAGERS
+# ======================
+# Same behaviour as the managers above, on top of AsyncDatabaseManager;
+# these are what the FastAPI routes await.
+@traced_methods("AsyncEventManager")
+class AsyncEventManager:
+    def __init__(self, db=None, stats=None):
+        self.db = db if db is not None else get_async_cached_database_manager()
+        self.stats = stats if stats is not None else sales_stats
+
+    async def add_event(self, event_name, venue, date, total_seats):
+        '''
+        Add a new event.
+        seats_available is initially set equal to total_seats.
+        '''
+        error = _event_error(event_name, venue, date, total_seats)
+        if error:
+            return {"success": False, "message": error}
+
+        seats_available = total_seats
+        result = await self.db.create_event(event_name, venue, date, total_seats, seats_available)
+        data = _extract_data(result)
+        error = getattr(result, "error", None)
+        if data is not None:
+            return {"success": True, "message": "Event created successfully", "data": data}
+        error_msg = str(error) if error else "Unknown error"
+        return {"success": False, "message": f"Error: {error_msg}"}
+
+    async def import_events(self, rows, chunk_size=IMPORT_CHUNK_SIZE):
+        '''
+        Async counterpart of EventManager.import_events
+        '''
+        report = _new_import_report()
+        for chunk in _import_chunks(rows, chunk_size, report):
+            result = await self.db.create_events_bulk([row for _, row in chunk])
+            _record_chunk(report, chunk, result)
+        return {"success": True, "data": report}
+
+    async def get_events(self, limit=None, after=None, fields=None):
+        '''
+        Get events ordered by date.
+        Pass limit and the previous page's next_cursor as after to page
+        through them; fields restricts the returned columns.
+        Raises ValueError for a malformed cursor or unknown field.
+        '''
+        _check_page_args(limit, fields, EVENT_FIELDS)
+        after_key = _event_after(after)
+        result = await self.db.get_all_events(limit + 1 if limit is not None else None, after_key, fields)
+        return _page_response(result, limit, _event_key)
+
+    async def get_event(self, event_id):
+        '''
+        Get a single event by ID
+        '''
+        result = await self.db.get_event_by_id(event_id)
+        data = _extract_data(result)
+        error = getattr(result, "error", None)
+        if data is not None:
+            return {"success": True, "data": data}
+        error_msg = str(error) if error else "Event not found"
+        return {"success": False, "message": f"Error: {error_msg}"}
+
+    async def delete_event(self, event_id):
+        '''
+        Delete an event
+        '''
+        result = await self.db.delete_event(event_id)
+        data = _extract_data(result)
+        if data is not None:
+            self.stats.invalidate()
+            return {"success": True, "message": "Event deleted successfully"}
+        error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
+        return {"success": False, "message": f"Error: {error_msg}"}
+
+@traced_methods("AsyncBookingManager")
+class AsyncBookingManager:
+    def __init__(self, db=None, waitlist=None, stats=None):
+        self.db = db if db is not None else get_async_cached_database_manager()
+        self.reservations = async_reservation_engine(self.db)
+        self.waitlist = waitlist
+        self.stats = stats if stats is not None else sales_stats
+
+    @counts_bookings
+    async def book_event(self, user_name, user_email, event_id, seats_booked):
+        """
+        Create a new booking for an event
+        """
+        if not _valid_booking(user_name, user_email, event_id, seats_booked):
+            return {"success": False, "message": "Invalid booking data"}
+
+        if self.db.rpc_booking:
+            # one atomic round trip: conditional decrement + insert
+            result = await self.db.book_seats(user_name, user_email, event_id, seats_booked)
+            res_data = _extract_data(result)
+            if res_data is not None:
+                self.stats.invalidate()
+                return {"success": True, "message": "Booking created successfully", "data": res_data}
+            if self.db.rpc_booking:
+                error = getattr(result, 'error', None)
+                return {"success": False, "message": str(error) if error else "Unknown error"}
+
+        # book_seats() isn't installed in the database: fall back to the
+        # check-and-decrement under the event's lock
+        reservation = await self.reservations.reserve(event_id, seats_booked)
+        if not reservation["success"]:
+            return {"success": False, "message": reservation["message"]}
+
+        result = await self.db.create_booking(user_name, user_email, event_id, seats_booked)
+        res_data = _extract_data(result)
+        if res_data is not None:
+            self.stats.invalidate()
+            return {"success": True, "message": "Booking created successfully", "data": res_data}
+
+        # booking insert failed: hand the reserved seats back
+        if reservation["seats_taken"]:
+            if not await self.reservations.release(event_id, seats_booked):
+                _seats_not_returned(event_id, seats_booked)
+        error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
+        return {"success": False, "message": f"Error: {error_msg}"}
+
+    @counts_bookings
+    async def book_batch(self, items):
+        '''
+        Async counterpart of BookingManager.book_batch
+        '''
+        results, by_event = _group_batch(items)
+        events = {}
+        if by_event:
+            fetched = getattr(await self.db.get_events_by_ids(list(by_event)), "data", None) or []
+            events = {int(ev["id"]): ev for ev in fetched}
+
+        accepted, taken = [], {}
+        for event_id, positions in by_event.items():
+            requests = [items[pos]["seats_booked"] for pos in positions]
+            reservation = await self.reservations.reserve_many(event_id, requests, events.get(event_id))
+            _apply_reservation(results, positions, reservation, accepted)
+            if reservation.get("seats_taken"):
+                taken[event_id] = reservation["seats_taken"]
+
+        if accepted:
+            accepted.sort()
+            result = await self.db.create_bookings_bulk([_booking_row(items[pos]) for pos in accepted])
+            rows = getattr(result, "data", None)
+            if rows is None or len(rows) != len(accepted):
+                # nothing usable was written: hand every reserved seat back
+                for event_id, seats in taken.items():
+                    if not await self.reservations.give_back(event_id, seats):
+                        _seats_not_returned(event_id, seats)
+                _fail_batch(results, accepted, result)
+            else:
+                self.stats.invalidate()
+                for pos, row in zip(accepted, rows):
+                    results[pos] = {"success": True, "message": "Booking created successfully", "data": row}
+        return {"success": True, "data": results}
+
+    async def get_all_bookings(self, limit=None, after=None, fields=None):
+        '''
+        Get bookings ordered by id, paged like EventManager.get_events
+        '''
+        _check_page_args(limit, fields, BOOKING_FIELDS)
+        after_key = _booking_after(after)
+        result = await self.db.get_all_bookings(limit + 1 if limit is not None else None, after_key, fields)
+        return _page_response(result, limit, _booking_key)
+
+    async def get_bookings_by_email(self, user_email, limit=None, after=None, fields=None):
+        _check_page_args(limit, fields, BOOKING_FIELDS)
+        after_key = _booking_after(after)
+        result = await self.db.get_bookings_by_email(user_email.strip(), limit + 1 if limit is not None else None, after_key, fields)
+        return _page_response(result, limit, _booking_key)
+
+    async def get_booking(self, booking_id):
+        result = await self.db.get_booking_by_id(booking_id)
+        data = _extract_data(result)
+        if isinstance(data, dict):
+            return {"success": True, "data": data}
+        return {"success": False, "message": "Booking not found"}
+
+    async def get_bookings_by_event(self, event_id):
+        '''
+        Get all bookings for a specific event
+        '''
+        result = await self.db.get_bookings_by_event(event_id)
+        data = _extract_data(result)
+        if data is not None:
+            return {"success": True, "data": data}
+        error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "No bookings found"
+        return {"success": False, "message": f"Error: {error_msg}"}
+
+    def iter_booking_pages(self, event_id=None, fields=None, page_size=1000):
+        '''
+        Async counterpart of BookingManager.iter_booking_pages
+        '''
+        _check_page_args(page_size, fields, BOOKING_FIELDS)
+
+        async def pages():
+            after = None
+            while True:
+                if event_id is None:
+                    result = await self.db.get_all_bookings(page_size, after, fields)
+                else:
+                    result = await self.db.get_bookings_by_event(event_id, page_size, after, fields)
+                rows = getattr(result, "data", None)
+                if rows is None:
+                    raise RuntimeError(f"Error: {getattr(result, 'error', None) or 'Unknown error'}")
+                if rows:
+                    yield rows
+                if len(rows) < page_size:
+                    return
+                after = rows[-1]["id"]
+
+        return pages()
+
+    async def update_booking_seats(self, booking_id, seats_booked):
+        '''
+        Update the number of seats in an existing booking, like
+        BookingManager.update_booking_seats
+        '''
+        if seats_booked <= 0:
+            return {"success": False, "message": "Seats booked must be greater than 0"}
+
+        while True:
+            current = _extract_data(await self.db.get_booking_by_id(booking_id))
+            if not isinstance(current, dict):
+                return {"success": False, "message": "Error: Not found"}
+            event_id = current["event_id"]
+            extra = int(seats_booked) - int(current["seats_booked"])
+            if extra > 0:
+                reservation = await self.reservations.reserve_many(event_id, [extra])
+                if not reservation["success"]:
+                    return {"success": False, "message": reservation["message"]}
+                if not reservation["accepted"]:
+                    return {"success": False, "message": "Not enough seats available"}
+
+            result = await self.db.compare_and_set_booking_seats(booking_id, current["seats_booked"], seats_booked)
+            data = getattr(result, "data", None)
+            if data:
+                self.stats.invalidate()
+                if extra < 0:
+                    await self._free_seats(event_id, -extra)
+                return {"success": True, "message": "Booking updated successfully"}
+            if extra > 0:
+                if not await self.reservations.give_back(event_id, extra):
+                    _seats_not_returned(event_id, extra)
+            if data is None:
+                error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
+                return {"success": False, "message": f"Error: {error_msg}"}
+
+    async def delete_booking(self, booking_id):
         '''
         Cancel/delete a booking
         '''
-        result = self.db.delete_booking(booking_id)
+        result = await self.db.delete_booking(booking_id)
         data = _extract_data(result)
         if data is not None:
+            if isinstance(data, dict):
+                self.stats.invalidate()
+                await self._free_seats(data.get("event_id"), data.get("seats_booked"))
             return {"success": True, "message": "Booking deleted successfully"}
         error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
-        return {"success": False, "message": f"Error: {error_msg}"}
\ No newline at end of file
+        return {"success": False, "message": f"Error: {error_msg}"}
+
+    async def get_event_stats(self, event_id):
+        try:
+            event = _extract_data(await self.db.get_event_by_id(event_id))
+        except Exception:
+            event = None
+        if not isinstance(event, dict):
+            return {"success": False, "message": "Event not found"}
+        data = self.stats.event(event_id)
+        if data is None:
+            generation = self.stats.generation
+            tally = self.stats.tally()
+            async for rows in self.iter_booking_pages(event_id, fields=EVENT_SALES_FIELDS):
+                tally.add(rows)
+            data = self.stats.store_event(event_id, tally, generation)
+        return {"success": True, "data": _event_stats(data, event)}
+
+    async def get_stats(self, limit=100):
+        ranking = self.stats.ranking()
+        if ranking is None:
+            generation = self.stats.generation
+            result = await self.db.get_booking_totals()
+            if getattr(result, "data", None) is None:
+                return {"success": False, "message": f"Error: {getattr(result, 'error', None) or 'Unknown error'}"}
+            ranking = self.stats.store_ranking(result.data, generation)
+        totals, events = self.stats.summary(ranking, limit)
+        rows = getattr(await self.db.get_events_by_ids([e["event_id"] for e in events]), "data", None) if events else None
+        return {"success": True, "data": _stats_summary(totals, events, rows)}
+
+    async def _free_seats(self, event_id, seats):
+        if event_id is None or not seats:
+            return
+        if not await self.reservations.give_back(event_id, int(seats)):
+            _seats_not_returned(event_id, seats)
+        elif self.waitlist is not None:
+            self.waitlist.notify(event_id)
+
+
+@traced_methods("AsyncSeatHoldManager")
+class AsyncSeatHoldManager:
+    """
+    Seat holds for checkout. place_hold() takes the seats right away, so
+    they no longer show in seats_available; confirm_hold() turns the hold
+    into a booking, and release_hold() or expiry hands the seats back.
+    Holds are rows in the store with an expires_at, so any process can
+    confirm or release them and they outlive a restart. A task on the
+    event loop returns expired ones, sleeping until the earliest expires_at
+    but checking at least every SEAT_HOLD_POLL seconds for holds placed by
+    other processes; start() first returns the ones that expired while no
+    process was running.
+    """
+
+    def __init__(self, db=None, waitlist=None, stats=None):
+        self.db = db if db is not None else get_async_cached_database_manager()
+        self.reservations = async_reservation_engine(self.db)
+        self.waitlist = waitlist
+        self.stats = stats if stats is not None else sales_stats
+        self._wake = asyncio.Event()
+        self._reaper = None
+        self._stopping = False
+
+    async def start(self):
+        '''
+        Give back the seats of holds that expired while nothing was watching
+        them and start the expiry task; returns how many expired
+        '''
+        expired = await self.expire_holds()
+        self._ensure_reaper()
+        return expired
+
+    async def place_hold(self, event_id, seats, ttl=None, user_name=None, user_email=None):
+        '''
+        Hold seats on an event for ttl seconds (SEAT_HOLD_TTL by default)
+        '''
+        if not _valid_hold(event_id, seats):
+            return {"success": False, "message": "Invalid hold data"}
+        reservation = await self.reservations.reserve_many(event_id, [int(seats)])
+        if not reservation["success"]:
+            return {"success": False, "message": reservation["message"]}
+        if not reservation["accepted"]:
+            return {"success": False, "message": "Not enough seats available"}
+        hold = Hold(event_id, seats, utc_timestamp(hold_ttl(ttl)), user_name, user_email)
+        result = await self._store(hold)
+        if _extract_data(result) is None:
+            await self._give_back(hold)
+            error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
+            return {"success": False, "message": f"Error: {error_msg}"}
+        self._ensure_reaper()
+        return {"success": True, "message": "Seats held", "data": hold.as_dict()}
+
+    async def get_hold(self, hold_id):
+        row = _extract_data(await self.db.get_hold(hold_id))
+        if not isinstance(row, dict):
+            return HOLD_NOT_FOUND
+        hold = Hold.from_row(row)
+        if not hold.live():
+            return HOLD_NOT_FOUND
+        return {"success": True, "data": hold.as_dict()}
+
+    @counts_bookings
+    async def confirm_hold(self, hold_id, user_name=None, user_email=None):
+        '''
+        Turn a live hold into a booking; the seats were already taken
+        '''
+        hold = await self._take(hold_id)
+        if hold is None:
+            return HOLD_NOT_FOUND
+        user_name = user_name or hold.user_name
+        user_email = user_email or hold.user_email
+        if not _valid_booking(user_name, user_email, hold.event_id, hold.seats):
+            # keep holding so the user can retry with their details
+            await self._put_back(hold)
+            return {"success": False, "message": "Invalid booking data"}
+
+        try:
+            result = await self.db.create_booking(user_name, user_email, hold.event_id, hold.seats)
+        except Exception:
+            await self._put_back(hold)
+            raise
+        res_data = _extract_data(result)
+        if res_data is not None:
+            self.stats.invalidate()
+            return {"success": True, "message": "Booking created successfully", "data": res_data}
+        await self._put_back(hold)
+        error_msg = str(getattr(result, 'error', None)) if getattr(result, 'error', None) else "Unknown error"
+        return {"success": False, "message": f"Error: {error_msg}"}
+
+    async def release_hold(self, hold_id):
+        '''
+        Give a hold's seats back before it expires
+        '''
+        hold = await self._take(hold_id)
+        if hold is None:
+            return HOLD_NOT_FOUND
+        if not await self._give_back(hold):
+            return {"success": False, "message": "Event not found"}
+        return {"success": True, "message": "Hold released"}
+
+    async def expire_holds(self):
+        '''
+        Give back the seats of every expired hold; returns how many expired
+        '''
+        rows = getattr(await self.db.take_expired_holds(utc_timestamp()), "data", None) or []
+        for row in rows:
+            await self._give_back(Hold.from_row(row))
+        return len(rows)
+
+    def _store(self, hold):
+        return self.db.create_hold(hold.id, hold.event_id, hold.seats, hold.user_name, hold.user_email, hold.expires_at)
+
+    async def _take(self, hold_id):
+        # the store removes the row only while it is live, so one caller gets it
+        row = _extract_data(await self.db.take_hold(hold_id, utc_timestamp()))
+        return Hold.from_row(row) if isinstance(row, dict) else None
+
+    async def _put_back(self, hold):
+        # same id and expires_at; the reaper is woken to re-read the earliest deadline
+        if _extract_data(await self._store(hold)) is None:
+            # without its row nothing would ever expire the hold
+            await self._give_back(hold)
+            return
+        self._ensure_reaper()
+
+    async def _give_back(self, hold):
+        if not await self.reservations.give_back(hold.event_id, hold.seats):
+            _seats_not_returned(hold.event_id, hold.seats)
+            return False
+        if self.waitlist is not None:
+            self.waitlist.notify(hold.event_id)
+        return True
+
+    def _ensure_reaper(self):
+        # wake the reaper so it re-reads the earliest deadline
+        self._wake.set()
+        if self._reaper is None or self._reaper.done():
+            self._reaper = background_task(self._reap_loop())
+
+    async def close(self):
+        '''
+        Stop the expiry task. Holds stay in the store: a durable store keeps
+        them for the next process (or another worker) to confirm or expire.
+        '''
+        reaper, self._reaper = self._reaper, None
+        if reaper is not None and not reaper.done():
+            # asyncio.wait_for can swallow a cancel that races its wake-up,
+            # so the loop is also told to stop
+            self._stopping = True
+            self._wake.set()
+            reaper.cancel()
+            await asyncio.gather(reaper, return_exceptions=True)
+            self._stopping = False
+        # the event is tied to this loop; a restart may run on another one
+        self._wake = asyncio.Event()
+
+    async def _next_wake(self):
+        # seconds until the earliest hold in the store expires, at most SEAT_HOLD_POLL
+        try:
+            row = _extract_data(await self.db.next_hold_expiry())
+        except Exception:
+            row = None
+        if not isinstance(row, dict):
+            return SEAT_HOLD_POLL
+        return min(max(0.0, seconds_until(row["expires_at"])), SEAT_HOLD_POLL)
+
+    async def _reap_loop(self):
+        while True:
+            timeout = await self._next_wake()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                return
+            self._wake.clear()
+            try:
+                await self.expire_holds()
+            except Exception as e:
+                print(f"[AsyncSeatHoldManager] expiring holds failed: {e}")
+
+
+@traced_methods("AsyncWaitlistManager")
+class AsyncWaitlistManager:
+    """
+    FIFO waitlists for sold-out events. Seats given back by a cancelled or
+    reduced booking, or by a released or expired hold, mark the event on
+    the shared Waitlist; a task on the event loop then promotes the front
+    of the line that fits, into bookings (mode "book", one batch per event)
+    or holds (mode "hold"). Entries that lose a race for the seats keep
+    their place. Waitlists live in this process; notify() must be called
+    from the loop's thread.
+    """
+
+    def __init__(self, waitlist=None, bookings=None, holds=None):
+        self.waitlist = waitlist if waitlist is not None else Waitlist()
+        self.bookings = bookings if bookings is not None else AsyncBookingManager(waitlist=self.waitlist)
+        self.holds = holds if holds is not None else AsyncSeatHoldManager(waitlist=self.waitlist)
+        self._wake = asyncio.Event()
+        self._worker = None
+        self.waitlist.add_listener(lambda: self._wake.set())
+
+    async def join(self, event_id, user_name, user_email, seats, mode="book"):
+        error = _waitlist_error(event_id, user_name, user_email, seats, mode)
+        if error:
+            return {"success": False, "message": error}
+        try:
+            event = _extract_data(await self.bookings.db.get_event_by_id(event_id))
+        except Exception:
+            event = None
+        if not isinstance(event, dict):
+            return {"success": False, "message": "Event not found"}
+        # the line is strict FIFO: an entry that can never fit would block everyone behind it
+        if int(seats) > int(event.get("total_seats") or 0):
+            return {"success": False, "message": "Requested seats exceed the event's total seats"}
+
+        entry = WaitlistEntry(event_id, user_name, user_email, seats, mode)
+        position = self.waitlist.join(entry)
+        self._ensure_worker()
+        self.waitlist.notify(entry.event_id)
+        return {"success": True, "message": "Joined waitlist", "data": entry.as_dict(position)}
+
+    async def get_entry(self, entry_id):
+        entry = self.waitlist.get(entry_id)
+        if entry is None:
+            return WAITLIST_NOT_FOUND
+        return {"success": True, "data": entry.as_dict(self.waitlist.position(entry))}
+
+    async def leave(self, entry_id):
+        if not self.waitlist.leave(entry_id):
+            return WAITLIST_NOT_FOUND
+        return {"success": True, "message": "Left waitlist"}
+
+    async def promote(self, event_id):
+        waiting = self.waitlist.waiting(event_id)
+        if not waiting:
+            return 0
+        try:
+            event = _extract_data(await self.bookings.reservations.reader.get_event_by_id(event_id))
+        except Exception:
+            event = None
+        if not isinstance(event, dict):
+            for entry in waiting:
+                self.waitlist.finish(entry, "failed", "Event not found")
+            return 0
+
+        batch = _promotable(waiting, event)
+        to_book = [entry for entry in batch if entry.mode == "book"]
+        promoted = 0
+        if to_book:
+            results = (await self.bookings.book_batch([_waitlist_item(entry) for entry in to_book]))["data"]
+            for entry, result in zip(to_book, results):
+                promoted += await self._settle(entry, result)
+        for entry in batch:
+            if entry.mode == "hold":
+                result = await self.holds.place_hold(entry.event_id, entry.seats, user_name=entry.user_name, user_email=entry.user_email)
+                promoted += await self._settle(entry, result)
+        return promoted
+
+    async def promote_pending(self):
+        promoted = 0
+        for event_id in self.waitlist.take_dirty():
+            promoted += await self.promote(event_id)
+        return promoted
+
+    async def _settle(self, entry, result):
+        if not result["success"]:
+            if "not found" in result["message"]:
+                self.waitlist.finish(entry, "failed", result["message"])
+            return 0
+        if self.waitlist.finish(entry, "booked" if entry.mode == "book" else "held", result["data"]):
+            return 1
+        if entry.mode == "book":
+            await self.bookings.delete_booking(result["data"]["id"])
+        else:
+            await self.holds.release_hold(result["data"]["hold_id"])
+        return 0
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._worker = background_task(self._work_loop())
+
+    async def close(self):
+        '''
+        Stop the promotion task; it restarts when someone joins a waitlist
+        '''
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        # the event is tied to this loop; a restart may run on another one
+        self._wake = asyncio.Event()
+
+    async def _work_loop(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            try:
+                await self.promote_pending()
+            except Exception as e:
+                print(f"[AsyncWaitlistManager] promotion failed: {e}")
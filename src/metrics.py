@@ -0,0 +1,316 @@
+# metrics.py
+import asyncio
+import bisect
+import functools
+import threading
+import time
+
+from src.profiling import record_call
+from src.seat_feed import SEAT_WRITES, seat_feed
+
+# seconds; covers in-memory calls (sub-millisecond) up to slow remote queries
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+    def remove(self, label_values):
+        with self._lock:
+            self._values.pop(label_values, None)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() is one bisect and a few increments
+    under a lock, cheap enough to run on every request.
+    """
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((key, list(s[0]), s[1], s[2]) for key, s in self._series.items())
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route"))
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status"))
+DB_LATENCY = Histogram("db_call_duration_seconds", "Time spent in DatabaseManager calls.", ("manager", "method"))
+DB_ERRORS = Counter("db_call_errors_total", "DatabaseManager calls that raised or returned an error.", ("manager", "method"))
+BOOKINGS = Counter("booking_attempts_total", "Booking attempts by outcome.", ("outcome",))
+SEATS_AVAILABLE = Gauge("event_seats_available", "Seats still available per event.", ("event_id",))
+SEATS_TOTAL = Gauge("event_seats_total", "Total seats per event.", ("event_id",))
+
+REGISTRY = (REQUEST_LATENCY, REQUESTS, DB_LATENCY, DB_ERRORS, BOOKINGS, SEATS_AVAILABLE, SEATS_TOTAL)
+
+# DatabaseManager methods whose results carry (or change) event seat counts
+SEAT_METHODS = frozenset((
+    "create_event", "create_events_bulk", "get_all_events", "get_event_by_id", "get_events_by_ids",
+    "update_event_seats", "compare_and_set_seats", "delete_event", "book_seats",
+))
+
+# events whose seat count changed without the new row being seen
+_stale_events = set()
+_stale_lock = threading.Lock()
+
+
+def render():
+    '''
+    All metrics in the Prometheus text exposition format
+    '''
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def stale_event_ids():
+    '''
+    Pop the ids of events whose seat gauges need re-reading
+    '''
+    with _stale_lock:
+        ids = list(_stale_events)
+        _stale_events.clear()
+    return ids
+
+
+def _rows(data):
+    if isinstance(data, dict):
+        return (data,)
+    return data if isinstance(data, list) else ()
+
+
+def _track_seats(method, result):
+    # keep the per-event gauges in line with whatever event rows pass by
+    data = getattr(result, "data", None)
+    if not data:
+        return
+    if method == "delete_event":
+        for row in _rows(data):
+            if "id" in row:
+                SEATS_AVAILABLE.remove((str(row["id"]),))
+                SEATS_TOTAL.remove((str(row["id"]),))
+        return
+    if method == "book_seats":
+        with _stale_lock:
+            _stale_events.update(int(row["event_id"]) for row in _rows(data) if "event_id" in row)
+        return
+    for row in _rows(data):
+        if not isinstance(row, dict) or "seats_available" not in row or "id" not in row:
+            return
+        event_id = (str(row["id"]),)
+        SEATS_AVAILABLE.set(event_id, row["seats_available"])
+        if "total_seats" in row:
+            SEATS_TOTAL.set(event_id, row["total_seats"])
+
+
+def _observe_call(manager, method, started, result):
+    elapsed = time.perf_counter() - started
+    DB_LATENCY.observe((manager, method), elapsed)
+    record_call(f"{manager}.{method}", elapsed)
+    if getattr(result, "error", None):
+        DB_ERRORS.inc((manager, method))
+    elif method in SEAT_METHODS:
+        _track_seats(method, result)
+        if method in SEAT_WRITES:
+            seat_feed.record(method, getattr(result, "data", None))
+
+
+def _observe_failure(manager, method, started):
+    elapsed = time.perf_counter() - started
+    DB_LATENCY.observe((manager, method), elapsed)
+    DB_ERRORS.inc((manager, method))
+    record_call(f"{manager}.{method}", elapsed)
+
+
+def timed_methods(manager, delegates=None):
+    '''
+    Class decorator: time every public method of a DatabaseManager-like
+    class and label the samples with manager and method name. delegates
+    names an instance attribute that is true when the calls are handed to
+    another timed manager; those calls are left to that manager to record.
+    '''
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not callable(method) or name in ("get_events_version", "bump_events_version", "close"):
+                continue
+            setattr(cls, name, _timed(manager, name, method, delegates))
+        return cls
+    return decorate
+
+
+def _timed(manager, name, method, delegates=None):
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            if delegates and getattr(self, delegates):
+                return await method(self, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = await method(self, *args, **kwargs)
+            except BaseException:
+                _observe_failure(manager, name, started)
+                raise
+            _observe_call(manager, name, started, result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if delegates and getattr(self, delegates):
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except BaseException:
+            _observe_failure(manager, name, started)
+            raise
+        _observe_call(manager, name, started, result)
+        return result
+    return wrapper
+
+
+def _outcome(result):
+    if result.get("success"):
+        return "booked"
+    message = str(result.get("message", ""))
+    if message.startswith("Hold"):
+        return "hold_expired"
+    if "Not enough seats" in message:
+        return "not_enough_seats"
+    if "not found" in message.lower():
+        return "event_not_found"
+    if message.startswith("Invalid"):
+        return "invalid"
+    return "error"
+
+
+def _count_outcomes(result):
+    # book_batch returns one result per item under "data"
+    items = result["data"] if isinstance(result.get("data"), list) else [result]
+    for item in items:
+        if isinstance(item, dict):
+            BOOKINGS.inc((_outcome(item),))
+
+
+def counts_bookings(method):
+    '''
+    Count the outcome of each booking a book_event/book_batch call returns
+    '''
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            result = await method(*args, **kwargs)
+            _count_outcomes(result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        result = method(*args, **kwargs)
+        _count_outcomes(result)
+        return result
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route template (not
+    per raw path, so /events/1 and /events/2 share one series).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            REQUEST_LATENCY.observe((method, template), time.perf_counter() - started)
+            REQUESTS.inc((method, template, str(status[0])))
@@ -0,0 +1,237 @@
+# profiling.py
+import asyncio
+import cProfile
+import collections
+import contextvars
+import functools
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+# requests slower than this are written to the slow-request log; 0 turns it off
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_LOG_SIZE = int(os.getenv("SLOW_LOG_SIZE", "200"))
+# upper bound for one profiling run, whatever the caller asks for
+MAX_PROFILE_SECONDS = float(os.getenv("MAX_PROFILE_SECONDS", "120"))
+
+logger = logging.getLogger("api.slow_requests")
+
+# calls made while serving the current request: [(name, seconds), ...]
+_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+def record_call(name, seconds):
+    '''
+    Add a timed call to the current request's trace, if one is being kept
+    '''
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((name, seconds))
+
+
+def background_task(coro):
+    '''
+    Start coro as a task on the running loop outside any request's trace
+    (a task inherits the context it is created in, so one started while
+    serving a request would keep adding calls to that request's trace).
+    '''
+    return contextvars.Context().run(asyncio.get_running_loop().create_task, coro)
+
+
+def traced_methods(layer):
+    '''
+    Class decorator: record every public method call of a manager class in
+    the request trace as "<layer>.<method>".
+    '''
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not callable(method):
+                continue
+            setattr(cls, name, _traced(f"{layer}.{name}", method))
+        return cls
+    return decorate
+
+
+def _traced(label, method):
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            if _trace.get() is None:
+                return await method(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                record_call(label, time.perf_counter() - started)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _trace.get() is None:
+            return method(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_call(label, time.perf_counter() - started)
+    return wrapper
+
+
+class SlowRequestLog:
+    """Bounded, newest-last log of requests that took longer than the threshold."""
+
+    def __init__(self, threshold_ms=SLOW_REQUEST_MS, size=SLOW_LOG_SIZE):
+        self.threshold_ms = threshold_ms
+        self._entries = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning("slow request: %s %s %.1f ms", entry["method"], entry["route"], entry["duration_ms"])
+
+    def entries(self, limit=None):
+        with self._lock:
+            items = list(self._entries)
+        return items[-limit:] if limit else items
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class Profiler:
+    """
+    On-demand profiler; one run at a time.
+
+    "sample" mode walks every thread's stack every interval seconds from a
+    background thread and returns collapsed stacks ("a;b;c count", the
+    input format of flamegraph tools). "cprofile" mode runs cProfile on the
+    event loop thread and returns pstats output sorted by cumulative time.
+    A run ends after the given seconds or once the given number of requests
+    has been served, whichever comes first.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+        self._requests = 0
+
+    def request_done(self):
+        if self.running:
+            self._requests += 1
+
+    async def run(self, seconds=None, requests=None, mode="sample", interval=0.005):
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profiling run is already in progress")
+            self.running = True
+            self._requests = 0
+        if seconds is None:
+            seconds = 60 if requests else 10
+        deadline = time.monotonic() + min(float(seconds), MAX_PROFILE_SECONDS)
+        try:
+            if mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await self._wait(deadline, requests)
+                finally:
+                    profile.disable()
+                out = io.StringIO()
+                pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(60)
+                return out.getvalue()
+
+            counts = collections.Counter()
+            stop = threading.Event()
+            sampler = threading.Thread(target=self._sample, args=(counts, stop, interval), name="profiler", daemon=True)
+            sampler.start()
+            try:
+                await self._wait(deadline, requests)
+            finally:
+                stop.set()
+                sampler.join()
+            return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+        finally:
+            self.running = False
+
+    async def _wait(self, deadline, requests):
+        while time.monotonic() < deadline and not (requests and self._requests >= requests):
+            await asyncio.sleep(0.05)
+
+    @staticmethod
+    def _sample(counts, stop, interval):
+        me = threading.get_ident()
+        names = {}
+        while not stop.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(thread_id, str(thread_id)))
+                counts[";".join(reversed(stack))] += 1
+
+
+slow_log = SlowRequestLog()
+profiler = Profiler()
+
+
+class SlowRequestMiddleware:
+    """
+    ASGI middleware keeping a per-request trace of manager and database calls;
+    requests above the threshold go to the slow-request log with that trace.
+    Also counts finished requests for request-bounded profiling runs.
+    """
+
+    def __init__(self, app, log=slow_log):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.log.threshold_ms <= 0:
+            await self.app(scope, receive, send)
+            profiler.request_done()
+            return
+        calls = []
+        token = _trace.set(calls)
+        started = time.perf_counter()
+        status = [500]
+        streaming = [False]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                # event streams stay open by design; they are not slow requests
+                streaming[0] = any(k == b"content-type" and v.startswith(b"text/event-stream") for k, v in message.get("headers", ()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
+            profiler.request_done()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.log.threshold_ms and not streaming[0]:
+                route = scope.get("route")
+                self.log.add({
+                    "time": datetime.now().isoformat(),
+                    "method": scope.get("method"),
+                    "route": getattr(route, "path", None) or scope.get("path"),
+                    "path_params": {k: str(v) for k, v in (scope.get("path_params") or {}).items()},
+                    "query": dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"))),
+                    "status": status[0],
+                    "duration_ms": round(elapsed_ms, 3),
+                    "calls": [{"call": name, "ms": round(seconds * 1000, 3)} for name, seconds in calls],
+                })
@@ -0,0 +1,234 @@
+import asyncio
+import threading
+import time
+import weakref
+
+
+def _to_int(value):
+    try:
+        return int(value) if value is not None else None
+    except Exception:
+        return None
+
+
+# optimistic retries for compare-and-set seat updates before giving up
+MAX_CAS_RETRIES = 5
+# returning seats never gives up; a failing store is retried with this backoff
+GIVE_BACK_BACKOFF = 0.05
+MAX_GIVE_BACK_BACKOFF = 2.0
+
+
+def _first_row(data):
+    if isinstance(data, list):
+        return data[0] if data else None
+    return data
+
+
+def _returned(ev_data, seats_available, seats):
+    # seats_available after giving seats back, never above total_seats
+    new_available = seats_available + seats
+    total = _to_int(ev_data.get("total_seats"))
+    return min(new_available, total) if total is not None else new_available
+
+
+def _allocate(requests, seats_available):
+    """
+    First come, first served: accept requests in order while seats remain.
+    Returns (accepted indexes, seats taken).
+    """
+    accepted, taken = [], 0
+    for i, seats in enumerate(requests):
+        if seats_available is None or taken + seats <= seats_available:
+            accepted.append(i)
+            taken += seats
+    return accepted, taken
+
+
+class ReservationEngine:
+    """
+    Atomic check-and-decrement of seats_available.
+
+    Each event maps onto one of a fixed number of lock stripes, so two
+    bookings for the same event are serialized while bookings for other
+    events proceed in parallel. Every write is a compare-and-set on the
+    count that was read, so a writer outside these locks (another process,
+    or another engine) can never be overwritten. Use reservation_engine()
+    to get the engine shared by the managers on a store.
+    """
+
+    def __init__(self, db, stripes=64):
+        self.db = db
+        # seat counts are always read from the backend, never from a cache
+        self.reader = getattr(db, "backend", db)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, event_id):
+        '''
+        Return the lock guarding seat inventory for an event
+        '''
+        return self._locks[hash(int(event_id)) % len(self._locks)]
+
+    def reserve(self, event_id, seats):
+        '''
+        Take seats from an event if enough are available.
+        Returns a dict with success, message and seats_taken (0 if the event
+        has no seat count to enforce).
+        '''
+        reservation = self.reserve_many(event_id, [seats])
+        if not reservation["success"]:
+            return {"success": False, "message": reservation["message"]}
+        if not reservation["accepted"]:
+            return {"success": False, "message": "Not enough seats available"}
+        return {"success": True, "seats_taken": reservation["seats_taken"]}
+
+    def release(self, event_id, seats):
+        '''
+        Give seats back to an event, e.g. when the booking insert fails
+        '''
+        return self.give_back(event_id, seats)
+
+    def _load_event(self, event_id):
+        try:
+            return _first_row(getattr(self.reader.get_event_by_id(event_id), "data", None))
+        except Exception:
+            # Supabase .single() raises when the row is gone
+            return None
+
+    def reserve_many(self, event_id, requests, event=None):
+        '''
+        Take seats for several requests on one event with a single
+        compare-and-set update. Returns success, message and the indexes
+        of the accepted requests; the rest did not fit.
+        '''
+        with self.lock_for(event_id):
+            ev_data = event if event is not None else self._load_event(event_id)
+            for _ in range(MAX_CAS_RETRIES):
+                if not ev_data:
+                    return {"success": False, "message": "Event not found", "accepted": []}
+                seats_available = _to_int(ev_data.get("seats_available"))
+                accepted, taken = _allocate(requests, seats_available)
+                if seats_available is None or taken == 0:
+                    return {"success": True, "accepted": accepted, "seats_taken": 0}
+                result = self.db.compare_and_set_seats(event_id, seats_available, seats_available - taken)
+                if getattr(result, "data", None):
+                    return {"success": True, "accepted": accepted, "seats_taken": taken}
+                # someone else changed the count in between: re-read and retry
+                ev_data = self._load_event(event_id)
+            return {"success": False, "message": "Seat availability changed, please retry", "accepted": []}
+
+    def give_back(self, event_id, seats):
+        '''
+        Return seats taken by reserve_many. The compare-and-set is retried
+        until it lands, so seats are never lost to a concurrent writer;
+        False only if the event is gone.
+        '''
+        delay = GIVE_BACK_BACKOFF
+        with self.lock_for(event_id):
+            while True:
+                ev_data = self._load_event(event_id)
+                seats_available = _to_int(ev_data.get("seats_available")) if ev_data else None
+                if seats_available is None:
+                    return False
+                result = self.db.compare_and_set_seats(event_id, seats_available, _returned(ev_data, seats_available, seats))
+                data = getattr(result, "data", None)
+                if data:
+                    return True
+                if data is None:
+                    # the store failed rather than the count moving: back off
+                    time.sleep(delay)
+                    delay = min(delay * 2, MAX_GIVE_BACK_BACKOFF)
+
+
+class AsyncReservationEngine:
+    """
+    ReservationEngine for the async data layer: the same striping, with
+    asyncio locks so a waiting booking yields the event loop.
+    """
+
+    def __init__(self, db, stripes=64):
+        self.db = db
+        # seat counts are always read from the backend, never from a cache
+        self.reader = getattr(db, "backend", db)
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def lock_for(self, event_id):
+        return self._locks[hash(int(event_id)) % len(self._locks)]
+
+    async def reserve(self, event_id, seats):
+        reservation = await self.reserve_many(event_id, [seats])
+        if not reservation["success"]:
+            return {"success": False, "message": reservation["message"]}
+        if not reservation["accepted"]:
+            return {"success": False, "message": "Not enough seats available"}
+        return {"success": True, "seats_taken": reservation["seats_taken"]}
+
+    async def release(self, event_id, seats):
+        return await self.give_back(event_id, seats)
+
+    async def _load_event(self, event_id):
+        try:
+            return _first_row(getattr(await self.reader.get_event_by_id(event_id), "data", None))
+        except Exception:
+            # Supabase .single() raises when the row is gone
+            return None
+
+    async def reserve_many(self, event_id, requests, event=None):
+        async with self.lock_for(event_id):
+            ev_data = event if event is not None else await self._load_event(event_id)
+            for _ in range(MAX_CAS_RETRIES):
+                if not ev_data:
+                    return {"success": False, "message": "Event not found", "accepted": []}
+                seats_available = _to_int(ev_data.get("seats_available"))
+                accepted, taken = _allocate(requests, seats_available)
+                if seats_available is None or taken == 0:
+                    return {"success": True, "accepted": accepted, "seats_taken": 0}
+                result = await self.db.compare_and_set_seats(event_id, seats_available, seats_available - taken)
+                if getattr(result, "data", None):
+                    return {"success": True, "accepted": accepted, "seats_taken": taken}
+                # someone else changed the count in between: re-read and retry
+                ev_data = await self._load_event(event_id)
+            return {"success": False, "message": "Seat availability changed, please retry", "accepted": []}
+
+    async def give_back(self, event_id, seats):
+        delay = GIVE_BACK_BACKOFF
+        async with self.lock_for(event_id):
+            while True:
+                ev_data = await self._load_event(event_id)
+                seats_available = _to_int(ev_data.get("seats_available")) if ev_data else None
+                if seats_available is None:
+                    return False
+                result = await self.db.compare_and_set_seats(event_id, seats_available, _returned(ev_data, seats_available, seats))
+                data = getattr(result, "data", None)
+                if data:
+                    return True
+                if data is None:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, MAX_GIVE_BACK_BACKOFF)
+
+
+# one engine per store and process, so bookings and holds on the same event
+# queue on the same lock instead of racing each other's compare-and-set
+_engines = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def _shared_engine(cls, db):
+    with _engines_lock:
+        engine = _engines.get(db)
+        if engine is None:
+            engine = _engines[db] = cls(db)
+        return engine
+
+
+def reservation_engine(db):
+    '''
+    The ReservationEngine shared by every manager working on db
+    '''
+    return _shared_engine(ReservationEngine, db)
+
+
+def async_reservation_engine(db):
+    '''
+    The AsyncReservationEngine shared by every manager working on db
+    '''
+    return _shared_engine(AsyncReservationEngine, db)
@@ -0,0 +1,160 @@
+# seat_feed.py
+import asyncio
+import json
+import os
+import threading
+
+from src.profiling import background_task
+
+# changes are collected for this long and sent as one message per subscriber
+SEAT_FEED_INTERVAL = float(os.getenv("SEAT_FEED_INTERVAL", "0.25"))
+SEAT_FEED_MAX_SUBSCRIBERS = int(os.getenv("SEAT_FEED_MAX_SUBSCRIBERS", "10000"))
+# idle subscribers get a comment line this often, so dead connections are noticed
+SEAT_FEED_HEARTBEAT = float(os.getenv("SEAT_FEED_HEARTBEAT", "15"))
+
+# DatabaseManager methods that change seat counts
+SEAT_WRITES = frozenset((
+    "create_event", "create_events_bulk", "update_event_seats", "compare_and_set_seats", "delete_event", "book_seats",
+))
+
+# pending value for an event whose new count has to be read back
+_UNKNOWN = object()
+
+
+class _Subscriber:
+    __slots__ = ("event_ids", "pending", "ready")
+
+    def __init__(self, event_ids):
+        self.event_ids = event_ids
+        # event_id -> latest seats_available (None once deleted)
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+
+class SeatFeed:
+    """
+    Fan-out of seat-availability changes to streaming subscribers.
+
+    Writers call record() from any thread; changes are coalesced per event
+    (only the latest count is kept) and flushed every SEAT_FEED_INTERVAL by
+    a task on the event loop. Each subscriber holds a dict of unsent
+    changes rather than a queue, so a slow client costs at most one entry
+    per event and never holds up the others: it simply gets the latest
+    counts when it catches up.
+    """
+
+    def __init__(self, interval=SEAT_FEED_INTERVAL, max_subscribers=SEAT_FEED_MAX_SUBSCRIBERS):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        # async callable(event_ids) -> result with event rows, for counts
+        # not carried by the write itself (book_seats returns the booking)
+        self.loader = None
+        self.seq = 0
+        self._subscribers = set()
+        self._changes = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def record(self, method, data):
+        '''
+        Note the seat counts carried by a DatabaseManager write result
+        '''
+        if not self._subscribers or not data or method not in SEAT_WRITES:
+            return
+        rows = [data] if isinstance(data, dict) else data
+        with self._lock:
+            for row in rows:
+                if not isinstance(row, dict):
+                    continue
+                if method == "book_seats":
+                    if "event_id" in row:
+                        self._changes[int(row["event_id"])] = _UNKNOWN
+                elif "id" in row:
+                    self._changes[int(row["id"])] = None if method == "delete_event" else row.get("seats_available")
+
+    def subscribe(self, event_ids=None):
+        if len(self._subscribers) >= self.max_subscribers:
+            raise RuntimeError("Too many subscribers")
+        subscriber = _Subscriber(frozenset(str(int(e)) for e in event_ids) if event_ids else None)
+        self._subscribers.add(subscriber)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = background_task(self._flush_loop())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def messages(self, subscriber, heartbeat=SEAT_FEED_HEARTBEAT):
+        '''
+        Server-Sent Events for one subscriber, until the client goes away
+        '''
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                subscriber.ready.clear()
+                changes, subscriber.pending = subscriber.pending, {}
+                if changes:
+                    body = json.dumps({"seq": self.seq, "seats": changes}, separators=(",", ":"))
+                    yield f"id: {self.seq}\nevent: seats\ndata: {body}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def flush(self):
+        '''
+        Send the changes collected since the last flush to every subscriber
+        '''
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        if not changes:
+            return 0
+        unknown = [event_id for event_id, seats in changes.items() if seats is _UNKNOWN]
+        if unknown:
+            rows = []
+            if self.loader is not None:
+                try:
+                    rows = getattr(await self.loader(unknown), "data", None) or []
+                except Exception as e:
+                    print(f"[SeatFeed] reading seat counts failed: {e}")
+            for event_id in unknown:
+                del changes[event_id]
+            for row in rows:
+                changes[int(row["id"])] = row.get("seats_available")
+        if not changes:
+            return 0
+
+        self.seq += 1
+        # JSON object keys are strings; convert once, not per subscriber
+        changes = {str(event_id): seats for event_id, seats in changes.items()}
+        for subscriber in self._subscribers:
+            if subscriber.event_ids is None:
+                subscriber.pending.update(changes)
+            else:
+                wanted = {k: v for k, v in changes.items() if k in subscriber.event_ids}
+                if not wanted:
+                    continue
+                subscriber.pending.update(wanted)
+            subscriber.ready.set()
+        return len(changes)
+
+    async def _flush_loop(self):
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[SeatFeed] flush failed: {e}")
+        # nobody is listening: changes from now on are not recorded either
+        with self._lock:
+            self._changes.clear()
+        self._flusher = None
+
+
+seat_feed = SeatFeed()
@@ -0,0 +1,341 @@
+# sqlite_store.py
+import sqlite3
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.db import EVENT_FIELDS, BOOKING_FIELDS
+from src.holds import HOLD_FIELDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  event_name TEXT NOT NULL,
+  venue TEXT NOT NULL,
+  date TEXT NOT NULL,
+  total_seats INTEGER NOT NULL,
+  seats_available INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bookings (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_name TEXT NOT NULL,
+  user_email TEXT NOT NULL,
+  event_id INTEGER NOT NULL REFERENCES events(id),
+  seats_booked INTEGER NOT NULL,
+  booking_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events(date, id);
+CREATE INDEX IF NOT EXISTS idx_bookings_event ON bookings(event_id, id);
+CREATE INDEX IF NOT EXISTS idx_bookings_email ON bookings(user_email, id);
+CREATE TABLE IF NOT EXISTS holds (
+  id TEXT PRIMARY KEY,
+  event_id INTEGER NOT NULL,
+  seats INTEGER NOT NULL,
+  user_name TEXT,
+  user_email TEXT,
+  expires_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_holds_expires ON holds(expires_at);
+"""
+
+EVENT_INSERT = "INSERT INTO events (event_name, venue, date, total_seats, seats_available) VALUES (?, ?, ?, ?, ?)"
+BOOKING_INSERT = "INSERT INTO bookings (user_name, user_email, event_id, seats_booked, booking_time) VALUES (?, ?, ?, ?, ?)"
+HOLD_INSERT = f"INSERT INTO holds ({', '.join(HOLD_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def _ok(data):
+    return SimpleNamespace(data=data, error=None)
+
+
+def _fail(error):
+    return SimpleNamespace(data=None, error=error)
+
+
+def _select(fields, allowed, keys):
+    # only known column names ever reach the SQL text
+    if not fields:
+        return "*"
+    columns = list(keys) + [f for f in fields if f not in keys]
+    unknown = [c for c in columns if c not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ", ".join(columns)
+
+
+class SQLiteStore:
+    """
+    Embedded, persistent backend for DatabaseManager.
+
+    Runs in WAL mode so readers never block the writer. Each thread gets its
+    own connection (sqlite3 caches the prepared statements per connection),
+    and seat changes run inside BEGIN IMMEDIATE so the check and the
+    decrement can't interleave with another writer. Results use the same
+    .data/.error shape as the Supabase client.
+    """
+
+    def __init__(self, path, busy_timeout_ms=5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        # every thread's connection, so close() can reach them all
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        self._generation = 0
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            # autocommit; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA foreign_keys=ON")
+            with self._conns_lock:
+                self._conns.append(conn)
+            self._local.conn, self._local.generation = conn, self._generation
+        return conn
+
+    def close(self):
+        '''
+        Close every thread's connection; the next call on any thread opens a new one
+        '''
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+            self._generation += 1
+        for conn in conns:
+            conn.close()
+
+    def _write(self, work):
+        # run work(conn) in one BEGIN IMMEDIATE transaction
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(conn)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+        except sqlite3.Error as e:
+            return _fail(str(e))
+
+    def _query(self, sql, params=()):
+        try:
+            return _ok([dict(row) for row in self._conn().execute(sql, params)])
+        except sqlite3.Error as e:
+            return _fail(str(e))
+
+    def _one(self, conn, table, row_id):
+        row = conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    # events
+    def create_event(self, event_name, venue, date, total_seats, seats_available):
+        def work(conn):
+            cur = conn.execute(EVENT_INSERT, (event_name, venue, date, total_seats, seats_available))
+            return _ok([self._one(conn, "events", cur.lastrowid)])
+        return self._write(work)
+
+    def create_events_bulk(self, rows):
+        def work(conn):
+            data = []
+            for r in rows:
+                cur = conn.execute(EVENT_INSERT, (r["event_name"], r["venue"], r["date"], r["total_seats"], r["seats_available"]))
+                data.append({"id": cur.lastrowid, **r})
+            return _ok(data)
+        return self._write(work)
+
+    def get_all_events(self, limit=None, after=None, fields=None):
+        sql = f"SELECT {_select(fields, EVENT_FIELDS, ('id', 'date'))} FROM events"
+        params = []
+        if after is not None:
+            date, event_id = after
+            sql += " WHERE date > ? OR (date = ? AND id > ?)"
+            params += [date, date, event_id]
+        sql += " ORDER BY date, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._query(sql, params)
+
+    def get_event_by_id(self, event_id):
+        result = self._query("SELECT * FROM events WHERE id = ?", (int(event_id),))
+        if result.data is None:
+            return result
+        if not result.data:
+            return _fail("Not found")
+        return _ok(result.data[0])
+
+    def get_events_by_ids(self, event_ids):
+        ids = [int(eid) for eid in event_ids]
+        if not ids:
+            return _ok([])
+        marks = ", ".join("?" * len(ids))
+        return self._query(f"SELECT * FROM events WHERE id IN ({marks})", ids)
+
+    def update_event_seats(self, event_id, seats_available):
+        def work(conn):
+            conn.execute("UPDATE events SET seats_available = ? WHERE id = ?", (seats_available, int(event_id)))
+            ev = self._one(conn, "events", int(event_id))
+            return _ok([ev]) if ev else _fail("Not found")
+        return self._write(work)
+
+    def compare_and_set_seats(self, event_id, expected, seats_available):
+        def work(conn):
+            cur = conn.execute(
+                "UPDATE events SET seats_available = ? WHERE id = ? AND seats_available = ?",
+                (seats_available, int(event_id), int(expected)),
+            )
+            if cur.rowcount == 0:
+                return _ok([]) if self._one(conn, "events", int(event_id)) else _fail("Not found")
+            return _ok([self._one(conn, "events", int(event_id))])
+        return self._write(work)
+
+    def delete_event(self, event_id):
+        def work(conn):
+            ev = self._one(conn, "events", int(event_id))
+            if ev is None:
+                return _fail("Not found")
+            conn.execute("DELETE FROM events WHERE id = ?", (int(event_id),))
+            return _ok([ev])
+        return self._write(work)
+
+    # bookings
+    def create_booking(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+        booking_time = booking_time or datetime.now().isoformat()
+
+        def work(conn):
+            cur = conn.execute(BOOKING_INSERT, (user_name, user_email, int(event_id), int(seats_booked), booking_time))
+            return _ok([self._one(conn, "bookings", cur.lastrowid)])
+        return self._write(work)
+
+    def create_bookings_bulk(self, rows):
+        def work(conn):
+            data = []
+            for r in rows:
+                values = (r["user_name"], r["user_email"], int(r["event_id"]), int(r["seats_booked"]), r["booking_time"])
+                cur = conn.execute(BOOKING_INSERT, values)
+                data.append(dict(zip(BOOKING_FIELDS, (cur.lastrowid,) + values)))
+            return _ok(data)
+        return self._write(work)
+
+    def book_seats(self, user_name, user_email, event_id, seats_booked, booking_time=None):
+        booking_time = booking_time or datetime.now().isoformat()
+
+        def work(conn):
+            cur = conn.execute(
+                "UPDATE events SET seats_available = seats_available - ? WHERE id = ? AND seats_available >= ?",
+                (int(seats_booked), int(event_id), int(seats_booked)),
+            )
+            if cur.rowcount == 0:
+                if self._one(conn, "events", int(event_id)) is None:
+                    return _fail("Event not found")
+                return _fail("Not enough seats available")
+            cur = conn.execute(BOOKING_INSERT, (user_name, user_email, int(event_id), int(seats_booked), booking_time))
+            return _ok([self._one(conn, "bookings", cur.lastrowid)])
+        return self._write(work)
+
+    def _bookings_page(self, where, params, limit, after, fields):
+        sql = f"SELECT {_select(fields, BOOKING_FIELDS, ('id',))} FROM bookings"
+        clauses = [where] if where else []
+        params = list(params)
+        if after is not None:
+            clauses.append("id > ?")
+            params.append(int(after))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._query(sql, params)
+
+    def get_all_bookings(self, limit=None, after=None, fields=None):
+        return self._bookings_page(None, (), limit, after, fields)
+
+    def get_bookings_by_event(self, event_id, limit=None, after=None, fields=None):
+        return self._bookings_page("event_id = ?", (int(event_id),), limit, after, fields)
+
+    def get_bookings_by_email(self, user_email, limit=None, after=None, fields=None):
+        return self._bookings_page("user_email = ?", (user_email,), limit, after, fields)
+
+    def get_booking_by_id(self, booking_id):
+        result = self._query("SELECT * FROM bookings WHERE id = ?", (int(booking_id),))
+        if result.data is None:
+            return result
+        if not result.data:
+            return _fail("Not found")
+        return _ok(result.data[0])
+
+    def get_booking_totals(self):
+        return self._query(
+            "SELECT event_id, SUM(seats_booked) AS seats_sold, COUNT(*) AS bookings FROM bookings"
+            " WHERE event_id IN (SELECT id FROM events) GROUP BY event_id"
+        )
+
+    def update_booking(self, booking_id, seats_booked):
+        def work(conn):
+            conn.execute("UPDATE bookings SET seats_booked = ? WHERE id = ?", (int(seats_booked), int(booking_id)))
+            bk = self._one(conn, "bookings", int(booking_id))
+            return _ok([bk]) if bk else _fail("Not found")
+        return self._write(work)
+
+    def compare_and_set_booking_seats(self, booking_id, expected, seats_booked):
+        def work(conn):
+            cur = conn.execute(
+                "UPDATE bookings SET seats_booked = ? WHERE id = ? AND seats_booked = ?",
+                (int(seats_booked), int(booking_id), int(expected)),
+            )
+            if cur.rowcount == 0:
+                return _ok([]) if self._one(conn, "bookings", int(booking_id)) else _fail("Not found")
+            return _ok([self._one(conn, "bookings", int(booking_id))])
+        return self._write(work)
+
+    def delete_booking(self, booking_id):
+        def work(conn):
+            bk = self._one(conn, "bookings", int(booking_id))
+            if bk is None:
+                return _fail("Not found")
+            conn.execute("DELETE FROM bookings WHERE id = ?", (int(booking_id),))
+            return _ok([bk])
+        return self._write(work)
+
+    # holds; expires_at is UTC ISO text written in one format, so it compares as a string
+    def create_hold(self, hold_id, event_id, seats, user_name, user_email, expires_at):
+        def work(conn):
+            conn.execute(HOLD_INSERT, (hold_id, int(event_id), int(seats), user_name, user_email, expires_at))
+            return _ok([self._one(conn, "holds", hold_id)])
+        return self._write(work)
+
+    def get_hold(self, hold_id):
+        result = self._query("SELECT * FROM holds WHERE id = ?", (hold_id,))
+        if result.data is None:
+            return result
+        if not result.data:
+            return _fail("Not found")
+        return _ok(result.data[0])
+
+    def take_hold(self, hold_id, now):
+        def work(conn):
+            row = conn.execute("SELECT * FROM holds WHERE id = ? AND expires_at > ?", (hold_id, now)).fetchone()
+            if row is None:
+                return _ok([])
+            conn.execute("DELETE FROM holds WHERE id = ?", (hold_id,))
+            return _ok([dict(row)])
+        return self._write(work)
+
+    def take_expired_holds(self, now):
+        def work(conn):
+            rows = [dict(row) for row in conn.execute("SELECT * FROM holds WHERE expires_at <= ?", (now,))]
+            conn.execute("DELETE FROM holds WHERE expires_at <= ?", (now,))
+            return _ok(rows)
+        return self._write(work)
+
+    def next_hold_expiry(self):
+        return self._query("SELECT id, expires_at FROM holds ORDER BY expires_at LIMIT 1")
+
@@ -0,0 +1,143 @@
+# stats.py
+import os
+from datetime import datetime
+
+from src.cache import TTLCache
+
+# width of the sales-over-time buckets, and how many recent buckets each event keeps
+STATS_BUCKET_SECONDS = int(os.getenv("STATS_BUCKET_SECONDS", "3600"))
+STATS_MAX_BUCKETS = int(os.getenv("STATS_MAX_BUCKETS", "168"))
+# figures read from the store are reused for at most this many seconds
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "5"))
+STATS_CACHE_SIZE = 1024
+
+# columns the per-event scan reads (id is always included)
+EVENT_SALES_FIELDS = ["seats_booked", "booking_time"]
+
+
+def _bucket(booking_time, width):
+    if booking_time is None:
+        return None
+    try:
+        if not isinstance(booking_time, datetime):
+            booking_time = datetime.fromisoformat(str(booking_time).replace("Z", "+00:00"))
+        return int(booking_time.timestamp()) // width * width
+    except (TypeError, ValueError):
+        return None
+
+
+class EventSales:
+    """One event's bookings added up, page by page."""
+
+    __slots__ = ("seats_sold", "bookings", "buckets", "bucket_seconds", "max_buckets")
+
+    def __init__(self, bucket_seconds=STATS_BUCKET_SECONDS, max_buckets=STATS_MAX_BUCKETS):
+        self.seats_sold = 0
+        self.bookings = 0
+        # bucket start (epoch seconds) -> seats sold in it
+        self.buckets = {}
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+
+    def add(self, rows):
+        for row in rows:
+            seats = int(row["seats_booked"])
+            self.seats_sold += seats
+            self.bookings += 1
+            bucket = _bucket(row.get("booking_time"), self.bucket_seconds)
+            if bucket is not None:
+                self.buckets[bucket] = self.buckets.get(bucket, 0) + seats
+
+    def as_dict(self, event_id):
+        recent = sorted(self.buckets.items())[-self.max_buckets:] if self.max_buckets > 0 else []
+        return {
+            "event_id": int(event_id),
+            "seats_sold": self.seats_sold,
+            "bookings": self.bookings,
+            "bucket_seconds": self.bucket_seconds,
+            "sales": [{"start": datetime.fromtimestamp(start).isoformat(), "seats": seats} for start, seats in recent],
+        }
+
+
+class SalesStats:
+    """
+    Sales figures computed from the store, so every API worker reports the
+    same numbers: the totals per event from one aggregate query
+    (get_booking_totals), an event's sales over time from a scan of its
+    bookings.
+
+    Results are reused for ttl seconds, so a burst of reads costs one query;
+    the booking managers drop them as soon as this process changes a
+    booking, and changes made by other workers show up within ttl. The
+    best-seller ranking is sorted once per query.
+    """
+
+    def __init__(self, ttl=STATS_CACHE_TTL, bucket_seconds=STATS_BUCKET_SECONDS, max_buckets=STATS_MAX_BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        self._cache = TTLCache(maxsize=STATS_CACHE_SIZE, ttl=ttl)
+
+    @property
+    def generation(self):
+        '''
+        Read before a query and pass to store_*, so a result read before
+        a change is not kept after it
+        '''
+        return self._cache.generation
+
+    def invalidate(self):
+        self._cache.clear()
+
+    def event(self, event_id):
+        '''
+        An event's cached figures, or None
+        '''
+        data = self._cache.get(("event", int(event_id)), None)
+        return dict(data) if data is not None else None
+
+    def tally(self):
+        return EventSales(self.bucket_seconds, self.max_buckets)
+
+    def store_event(self, event_id, tally, generation):
+        data = tally.as_dict(event_id)
+        self._cache.set(("event", int(event_id)), data, generation)
+        return dict(data)
+
+    def ranking(self):
+        '''
+        The cached per-event totals, best sellers first, or None
+        '''
+        return self._cache.get("ranking", None)
+
+    def store_ranking(self, rows, generation):
+        ranking = sorted(
+            ({"event_id": int(row["event_id"]), "seats_sold": int(row["seats_sold"]), "bookings": int(row["bookings"])} for row in rows),
+            key=lambda item: (-item["seats_sold"], item["event_id"]),
+        )
+        self._cache.set("ranking", ranking, generation)
+        return ranking
+
+    @staticmethod
+    def summary(ranking, limit=None):
+        '''
+        Totals over all events, plus the first limit events of the ranking
+        '''
+        totals = {
+            "events": len(ranking),
+            "seats_sold": sum(item["seats_sold"] for item in ranking),
+            "bookings": sum(item["bookings"] for item in ranking),
+        }
+        return totals, [dict(item) for item in ranking[:limit]]
+
+
+def fill_rate(seats_sold, event):
+    '''
+    Share of an event's seats that are booked, None if the total is unknown
+    '''
+    total = event.get("total_seats") if isinstance(event, dict) else None
+    if not total:
+        return None
+    return round(seats_sold / int(total), 4)
+
+
+sales_stats = SalesStats()
@@ -0,0 +1,155 @@
+# waitlist.py
+import collections
+import os
+import threading
+import uuid
+from datetime import datetime
+
+# finished entries (booked, held, failed, left) kept so users can still look them up
+WAITLIST_HISTORY = int(os.getenv("WAITLIST_HISTORY", "10000"))
+
+WAITLIST_MODES = ("book", "hold")
+
+
+class WaitlistEntry:
+    """
+    One user waiting for seats on an event. mode "book" is promoted straight
+    into a booking, mode "hold" into a seat hold the user still has to confirm.
+    """
+
+    __slots__ = ("id", "event_id", "user_name", "user_email", "seats", "mode", "status", "result", "joined_at")
+
+    def __init__(self, event_id, user_name, user_email, seats, mode="book"):
+        self.id = uuid.uuid4().hex
+        self.event_id = int(event_id)
+        self.user_name = user_name
+        self.user_email = user_email
+        self.seats = int(seats)
+        self.mode = mode
+        self.status = "waiting"
+        # the booking or hold once promoted, the reason once failed
+        self.result = None
+        self.joined_at = datetime.now().isoformat()
+
+    def as_dict(self, position=None):
+        return {
+            "entry_id": self.id,
+            "event_id": self.event_id,
+            "user_name": self.user_name,
+            "user_email": self.user_email,
+            "seats": self.seats,
+            "mode": self.mode,
+            "status": self.status,
+            "position": position,
+            "result": self.result,
+            "joined_at": self.joined_at,
+        }
+
+
+class Waitlist:
+    """
+    Per-event FIFO queues of waiting entries.
+
+    Managers that free seats call notify(event_id); events that have someone
+    waiting are marked dirty and the registered listeners are called, so a
+    promotion worker can pick up every dirty event in one pass with
+    take_dirty(). Every method is safe to call from several threads.
+    """
+
+    def __init__(self, history=WAITLIST_HISTORY):
+        self._queues = {}
+        self._entries = {}
+        self._finished = collections.deque()
+        self._history = history
+        self._dirty = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def add_listener(self, callback):
+        '''
+        Call callback() whenever an event with waiters gets seats back
+        '''
+        self._listeners.append(callback)
+
+    def join(self, entry):
+        '''
+        Queue an entry at the back of its event's line; returns its position
+        '''
+        with self._lock:
+            queue = self._queues.setdefault(entry.event_id, collections.deque())
+            queue.append(entry)
+            self._entries[entry.id] = entry
+            return len(queue)
+
+    def get(self, entry_id):
+        return self._entries.get(entry_id)
+
+    def position(self, entry):
+        '''
+        1-based place in line of a waiting entry, else None
+        '''
+        with self._lock:
+            if entry.status != "waiting":
+                return None
+            return self._queues[entry.event_id].index(entry) + 1
+
+    def waiting(self, event_id, limit=None):
+        '''
+        Waiting entries for an event, front of the line first
+        '''
+        with self._lock:
+            queue = self._queues.get(int(event_id))
+            if not queue:
+                return []
+            if limit is None:
+                return list(queue)
+            return [entry for _, entry in zip(range(limit), queue)]
+
+    def finish(self, entry, status, result=None):
+        '''
+        Take a waiting entry out of line with its final status; False if it
+        was no longer waiting
+        '''
+        with self._lock:
+            if entry.status != "waiting":
+                return False
+            queue = self._queues[entry.event_id]
+            if queue and queue[0] is entry:
+                queue.popleft()
+            else:
+                queue.remove(entry)
+            if not queue:
+                del self._queues[entry.event_id]
+            entry.status = status
+            entry.result = result
+            self._finished.append(entry.id)
+            while len(self._finished) > self._history:
+                self._entries.pop(self._finished.popleft(), None)
+            return True
+
+    def leave(self, entry_id):
+        entry = self._entries.get(entry_id)
+        return entry is not None and self.finish(entry, "left")
+
+    def notify(self, event_id):
+        '''
+        Seats came back on an event: mark it for promotion if anyone waits
+        '''
+        with self._lock:
+            if int(event_id) not in self._queues:
+                return
+            self._dirty.add(int(event_id))
+        for callback in self._listeners:
+            callback()
+
+    def take_dirty(self):
+        '''
+        Return and clear the events marked by notify()
+        '''
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
@@ -0,0 +1,214 @@
+# wal.py
+import json
+import os
+import pickle
+import threading
+import time
+
+SNAPSHOT_FILE = "snapshot.pkl"
+
+
+def _segment_name(first_seq):
+    return f"wal-{first_seq:012d}.log"
+
+
+def _segment_start(name):
+    return int(name[4:-4])
+
+
+def _fsync_dir(directory):
+    # make a rename/create durable; not supported everywhere (e.g. Windows)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """
+    Append-only change log plus periodic snapshots for the in-memory store.
+
+    Records are JSON lines ``[seq, op, *args]``. Appends only write to the
+    OS buffer; a background thread fsyncs every sync_interval seconds, so
+    many writes share one fsync (group commit) and at most that window of
+    changes can be lost on a crash. Appends do not wait for that fsync.
+    A sync_interval of 0 fsyncs every append before it returns.
+
+    snapshot() starts a new log segment and builds and writes the state in
+    the background; once it is on disk the older segments are deleted, so a
+    restart loads the snapshot and replays only the tail.
+    """
+
+    def __init__(self, directory, sync_interval=0.05, snapshot_every=100000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.seq = 0
+        self._since_snapshot = 0
+        self._file = None
+        self._dirty = False
+        self._closed = False
+        self._snapshotting = False
+        self._lock = threading.Lock()
+        # one fsync at a time, so close() waits for one already running
+        self._sync_lock = threading.Lock()
+        self._flusher = None
+        self._snapshotter = None
+
+    def _segments(self):
+        names = [n for n in os.listdir(self.directory) if n.startswith("wal-") and n.endswith(".log")]
+        return sorted(names, key=_segment_start)
+
+    def recover(self):
+        '''
+        Read the latest snapshot and the records written after it.
+        Returns (snapshot state or None, list of records) and opens a new
+        segment for appending.
+        '''
+        state, snap_seq = None, 0
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                snap = pickle.load(f)
+            state, snap_seq = snap["state"], snap["seq"]
+
+        records, last = [], snap_seq
+        for name in self._segments():
+            with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # torn write at the tail of a segment
+                        break
+                    if record[0] > snap_seq:
+                        records.append(record)
+                    last = max(last, record[0])
+
+        self.seq = last
+        self._since_snapshot = len(records)
+        self._open_segment()
+        return state, records
+
+    def _open_segment(self):
+        # caller holds self._lock (or is still single-threaded in recover)
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self._file = open(os.path.join(self.directory, _segment_name(self.seq + 1)), "w", encoding="utf-8")
+        _fsync_dir(self.directory)
+        if self.sync_interval > 0 and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(self.sync_interval)
+            self.sync()
+
+    def sync(self):
+        '''
+        Flush buffered records and fsync them
+        '''
+        # the fsync runs outside self._lock, so appends (and the store writes
+        # that make them) carry on meanwhile; it works on a duplicate of the
+        # descriptor, which stays valid if a snapshot rotates the segment
+        with self._sync_lock:
+            with self._lock:
+                if not self._dirty or self._file is None:
+                    return
+                self._file.flush()
+                fd = os.dup(self._file.fileno())
+                self._dirty = False
+            try:
+                os.fsync(fd)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+            finally:
+                os.close(fd)
+
+    def append(self, op, *args):
+        '''
+        Log one change. Callers append in the order the changes were applied.
+        '''
+        with self._lock:
+            if self._file is None:
+                # closed (e.g. an app shutdown) and written to again
+                self._closed = False
+                self._open_segment()
+            self.seq += 1
+            self._since_snapshot += 1
+            self._file.write(json.dumps([self.seq, op, *args], separators=(",", ":")) + "\n")
+            if self.sync_interval > 0:
+                self._dirty = True
+            else:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def snapshot_due(self):
+        return self._since_snapshot >= self.snapshot_every and not self._snapshotting
+
+    def snapshot(self, build_state):
+        '''
+        Persist the state returned by build_state(), called on the snapshot
+        thread. It must include every change up to the last appended record
+        (later ones are fine if replaying them is idempotent), so the caller
+        must make sure no append happens before this call.
+        '''
+        with self._lock:
+            if self._snapshotting:
+                return
+            self._snapshotting = True
+            seq = self.seq
+            self._since_snapshot = 0
+            self._open_segment()
+            self._snapshotter = threading.Thread(target=self._write_snapshot, args=(build_state, seq), name="wal-snapshot", daemon=True)
+            self._snapshotter.start()
+
+    def _write_snapshot(self, build_state, seq):
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp = path + ".tmp"
+        try:
+            state = build_state()
+            with open(tmp, "wb") as f:
+                pickle.dump({"seq": seq, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            _fsync_dir(self.directory)
+            # segments that end at or before seq are covered by the snapshot
+            for name in self._segments():
+                if _segment_start(name) <= seq:
+                    os.remove(os.path.join(self.directory, name))
+        except Exception as e:
+            print(f"[WriteAheadLog] snapshot failed: {e}")
+        finally:
+            self._snapshotting = False
+
+    def close(self):
+        '''
+        fsync what was appended and close the segment; call on shutdown, or
+        the last sync_interval of changes may be lost
+        '''
+        self._closed = True
+        # a snapshot still being written would delete segments under the next recover()
+        snapshotter = self._snapshotter
+        if snapshotter is not None:
+            snapshotter.join()
+        self.sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            # the flusher exits on its next tick; a reopen starts a new one
+            self._flusher = None
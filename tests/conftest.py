@@ -0,0 +1,9 @@
+import os
+import sys
+
+# the tests run against the in-memory store, whatever the local environment says
+os.environ["SUPABASE_URL"] = ""
+os.environ.pop("SQLITE_PATH", None)
+os.environ.pop("MEMORY_WAL_DIR", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
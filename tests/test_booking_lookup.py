@@ -0,0 +1,48 @@
+import asyncio
+import uuid
+
+
+def _client():
+    import httpx
+    from API.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _book(client, event_id, email):
+    booking = {"user_name": "Ann", "user_email": email, "event_id": event_id, "seats_booked": 1}
+    return (await client.post("/bookings", json=booking)).json()["data"]["id"]
+
+
+def test_bookings_by_email_are_paged_in_id_order():
+    # the store is shared by the whole test run: use addresses nobody else books with
+    mine, other = f"{uuid.uuid4().hex}@example.com", f"{uuid.uuid4().hex}@example.com"
+
+    async def main():
+        async with _client() as client:
+            event = (await client.post("/events", json={"event_name": "E", "venue": "Hall", "date": "2030-01-01", "total_seats": 20})).json()["data"]
+            ids = [await _book(client, event["id"], mine if i % 2 == 0 else other) for i in range(5)]
+            first = (await client.get("/bookings", params={"email": mine, "limit": 2})).json()
+            rest = (await client.get("/bookings", params={"email": mine, "limit": 2, "after": first["next_cursor"]})).json()
+            nobody = (await client.get("/bookings", params={"email": f"{uuid.uuid4().hex}@example.com"})).json()
+            return ids, first, rest, nobody
+
+    ids, first, rest, nobody = asyncio.run(main())
+    assert [b["id"] for b in first["data"]] == [ids[0], ids[2]] and first["next_cursor"]
+    assert [b["id"] for b in rest["data"]] == [ids[4]] and rest["next_cursor"] is None
+    assert {b["user_email"] for b in first["data"] + rest["data"]} == {mine}
+    assert nobody["data"] == [] and nobody["next_cursor"] is None
+
+
+def test_booking_by_id():
+    async def main():
+        async with _client() as client:
+            event = (await client.post("/events", json={"event_name": "E", "venue": "Hall", "date": "2030-01-01", "total_seats": 5})).json()["data"]
+            booking_id = await _book(client, event["id"], "ann@example.com")
+            found = await client.get(f"/bookings/{booking_id}")
+            missing = await client.get(f"/bookings/{booking_id + 10_000}")
+            return booking_id, event["id"], found, missing
+
+    booking_id, event_id, found, missing = asyncio.run(main())
+    assert found.status_code == 200
+    assert {k: found.json()["data"][k] for k in ("id", "event_id", "user_email")} == {"id": booking_id, "event_id": event_id, "user_email": "ann@example.com"}
+    assert missing.status_code == 404
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.cache import (
+    AsyncCachedDatabaseManager,
+    CachedDatabaseManager,
+    TTLCache,
+    event_cache,
+    event_list_cache,
+)
+from src.db import AsyncDatabaseManager, DatabaseManager
+
+
+@pytest.fixture(autouse=True)
+def _empty_caches():
+    # the caches are per process; event ids repeat across fresh stores
+    event_cache.clear()
+    event_list_cache.clear()
+
+
+class _CountingReads:
+    """A backend whose event reads are counted and can be held back."""
+
+    def __init__(self, backend, delay=0.0):
+        self.backend = backend
+        self.delay = delay
+        self.reads = 0
+        self.gate = None
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def get_event_by_id(self, event_id):
+        self.reads += 1
+        result = self.backend.get_event_by_id(event_id)
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        return result
+
+
+def _seats(result):
+    return result.data["seats_available"]
+
+
+def test_writes_invalidate_the_cached_event():
+    db = CachedDatabaseManager(DatabaseManager())
+    event_id = db.create_event("E", "Hall", "2030-01-01", 10, 10).data[0]["id"]
+    assert _seats(db.get_event_by_id(event_id)) == 10
+    assert [ev["id"] for ev in db.get_all_events().data] == [event_id]
+
+    db.book_seats("Ann", "ann@example.com", event_id, 3)
+    assert _seats(db.get_event_by_id(event_id)) == 7
+    db.update_event_seats(event_id, 5)
+    assert _seats(db.get_event_by_id(event_id)) == 5
+    db.delete_event(event_id)
+    assert db.get_event_by_id(event_id).data is None
+    assert db.get_all_events().data == []
+
+
+def test_load_started_before_a_write_is_not_cached():
+    cache = TTLCache()
+    generation = cache.generation
+    cache.invalidate("k")
+    cache.set("k", "stale", generation)
+    assert cache.get("k", None) is None
+
+    backend = _CountingReads(DatabaseManager())
+    db = CachedDatabaseManager(backend)
+    event_id = db.create_event("E", "Hall", "2030-01-01", 10, 10).data[0]["id"]
+    backend.gate = threading.Event()
+    with ThreadPoolExecutor(1) as pool:
+        # this read has the old count in hand when the write lands
+        stale = pool.submit(db.get_event_by_id, event_id)
+        while backend.reads == 0:
+            time.sleep(0.01)
+        db.update_event_seats(event_id, 4)
+        backend.gate.set()
+        assert _seats(stale.result()) == 10
+    backend.gate = None
+    assert _seats(db.get_event_by_id(event_id)) == 4
+
+
+def test_concurrent_misses_share_one_read():
+    backend = _CountingReads(DatabaseManager(), delay=0.1)
+    db = CachedDatabaseManager(backend)
+    event_id = db.create_event("E", "Hall", "2030-01-01", 10, 10).data[0]["id"]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: db.get_event_by_id(event_id), range(8)))
+    assert {_seats(r) for r in results} == {10}
+    assert backend.reads == 1
+
+
+def test_concurrent_async_misses_share_one_read():
+    class AsyncCountingReads(_CountingReads):
+        async def get_event_by_id(self, event_id):
+            self.reads += 1
+            await asyncio.sleep(0.05)
+            return await self.backend.get_event_by_id(event_id)
+
+    async def main():
+        backend = AsyncCountingReads(AsyncDatabaseManager())
+        db = AsyncCachedDatabaseManager(backend)
+        event_id = (await db.create_event("E", "Hall", "2030-01-01", 10, 10)).data[0]["id"]
+        results = await asyncio.gather(*[db.get_event_by_id(event_id) for _ in range(10)])
+        return {_seats(r) for r in results}, backend.reads
+
+    assert asyncio.run(main()) == ({10}, 1)
+
+
+def test_version_moves_on_only_after_the_cache_is_cleared():
+    backend = DatabaseManager()
+    db = CachedDatabaseManager(backend)
+    event_id = db.create_event("E", "Hall", "2030-01-01", 10, 10).data[0]["id"]
+    db.get_event_by_id(event_id)
+    seen = []
+    bump = backend.bump_events_version
+
+    def watched_bump():
+        seen.append(event_cache.get(event_id, None))
+        bump()
+
+    backend.bump_events_version = watched_bump
+    db.book_seats("Ann", "ann@example.com", event_id, 1)
+    # whatever a reader of the final version finds, it is not the cached old row
+    assert seen[-1] is None
+
+
+def _client():
+    import httpx
+    from API.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_booking_changes_the_event_etag():
+    async def main():
+        async with _client() as client:
+            event = (await client.post("/events", json={"event_name": "E", "venue": "Hall", "date": "2030-01-01", "total_seats": 10})).json()["data"]
+            url = f"/events/{event['id']}"
+            first = await client.get(url)
+            etag = first.headers["etag"]
+            assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+            booking = {"user_name": "Ann", "user_email": "ann@example.com", "event_id": event["id"], "seats_booked": 3}
+            assert (await client.post("/bookings", json=booking)).status_code == 200
+            after = await client.get(url, headers={"If-None-Match": etag})
+            return after.status_code, after.headers["etag"] != etag, after.json()["data"]["seats_available"]
+
+    assert asyncio.run(main()) == (200, True, 7)
+
+
+def test_get_after_a_write_sees_it():
+    async def main():
+        async with _client() as client:
+            event = (await client.post("/events", json={"event_name": "E", "venue": "Hall", "date": "2030-01-01", "total_seats": 10})).json()["data"]
+            url = f"/events/{event['id']}"
+            await client.get(url)
+            await client.get("/events?limit=100")
+            booking = {"user_name": "Ann", "user_email": "ann@example.com", "event_id": event["id"], "seats_booked": 2}
+            booking_id = (await client.post("/bookings", json=booking)).json()["data"]["id"]
+            seats = [(await client.get(url)).json()["data"]["seats_available"]]
+            assert (await client.put(f"/bookings/{booking_id}", json={"seats_booked": 5})).status_code == 200
+            seats.append((await client.get(url)).json()["data"]["seats_available"])
+            listing = (await client.get("/events?limit=100")).json()["data"]
+            seats.append(next(ev["seats_available"] for ev in listing if ev["id"] == event["id"]))
+            return seats
+
+    assert asyncio.run(main()) == [8, 5, 5]
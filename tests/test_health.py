@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import API.main
+from src.db import AsyncDatabaseManager
+from src.logic import AsyncSeatHoldManager
+
+SERVICES = ("db_for_versions", "event_manager", "booking_manager", "hold_manager", "waitlist_manager", "idempotency")
+
+
+@pytest.fixture
+def fresh_api(monkeypatch):
+    # an API process that has not built its services yet; restored afterwards
+    for name in SERVICES:
+        monkeypatch.setattr(API.main, name, None)
+    monkeypatch.setattr(API.main, "_ready", False)
+
+
+def _client():
+    import httpx
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=API.main.app), base_url="http://test")
+
+
+class _DownStore:
+    async def get_all_events(self, *args):
+        return SimpleNamespace(data=None, error="connection refused")
+
+
+def test_healthz_does_not_build_the_services(fresh_api):
+    async def main():
+        async with _client() as client:
+            return await client.get("/healthz")
+
+    response = asyncio.run(main())
+    assert (response.status_code, response.json()) == (200, {"status": "ok"})
+    assert API.main.booking_manager is None
+
+
+def test_readyz_reports_a_failed_warm_up_and_retries_it(fresh_api, monkeypatch):
+    async def main():
+        async with _client() as client:
+            # services exist, but the store does not answer
+            monkeypatch.setattr(API.main, "booking_manager", object())
+            monkeypatch.setattr(API.main, "db_for_versions", _DownStore())
+            monkeypatch.setattr(API.main, "hold_manager", AsyncSeatHoldManager())
+            down = await client.get("/readyz")
+            ready_while_down = API.main._ready
+
+            monkeypatch.setattr(API.main, "db_for_versions", AsyncDatabaseManager())
+            up = await client.get("/readyz")
+            await API.main.hold_manager.close()
+            return down, ready_while_down, up
+
+    down, ready_while_down, up = asyncio.run(main())
+    assert down.status_code == 503
+    assert down.json() == {"status": "unavailable", "detail": "connection refused"}
+    assert not ready_while_down
+    assert (up.status_code, up.json()) == (200, {"status": "ready", "backend": "memory"})
+    assert API.main._ready
+
+
+def test_first_request_builds_the_services(fresh_api):
+    async def main():
+        async with _client() as client:
+            response = await client.get("/events", params={"limit": 1})
+            built = API.main.booking_manager is not None and API.main.event_manager is not None
+            await API.main.hold_manager.close()
+            await API.main.waitlist_manager.close()
+            return response.status_code, built
+
+    assert asyncio.run(main()) == (200, True)
@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+import src.db
+from src.db import AsyncDatabaseManager, DatabaseManager
+from src.logic import AsyncSeatHoldManager
+
+
+def _open_store(monkeypatch, path):
+    # a fresh process's view of the SQLite file
+    monkeypatch.setattr(src.db, "SQLITE_PATH", str(path))
+    monkeypatch.setattr(src.db, "_shared_manager", DatabaseManager())
+    return AsyncDatabaseManager()
+
+
+async def _seats_available(db, event_id):
+    return (await db.get_event_by_id(event_id)).data["seats_available"]
+
+
+def test_expired_holds_are_returned_after_a_restart(monkeypatch, tmp_path):
+    async def before_restart():
+        db = _open_store(monkeypatch, tmp_path / "store.db")
+        event_id = (await db.create_event("E", "Hall", "2030-01-01", 5, 5)).data[0]["id"]
+        holds = AsyncSeatHoldManager(db=db)
+        assert (await holds.place_hold(event_id, 3, ttl=1))["success"]
+        await holds.close()
+        return event_id
+
+    async def after_restart(event_id):
+        db = _open_store(monkeypatch, tmp_path / "store.db")
+        assert await _seats_available(db, event_id) == 2
+        await asyncio.sleep(1.1)
+        holds = AsyncSeatHoldManager(db=db)
+        assert await holds.start() == 1
+        await holds.close()
+        return await _seats_available(db, event_id)
+
+    event_id = asyncio.run(before_restart())
+    assert asyncio.run(after_restart(event_id)) == 5
+
+
+def test_another_worker_can_confirm_a_hold(monkeypatch, tmp_path):
+    async def main():
+        first = AsyncSeatHoldManager(db=_open_store(monkeypatch, tmp_path / "store.db"))
+        second = AsyncSeatHoldManager(db=_open_store(monkeypatch, tmp_path / "store.db"))
+        event_id = (await first.db.create_event("E", "Hall", "2030-01-01", 5, 5)).data[0]["id"]
+        hold = (await first.place_hold(event_id, 2, user_name="Ann", user_email="ann@example.com"))["data"]
+
+        assert (await second.get_hold(hold["hold_id"]))["data"]["seats"] == 2
+        assert (await second.confirm_hold(hold["hold_id"]))["success"]
+        assert not (await first.release_hold(hold["hold_id"]))["success"]
+        await first.close()
+        return await _seats_available(second.db, event_id)
+
+    assert asyncio.run(main()) == 3
+
+
+class _FailingBookings:
+    def __init__(self, db):
+        self.db = db
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    async def create_booking(self, *args, **kwargs):
+        return SimpleNamespace(data=None, error="insert failed")
+
+
+def test_hold_kept_after_failed_confirm_still_expires():
+    async def main():
+        db = _FailingBookings(AsyncDatabaseManager())
+        event_id = (await db.create_event("E", "Hall", "2030-01-01", 5, 5)).data[0]["id"]
+        holds = AsyncSeatHoldManager(db=db)
+        hold = (await holds.place_hold(event_id, 4, ttl=1, user_name="Ann", user_email="ann@example.com"))["data"]
+
+        assert not (await holds.confirm_hold(hold["hold_id"]))["success"]
+        assert (await holds.get_hold(hold["hold_id"]))["success"]
+        for _ in range(30):
+            await asyncio.sleep(0.1)
+            if await _seats_available(db, event_id) == 5:
+                break
+        await holds.close()
+        return await _seats_available(db, event_id), await holds.get_hold(hold["hold_id"])
+
+    seats, hold = asyncio.run(main())
+    assert seats == 5 and not hold["success"]
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from src.idempotency import IdempotencyCache, IdempotencyConflict, SQLiteIdempotencyStore
+
+
+def _workers(path, count=2, **kwargs):
+    # one cache per worker process, sharing the SQLite file
+    return [IdempotencyCache(SQLiteIdempotencyStore(str(path), **kwargs)) for _ in range(count)]
+
+
+def test_workers_sharing_a_store_run_a_key_once(tmp_path):
+    calls = []
+
+    async def book():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return 200, {"booking": len(calls)}
+
+    async def main():
+        workers = _workers(tmp_path / "keys.db")
+        return await asyncio.gather(*[workers[i % 2].run("k1", "fp", book) for i in range(10)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert {(status, body["booking"]) for status, body, _ in results} == {(200, 1)}
+    assert sum(not replayed for _, _, replayed in results) == 1
+
+
+def test_server_error_releases_the_claim(tmp_path):
+    responses = iter([(503, {"detail": "busy"}), (200, {"ok": True})])
+
+    async def book():
+        return next(responses)
+
+    async def main():
+        first, second = _workers(tmp_path / "keys.db")
+        return await first.run("k1", "fp", book), await second.run("k1", "fp", book)
+
+    assert asyncio.run(main()) == ((503, {"detail": "busy"}, False), (200, {"ok": True}, False))
+
+
+def test_key_reused_for_another_request_while_pending(tmp_path):
+    first, second = _workers(tmp_path / "keys.db")
+
+    async def main():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(0.2)
+            return 200, {}
+
+        task = asyncio.ensure_future(first.run("k1", "fp-a", slow))
+        await started.wait()
+        with pytest.raises(IdempotencyConflict):
+            await second.run("k1", "fp-b", slow)
+        await task
+
+    asyncio.run(main())
+
+
+def test_claim_of_a_dead_worker_lapses(tmp_path):
+    dead = SQLiteIdempotencyStore(str(tmp_path / "keys.db"), claim_ttl=0.1)
+    assert dead.claim("k1", "fp")
+    (worker,) = _workers(tmp_path / "keys.db", count=1)
+
+    async def book():
+        return 201, {"id": 1}
+
+    assert asyncio.run(worker.run("k1", "fp", book)) == (201, {"id": 1}, False)
+
+
+def test_claim_is_kept_while_a_slow_request_runs(tmp_path):
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        # several claim TTLs long
+        await asyncio.sleep(0.8)
+        return 201, {"id": len(calls)}
+
+    async def main():
+        first, second = _workers(tmp_path / "keys.db", claim_ttl=0.2)
+        task = asyncio.ensure_future(first.run("k1", "fp", slow))
+        await asyncio.sleep(0.1)
+        return await asyncio.gather(task, second.run("k1", "fp", slow))
+
+    assert asyncio.run(main()) == [(201, {"id": 1}, False), (201, {"id": 1}, True)]
+    assert len(calls) == 1
+
+
+def test_release_leaves_a_newer_claim_alone(tmp_path):
+    store = SQLiteIdempotencyStore(str(tmp_path / "keys.db"), claim_ttl=0.05)
+    stale = store.claim("k1", "fp")
+    time.sleep(0.1)
+    fresh = store.claim("k1", "fp")
+    assert fresh and fresh != stale
+
+    store.release("k1", stale)
+    assert not store.refresh("k1", stale)
+    assert store.refresh("k1", fresh)
+    assert store.get("k1") == ("fp", None, None)
@@ -0,0 +1,55 @@
+import asyncio
+import io
+
+import pytest
+
+from src.importer import iter_event_records
+
+
+@pytest.mark.parametrize("body", ['{"events": 5}', '"abc"', "5", '{"events": {"a": 1}}'])
+def test_json_upload_that_is_not_a_list_is_rejected(body):
+    with pytest.raises(ValueError):
+        list(iter_event_records(io.StringIO(body), "json"))
+
+
+def test_json_upload_accepts_list_and_events_key():
+    row = {"event_name": "a", "venue": "v", "date": "2030-01-01", "total_seats": 3}
+    assert list(iter_event_records(io.StringIO('[{"event_name": "a", "venue": "v", "date": "2030-01-01", "total_seats": 3}]'), "json")) == [row]
+    assert list(iter_event_records(io.StringIO('{"events": [{"event_name": "a", "venue": "v", "date": "2030-01-01", "total_seats": 3}]}'), "json")) == [row]
+
+
+def _client():
+    import httpx
+    from API.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def _event_count():
+    from src.db import get_database_manager
+    return len(get_database_manager().get_all_events(fields=["id"]).data)
+
+
+def test_unreadable_upload_imports_nothing():
+    rows = "".join(f"Show {i},Hall,2030-01-01,10\n" for i in range(1200))
+    body = ("event_name,venue,date,total_seats\n" + rows).encode() + b"Bad \xff,Hall,2030-01-01,10\n"
+
+    async def upload():
+        async with _client() as client:
+            return await client.post("/events/bulk?format=csv", content=body)
+
+    before = _event_count()
+    response = asyncio.run(upload())
+    assert response.status_code == 400 and "Could not read upload" in response.json()["detail"]
+    assert _event_count() == before
+
+
+def test_readable_upload_is_imported_with_a_report():
+    body = b"event_name,venue,date,total_seats\nA,Hall,2030-01-01,10\nB,Hall,2030-01-01,zero\n"
+
+    async def upload():
+        async with _client() as client:
+            return await client.post("/events/bulk?format=csv", content=body)
+
+    response = asyncio.run(upload())
+    assert response.status_code == 200
+    assert response.json()["data"] == {"imported": 1, "rejected_count": 1, "rejected": [{"row": 2, "message": "total_seats must be an integer"}]}
@@ -0,0 +1,25 @@
+import asyncio
+
+from src.db import AsyncDatabaseManager
+from src.metrics import DB_LATENCY
+from src.profiling import _trace
+
+
+def _samples(manager, method):
+    series = DB_LATENCY._series.get((manager, method))
+    return series[2] if series else 0
+
+
+def test_delegated_async_calls_are_recorded_once():
+    before = {manager: _samples(manager, "create_event") for manager in ("sync", "async")}
+
+    async def main():
+        calls = []
+        _trace.set(calls)
+        await AsyncDatabaseManager().create_event("E", "Hall", "2030-01-01", 10, 10)
+        return calls
+
+    calls = asyncio.run(main())
+    assert [name for name, _ in calls] == ["sync.create_event"]
+    assert _samples("sync", "create_event") == before["sync"] + 1
+    assert _samples("async", "create_event") == before["async"]
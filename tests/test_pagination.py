@@ -0,0 +1,59 @@
+import pytest
+
+from src.logic import _booking_after, _encode_cursor, _event_after
+
+
+@pytest.mark.parametrize("key", [["2030-01-01", "x"], [1, 2], [None, None], [{"a": 1}], ["2030-01-01", True], ["2030-01-01"]])
+def test_malformed_event_cursor_is_rejected(key):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _event_after(_encode_cursor(key))
+
+
+@pytest.mark.parametrize("key", [["1"], [None], [{"a": 1}], [True], [1, 2]])
+def test_malformed_booking_cursor_is_rejected(key):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _booking_after(_encode_cursor(key))
+
+
+def test_cursors_round_trip():
+    assert _event_after(_encode_cursor(["2030-01-01", 7])) == ("2030-01-01", 7)
+    assert _booking_after(_encode_cursor([7])) == 7
+
+
+class _Query:
+    # records the PostgREST filter a query would send
+    def __init__(self):
+        self.filters = []
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def or_(self, text):
+        self.filters.append(text)
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, count):
+        return self
+
+
+@pytest.mark.parametrize("date", ["2030-01-01),id.gt.0", "2030-01-01,id.gt.0", "next week", ""])
+def test_cursor_date_cannot_change_the_supabase_filter(date):
+    from src.db import _events_page_query
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _events_page_query(_Query(), 10, _event_after(_encode_cursor([date, 7])))
+
+
+def test_cursor_date_is_normalised_and_quoted():
+    from src.db import _events_page_query
+
+    query = _events_page_query(_Query(), 10, ("2030-01-01", 7))
+    assert query.filters == ['date.gt."2030-01-01",and(date.eq."2030-01-01",id.gt.7)']
+    query = _events_page_query(_Query(), 10, ("2030-01-01T10:00:00+00:00", 7))
+    assert query.filters == ['date.gt."2030-01-01T10:00:00+00:00",and(date.eq."2030-01-01T10:00:00+00:00",id.gt.7)']
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import src.db
+from src.db import DatabaseManager, get_database_manager
+from src.logic import AsyncBookingManager, AsyncSeatHoldManager, BookingManager
+from src.reservation import ReservationEngine, reservation_engine
+
+THREADS = 16
+
+
+def _seats_available(db, event_id):
+    data = db.get_event_by_id(event_id).data
+    return (data[0] if isinstance(data, list) else data)["seats_available"]
+
+
+def _seats_booked(db, event_id):
+    return sum(row["seats_booked"] for row in db.get_bookings_by_event(event_id).data)
+
+
+def _new_event(db, seats):
+    return db.create_event("Stress", "Hall", "2030-01-01", seats, seats).data[0]["id"]
+
+
+@pytest.mark.parametrize("rpc_booking", [True, False])
+def test_concurrent_bookings_never_oversell(rpc_booking):
+    db = DatabaseManager()
+    db.rpc_booking = rpc_booking
+    bookings = BookingManager(db=db)
+    event_id = _new_event(db, 300)
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda _: bookings.book_event("Ann", "ann@example.com", event_id, 1), range(500)))
+
+    assert sum(r["success"] for r in results) == 300
+    assert _seats_available(db, event_id) == 0
+    assert _seats_booked(db, event_id) == 300
+
+
+def test_bookings_and_holds_keep_seat_count_consistent():
+    # thread-pool bookings, async bookings and async holds on one event,
+    # plus a second engine standing in for another API process
+    db = get_database_manager()
+    rpc_booking, db.rpc_booking = db.rpc_booking, False
+    try:
+        event_id = _new_event(db, 4000)
+        bookings = BookingManager()
+        other_process = ReservationEngine(db)
+        held = []
+
+        async def holds_and_bookings():
+            async_bookings, holds = AsyncBookingManager(), AsyncSeatHoldManager()
+            results = await asyncio.gather(
+                *[async_bookings.book_event("Bo", "bo@example.com", event_id, 1) for _ in range(600)],
+                *[holds.place_hold(event_id, 1, ttl=600) for _ in range(1200)],
+            )
+            held.extend(r for r in results[600:] if r["success"])
+            await holds.close()
+
+        loop_thread = threading.Thread(target=asyncio.run, args=(holds_and_bookings(),))
+        loop_thread.start()
+        with ThreadPoolExecutor(THREADS) as pool:
+            booked = list(pool.map(lambda _: bookings.book_event("Cy", "cy@example.com", event_id, 1), range(1200)))
+            taken = list(pool.map(lambda _: other_process.reserve(event_id, 1), range(400)))
+        loop_thread.join()
+
+        assert all(r["success"] for r in booked + taken) and len(held) == 1200
+        seats_held = len(held) + len(taken)
+        assert _seats_available(db, event_id) == 4000 - _seats_booked(db, event_id) - seats_held
+        assert _seats_booked(db, event_id) == 1800
+    finally:
+        db.rpc_booking = rpc_booking
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_booking_updates_keep_seat_count(backend, monkeypatch, tmp_path):
+    if backend == "sqlite":
+        monkeypatch.setattr(src.db, "SQLITE_PATH", str(tmp_path / "store.db"))
+    db = DatabaseManager()
+    bookings = BookingManager(db=db)
+    # enough seats that every thread's extra seats fit at once
+    event_id = _new_event(db, 100)
+    booking_id = bookings.book_event("Ann", "ann@example.com", event_id, 2)["data"]["id"]
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda i: bookings.update_booking_seats(booking_id, 1 + i % 6), range(300)))
+
+    assert all(r["success"] for r in results)
+    assert _seats_available(db, event_id) == 100 - _seats_booked(db, event_id)
+
+
+def test_give_back_survives_concurrent_writers():
+    db = DatabaseManager()
+    event_id = _new_event(db, 1000)
+    engines = [ReservationEngine(db) for _ in range(4)]
+    assert engines[0].reserve_many(event_id, [1] * 800)["seats_taken"] == 800
+
+    # engines with separate locks keep changing the count under each other
+    with ThreadPoolExecutor(THREADS) as pool:
+        returned = list(pool.map(lambda i: engines[i % 4].give_back(event_id, 1), range(800)))
+
+    assert all(returned)
+    assert _seats_available(db, event_id) == 1000
+
+
+def test_events_do_not_block_each_other():
+    db = DatabaseManager()
+    db.rpc_booking = False
+    bookings = BookingManager(db=db)
+    busy, free = _new_event(db, 10), _new_event(db, 10)
+    engine = reservation_engine(db)
+    if engine.lock_for(busy) is engine.lock_for(free):
+        free = _new_event(db, 10)
+
+    done = threading.Event()
+    with engine.lock_for(busy):
+        # the busy event's lock is held: a booking on another event still goes through
+        worker = threading.Thread(target=lambda: done.set() if bookings.book_event("Di", "di@example.com", free, 1)["success"] else None)
+        worker.start()
+        assert done.wait(5)
+    worker.join()
+
+
+def test_bookings_and_holds_share_one_engine():
+    bookings, holds = AsyncBookingManager(), AsyncSeatHoldManager()
+    assert bookings.reservations is holds.reservations
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src.db import AsyncDatabaseManager, get_database_manager
+from src.seat_feed import SeatFeed, seat_feed
+
+
+def _payload(message):
+    data = [line for line in message.splitlines() if line.startswith("data: ")]
+    return json.loads(data[0][len("data: "):])
+
+
+async def _next_message(messages):
+    return await asyncio.wait_for(messages.__anext__(), 2)
+
+
+def test_subscriber_gets_the_latest_count_of_its_events():
+    async def main():
+        feed = SeatFeed(interval=3600)
+        subscriber = feed.subscribe([1])
+        messages = feed.messages(subscriber)
+        assert await _next_message(messages) == "retry: 2000\n\n"
+
+        # three changes to one event in one interval are sent as the last one
+        for seats in (9, 8, 7):
+            feed.record("update_event_seats", [{"id": 1, "seats_available": seats}])
+        feed.record("update_event_seats", [{"id": 2, "seats_available": 3}])
+        assert await feed.flush() == 2
+        message = await _next_message(messages)
+
+        feed.record("delete_event", [{"id": 1, "seats_available": 7}])
+        await feed.flush()
+        deleted = await _next_message(messages)
+        await messages.aclose()
+        return message, deleted, len(feed)
+
+    message, deleted, subscribers = asyncio.run(main())
+    assert message.startswith("id: 1\nevent: seats\n")
+    assert _payload(message) == {"seq": 1, "seats": {"1": 7}}
+    assert _payload(deleted) == {"seq": 2, "seats": {"1": None}}
+    assert subscribers == 0
+
+
+def test_booked_counts_are_read_back():
+    async def main():
+        feed = SeatFeed(interval=3600)
+        asked = []
+
+        async def loader(event_ids):
+            asked.append(event_ids)
+            return SimpleNamespace(data=[{"id": 4, "seats_available": 6}], error=None)
+
+        feed.loader = loader
+        messages = feed.messages(feed.subscribe())
+        await _next_message(messages)
+        # book_seats returns the booking, not the event's new count
+        feed.record("book_seats", [{"id": 50, "event_id": 4, "seats_booked": 2}])
+        await feed.flush()
+        message = await _next_message(messages)
+        await messages.aclose()
+        return asked, _payload(message)["seats"]
+
+    assert asyncio.run(main()) == ([[4]], {"4": 6})
+
+
+def test_stream_route_sends_store_writes():
+    from API.main import stream_seats
+
+    async def main():
+        # the shared store, which the loader reads counts from
+        db = get_database_manager()
+        event_id = db.create_event("E", "Hall", "2030-01-01", 10, 10).data[0]["id"]
+        loader, seat_feed.loader = seat_feed.loader, AsyncDatabaseManager().get_events_by_ids
+        response = await stream_seats([event_id])
+        body = response.body_iterator
+        try:
+            assert await _next_message(body) == "retry: 2000\n\n"
+            db.book_seats("Ann", "ann@example.com", event_id, 3)
+            return event_id, _payload(await _next_message(body))["seats"]
+        finally:
+            await body.aclose()
+            seat_feed.loader = loader
+
+    event_id, seats = asyncio.run(main())
+    assert seats == {str(event_id): 7}
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import src.db
+from src.db import DatabaseManager
+from src.sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    monkeypatch.setattr(src.db, "SQLITE_PATH", str(tmp_path / "store.db"))
+    manager = DatabaseManager()
+    yield manager
+    manager.close()
+
+
+def _new_event(db, seats):
+    return db.create_event("E", "Hall", "2030-01-01", seats, seats).data[0]["id"]
+
+
+def test_events_and_bookings_round_trip(db):
+    assert db.sqlite is not None and not db.use_memory
+    event_id = _new_event(db, 10)
+    assert db.get_event_by_id(event_id).data["event_name"] == "E"
+    assert db.update_event_seats(event_id, 7).data[0]["seats_available"] == 7
+
+    booking = db.create_booking("Ann", "ann@example.com", event_id, 3).data[0]
+    assert [bk["id"] for bk in db.get_bookings_by_event(event_id).data] == [booking["id"]]
+    assert [bk["id"] for bk in db.get_bookings_by_email("ann@example.com").data] == [booking["id"]]
+    assert db.update_booking(booking["id"], 2).data[0]["seats_booked"] == 2
+
+    assert db.delete_booking(booking["id"]).data[0]["id"] == booking["id"]
+    assert db.get_booking_by_id(booking["id"]).error == "Not found"
+    assert db.delete_event(event_id).data[0]["id"] == event_id
+    assert db.get_event_by_id(event_id).error == "Not found"
+
+
+def test_compare_and_set_only_applies_to_the_expected_count(db):
+    event_id = _new_event(db, 10)
+    assert db.compare_and_set_seats(event_id, 10, 8).data[0]["seats_available"] == 8
+    assert db.compare_and_set_seats(event_id, 10, 6).data == []
+    assert db.compare_and_set_seats(event_id + 1, 8, 6).error == "Not found"
+
+    booking_id = db.create_booking("Ann", "ann@example.com", event_id, 2).data[0]["id"]
+    assert db.compare_and_set_booking_seats(booking_id, 2, 4).data[0]["seats_booked"] == 4
+    assert db.compare_and_set_booking_seats(booking_id, 2, 5).data == []
+    assert db.get_event_by_id(event_id).data["seats_available"] == 8
+
+
+def test_book_seats_runs_in_the_store(db):
+    event_id = _new_event(db, 3)
+    booking = db.book_seats("Ann", "ann@example.com", event_id, 2).data[0]
+    assert booking["event_id"] == event_id and booking["seats_booked"] == 2
+    assert db.get_event_by_id(event_id).data["seats_available"] == 1
+
+    assert db.book_seats("Bo", "bo@example.com", event_id, 2).error == "Not enough seats available"
+    assert db.book_seats("Bo", "bo@example.com", event_id + 1, 1).error == "Event not found"
+    assert len(db.get_bookings_by_event(event_id).data) == 1
+
+
+def test_two_connections_share_the_file(tmp_path):
+    # two stores on one file stand in for two API processes
+    path = str(tmp_path / "store.db")
+    first, second = SQLiteStore(path), SQLiteStore(path)
+    event_id = first.create_event("E", "Hall", "2030-01-01", 200, 200).data[0]["id"]
+    assert first._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    stores = [first, second]
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: stores[i % 2].book_seats("Ann", "ann@example.com", event_id, 1), range(300)))
+
+    assert sum(r.error is None for r in results) == 200
+    assert second.get_event_by_id(event_id).data["seats_available"] == 0
+    assert len(first.get_bookings_by_event(event_id).data) == 200
+
+    # a reader is not blocked by the other connection's open write transaction
+    writer = first._conn()
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        writer.execute("UPDATE events SET seats_available = 5 WHERE id = ?", (event_id,))
+        assert second.get_event_by_id(event_id).data["seats_available"] == 0
+    finally:
+        writer.execute("ROLLBACK")
+    first.close()
+    second.close()
+
+
+def test_rows_survive_a_restart(monkeypatch, tmp_path):
+    monkeypatch.setattr(src.db, "SQLITE_PATH", str(tmp_path / "store.db"))
+    db = DatabaseManager()
+    event_id = _new_event(db, 5)
+    db.book_seats("Ann", "ann@example.com", event_id, 2)
+    db.close()
+
+    restarted = DatabaseManager()
+    assert restarted.get_event_by_id(event_id).data["seats_available"] == 3
+    assert [bk["user_email"] for bk in restarted.get_bookings_by_event(event_id).data] == ["ann@example.com"]
+    restarted.close()
+
+
+def test_close_closes_every_thread_connection(db):
+    event_id = _new_event(db, 5)
+    conns = []
+
+    def read():
+        db.get_event_by_id(event_id)
+        conns.append(db.sqlite._conn())
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.close()
+
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    # the next call opens a new connection
+    assert db.get_event_by_id(event_id).data["seats_available"] == 5
@@ -0,0 +1,88 @@
+import time
+
+import src.db
+from src.db import DatabaseManager
+from src.logic import BookingManager, EventManager
+from src.stats import SalesStats
+
+
+def _new_event(db, seats):
+    return db.create_event("E", "Hall", "2030-01-01", seats, seats).data[0]["id"]
+
+
+def test_summary_follows_changes_between_reads():
+    db = DatabaseManager()
+    stats = SalesStats()
+    bookings, events = BookingManager(db=db, stats=stats), EventManager(db=db, stats=stats)
+    first, second, third = (_new_event(db, 20) for _ in range(3))
+    booking_id = bookings.book_event("Ann", "ann@example.com", first, 2)["data"]["id"]
+    bookings.book_event("Bo", "bo@example.com", second, 5)
+
+    data = bookings.get_stats()["data"]
+    assert {k: data[k] for k in ("events", "seats_sold", "bookings")} == {"events": 2, "seats_sold": 7, "bookings": 2}
+    assert [(e["event_id"], e["seats_sold"], e["fill_rate"]) for e in data["by_event"]] == [(second, 5, 0.25), (first, 2, 0.1)]
+
+    bookings.update_booking_seats(booking_id, 6)
+    bookings.book_event("Cy", "cy@example.com", third, 5)
+    data = bookings.get_stats(limit=2)["data"]
+    assert (data["events"], data["seats_sold"], data["bookings"]) == (3, 16, 3)
+    assert [e["event_id"] for e in data["by_event"]] == [first, second]
+
+    bookings.delete_booking(booking_id)
+    events.delete_event(second)
+    data = bookings.get_stats()["data"]
+    assert (data["events"], data["seats_sold"], data["bookings"]) == (1, 5, 1)
+
+
+def test_event_stats_come_from_its_bookings():
+    db = DatabaseManager()
+    bookings = BookingManager(db=db, stats=SalesStats(bucket_seconds=60))
+    event_id = _new_event(db, 10)
+    db.create_booking("Ann", "ann@example.com", event_id, 2, "2030-01-01T10:00:05")
+    db.create_booking("Bo", "bo@example.com", event_id, 3, "2030-01-01T10:00:50")
+    db.create_booking("Cy", "cy@example.com", event_id, 1, "2030-01-01T10:02:00")
+
+    data = bookings.get_event_stats(event_id)["data"]
+    assert (data["seats_sold"], data["bookings"], data["fill_rate"]) == (6, 3, 0.6)
+    assert [(s["start"], s["seats"]) for s in data["sales"]] == [("2030-01-01T10:00:00", 5), ("2030-01-01T10:02:00", 1)]
+
+
+def test_repeat_reads_are_served_from_the_cache():
+    class CountingTotals:
+        def __init__(self, backend):
+            self.backend, self.calls = backend, 0
+
+        def __getattr__(self, name):
+            return getattr(self.backend, name)
+
+        def get_booking_totals(self):
+            self.calls += 1
+            return self.backend.get_booking_totals()
+
+    db = CountingTotals(DatabaseManager())
+    bookings = BookingManager(db=db, stats=SalesStats())
+    event_id = _new_event(db, 10)
+    bookings.book_event("Ann", "ann@example.com", event_id, 2)
+    for _ in range(5):
+        assert bookings.get_stats()["data"]["seats_sold"] == 2
+    assert db.calls == 1
+    bookings.book_event("Bo", "bo@example.com", event_id, 1)
+    assert bookings.get_stats()["data"]["seats_sold"] == 3
+    assert db.calls == 2
+
+
+def test_workers_sharing_a_store_report_the_same_totals(monkeypatch, tmp_path):
+    monkeypatch.setattr(src.db, "SQLITE_PATH", str(tmp_path / "store.db"))
+    # two API processes: separate stores on one file, separate stats caches
+    first = BookingManager(db=DatabaseManager(), stats=SalesStats(ttl=0.2))
+    second = BookingManager(db=DatabaseManager(), stats=SalesStats(ttl=0.2))
+    event_id = _new_event(first.db, 10)
+    first.book_event("Ann", "ann@example.com", event_id, 2)
+    assert second.get_stats()["data"]["seats_sold"] == 2
+
+    first.book_event("Bo", "bo@example.com", event_id, 3)
+    time.sleep(0.25)
+    assert second.get_stats()["data"]["seats_sold"] == 5
+    assert second.get_event_stats(event_id)["data"]["bookings"] == 2
+    first.db.close()
+    second.db.close()
@@ -0,0 +1,24 @@
+import asyncio
+
+from src.logic import AsyncBookingManager, AsyncWaitlistManager
+from src.waitlist import Waitlist
+
+
+def test_entry_larger_than_the_event_is_rejected_and_the_line_moves():
+    async def main():
+        waitlist = Waitlist()
+        manager = AsyncWaitlistManager(waitlist, AsyncBookingManager(waitlist=waitlist))
+        db = manager.bookings.db
+        event_id = (await db.create_event("E", "Hall", "2030-01-01", 10, 10)).data[0]["id"]
+        booking = (await manager.bookings.book_event("Ann", "ann@example.com", event_id, 10))["data"]
+
+        too_big = await manager.join(event_id, "Bo", "bo@example.com", 50)
+        fits = (await manager.join(event_id, "Cy", "cy@example.com", 2))["data"]
+        await manager.bookings.update_booking_seats(booking["id"], 7)
+        await manager.promote_pending()
+        await manager.close()
+        return too_big, (await manager.get_entry(fits["entry_id"]))["data"]
+
+    too_big, entry = asyncio.run(main())
+    assert not too_big["success"] and "total seats" in too_big["message"]
+    assert entry["status"] == "booked" and entry["result"]["seats_booked"] == 2
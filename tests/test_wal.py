@@ -0,0 +1,77 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import src.db
+from src.db import DatabaseManager
+
+
+def _open_store(monkeypatch, directory):
+    monkeypatch.setattr(src.db, "MEMORY_WAL_DIR", str(directory))
+    monkeypatch.setattr(src.db, "MEMORY_WAL_SYNC_MS", 5000)
+    monkeypatch.setattr(src.db, "MEMORY_SNAPSHOT_EVERY", 50)
+    return DatabaseManager()
+
+
+def test_recovers_writes_made_during_snapshots(monkeypatch, tmp_path):
+    db = _open_store(monkeypatch, tmp_path)
+    event_ids = [db.create_event(f"E{i}", "Hall", "2030-01-01", 1000, 1000).data[0]["id"] for i in range(4)]
+
+    def churn(i):
+        # inserts, in-place updates and deletes race the background snapshots
+        event_id = event_ids[i % len(event_ids)]
+        booking = db.book_seats("Ann", "ann@example.com", event_id, 2).data[0]
+        db.update_booking(booking["id"], 1)
+        if i % 3 == 0:
+            db.delete_booking(booking["id"])
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(churn, range(600)))
+    db.close()
+
+    recovered = DatabaseManager()
+    assert {k: v.as_tuple() for k, v in recovered.events.items()} == {k: v.as_tuple() for k, v in db.events.items()}
+    assert {k: v.as_tuple() for k, v in recovered.bookings.items()} == {k: v.as_tuple() for k, v in db.bookings.items()}
+    recovered.close()
+
+
+def test_close_keeps_unsynced_writes(monkeypatch, tmp_path):
+    db = _open_store(monkeypatch, tmp_path)
+    event_id = db.create_event("E", "Hall", "2030-01-01", 10, 10).data[0]["id"]
+    db.book_seats("Ann", "ann@example.com", event_id, 3)
+    # well inside the 5s sync window
+    db.close()
+
+    recovered = DatabaseManager()
+    assert [bk.seats_booked for bk in recovered.bookings.values()] == [3]
+    recovered.close()
+
+
+def test_appends_do_not_wait_for_a_running_fsync(monkeypatch, tmp_path):
+    import src.wal
+    from src.wal import WriteAheadLog
+
+    in_fsync, release = threading.Event(), threading.Event()
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        in_fsync.set()
+        release.wait(5)
+        real_fsync(fd)
+
+    wal = WriteAheadLog(str(tmp_path), sync_interval=3600)
+    wal.recover()
+    wal.append("seats", 1, 5)
+    monkeypatch.setattr(src.wal.os, "fsync", slow_fsync)
+    syncing = threading.Thread(target=wal.sync)
+    syncing.start()
+    assert in_fsync.wait(5)
+
+    appended = threading.Event()
+    threading.Thread(target=lambda: (wal.append("seats", 1, 4), appended.set())).start()
+    assert appended.wait(1)
+    release.set()
+    syncing.join()
+    monkeypatch.setattr(src.wal.os, "fsync", real_fsync)
+    wal.close()
+    assert [op[1:] for op in wal.recover()[1]] == [["seats", 1, 5], ["seats", 1, 4]]